@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""Adversarial-input benchmark: detection cost per byte should stay flat.
+
+Usage:
+    python bench_adversarial.py [--max-mb MB] [--baseline-kb KB]
+
+Builds crafted inputs from 1 MB up to --max-mb (default 8) that maximise
+backtracking in the original ".*" patterns: many first keywords with no
+closing keyword, closers only at the very end, and keyword soup. Prints
+analyse() time and ns/byte per size. The original per-pattern regex loop
+is quadratic on these, so it is only timed up to --baseline-kb (default
+32) for comparison.
+"""
+
+from __future__ import annotations
+
+import argparse
+import re
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from detector import _CONFLICT_PATTERNS, _INJECTION_PATTERNS, analyse  # noqa: E402
+
+_FAMILIES = {
+    "must-no-close": "must ",
+    "must-not-tail": "must ",
+    "always-never": "always ",
+    "leak-no-secret": "leak the ",
+    "act-as": "act as ",
+    "soup": "must always leak act as never this that ",
+}
+_TAILS = {"must-not-tail": "must not", "always-never": "never"}
+
+
+def payload(family: str, size: int) -> str:
+    unit = _FAMILIES[family]
+    tail = _TAILS.get(family, "")
+    return unit * ((size - len(tail)) // len(unit)) + tail
+
+
+def baseline(text: str) -> None:
+    low = text.strip().lower()
+    for pat in _INJECTION_PATTERNS + _CONFLICT_PATTERNS:
+        re.search(pat, low, flags=re.IGNORECASE | re.DOTALL)
+
+
+def _time(fn, arg) -> float:
+    t0 = time.perf_counter()
+    fn(arg)
+    return time.perf_counter() - t0
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--max-mb", type=int, default=8)
+    ap.add_argument("--baseline-kb", type=int, default=32)
+    opts = ap.parse_args()
+
+    print(f"{'family':<15} {'size':>6} {'analyse':>10} {'ns/byte':>8}")
+    for family in _FAMILIES:
+        for kb in (8, 16, 32, 64):
+            if kb > opts.baseline_kb:
+                break
+            text = payload(family, kb << 10)
+            s = _time(baseline, text)
+            print(f"{family:<15} {kb:>5}K {s:>9.3f}s {s * 1e9 / len(text):>8.0f}  (original)")
+        mb = 1
+        while mb <= opts.max_mb:
+            text = payload(family, mb << 20)
+            s = _time(analyse, text)
+            print(f"{family:<15} {mb:>5}M {s:>9.3f}s {s * 1e9 / len(text):>8.0f}")
+            mb *= 2
+
+
+if __name__ == "__main__":
+    main()
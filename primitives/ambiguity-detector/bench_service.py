@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""Load-test the screening service on localhost.
+
+Usage:
+    python bench_service.py [--requests N] [--connections C] [--workers W]
+                            [--max-batch B] [--unix] [--seed S]
+
+Starts service.py's server on its own event loop thread (TCP on 127.0.0.1,
+or a Unix socket with --unix) and drives it from C keep-alive connections,
+each sending its share of N prompts from bench_detector's corpus back to
+back. Prints throughput, client-side latency percentiles and the server's
+own histograms, and checks every response against analyse().
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from bench_detector import corpus  # noqa: E402
+from detector import analyse, report_to_dict  # noqa: E402
+from service import Screener, ScreenClient, ScreeningServer  # noqa: E402
+
+
+def _start_server(screener: Screener, path):
+    """Run the server on a background loop; returns (loop, server, thread)."""
+    loop = asyncio.new_event_loop()
+    ready = threading.Event()
+    box = {}
+
+    async def boot():
+        await screener.start()
+        box["server"] = await ScreeningServer(screener).start(path=path)
+        ready.set()
+
+    thread = threading.Thread(target=loop.run_forever, daemon=True)
+    thread.start()
+    asyncio.run_coroutine_threadsafe(boot(), loop).result()
+    ready.wait()
+    return loop, box["server"], thread
+
+
+async def _drive(address, path, texts, connections):
+    latencies = [0.0] * len(texts)
+    results = [None] * len(texts)
+
+    async def conn(k):
+        c = await (ScreenClient.connect(path=path) if path else ScreenClient.connect(*address))
+        try:
+            for i in range(k, len(texts), connections):
+                t0 = time.perf_counter()
+                results[i] = await c.screen(texts[i])
+                latencies[i] = time.perf_counter() - t0
+        finally:
+            await c.close()
+
+    await asyncio.gather(*(conn(k) for k in range(connections)))
+    return results, latencies
+
+
+def _pct(sorted_values, q):
+    return sorted_values[min(len(sorted_values) - 1, int(q * len(sorted_values)))]
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--requests", type=int, default=20000)
+    ap.add_argument("--connections", type=int, default=64)
+    ap.add_argument("--workers", type=int, default=None)
+    ap.add_argument("--max-batch", type=int, default=64)
+    ap.add_argument("--unix", action="store_true")
+    ap.add_argument("--seed", type=int, default=0)
+    opts = ap.parse_args()
+
+    texts = corpus(opts.requests, opts.seed)
+    t0 = time.perf_counter()
+    expected = [report_to_dict(analyse(t)) for t in texts]
+    inline = time.perf_counter() - t0
+
+    tmp = tempfile.TemporaryDirectory()
+    path = os.path.join(tmp.name, "screen.sock") if opts.unix else None
+    screener = Screener(workers=opts.workers, max_batch=opts.max_batch)
+    loop, server, thread = _start_server(screener, path)
+    try:
+        t0 = time.perf_counter()
+        results, lat = asyncio.run(_drive(server.address, path, texts, opts.connections))
+        served = time.perf_counter() - t0
+        metrics = asyncio.run_coroutine_threadsafe(_metrics(screener), loop).result()
+    finally:
+        asyncio.run_coroutine_threadsafe(_stop(server, screener), loop).result()
+        loop.call_soon_threadsafe(loop.stop)
+        thread.join()
+        tmp.cleanup()
+
+    assert results == expected, "service reports differ from analyse()"
+    lat.sort()
+    n = len(texts)
+    print(f"{n} prompts, {opts.connections} connections, {screener.workers} workers, "
+          f"{'unix' if path else 'tcp'}")
+    print(f"inline analyse : {inline:8.3f}s  {n / inline:10.0f} req/s")
+    print(f"service        : {served:8.3f}s  {n / served:10.0f} req/s")
+    print("client latency : p50 {:.2f} ms  p90 {:.2f} ms  p99 {:.2f} ms  max {:.2f} ms".format(
+        *(1e3 * _pct(lat, q) for q in (0.5, 0.9, 0.99)), 1e3 * lat[-1]))
+    for name in ("latency", "queue_wait", "compute"):
+        h = metrics[name]
+        print(f"{'server ' + name:<15}: p50 <= {1e3 * h['p50']:.3f} ms  p99 <= {1e3 * h['p99']:.3f} ms")
+    b = metrics["batch_size"]
+    print(f"batches        : {b['count']}  mean size {b['sum'] / max(1, b['count']):.1f}  max {b['max']:.0f}")
+
+
+async def _metrics(screener: Screener):
+    return screener.metrics()
+
+
+async def _stop(server: ScreeningServer, screener: Screener) -> None:
+    await server.close()
+    await screener.close()
+
+
+if __name__ == "__main__":
+    main()
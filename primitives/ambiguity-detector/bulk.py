@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""Batch and streaming analysis for many prompts.
+
+Usage:
+    python bulk.py PROMPTS [--field NAME] [--workers N] [--only-flagged]
+
+PROMPTS is a text file with one prompt per line, or a .jsonl file whose
+records carry the prompt under --field (default "prompt"); "-" reads
+stdin. One JSON line per prompt is written to stdout, and a status
+summary to stderr. Exits 1 if any prompt is dangerous.
+"""
+
+from __future__ import annotations
+
+import argparse
+import itertools
+import json
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import ExitStack
+from typing import IO, Dict, Iterable, Iterator, List, Optional
+
+from detector import Report, Status, analyse, current_matcher, report_to_dict, use_matcher
+
+WINDOW = 8192
+MIN_PARALLEL = 4096
+
+
+def iter_reports(
+    texts: Iterable[str],
+    *,
+    workers: Optional[int] = None,
+    window: int = WINDOW,
+    min_parallel: int = MIN_PARALLEL,
+) -> Iterator[Report]:
+    """Yield one Report per input, in input order, reading lazily.
+
+    Inputs are taken `window` at a time and identical texts within a
+    window are analysed once. A window with at least `min_parallel`
+    distinct texts is spread over a process pool of `workers` processes
+    (None: one per CPU); the pool is started on first use and reused.
+
+    Each window is analysed with the rules installed when it is read
+    (detector.current_matcher()), in-process or in the pool alike. The
+    workers are given those rules at start-up, and the pool is replaced
+    when detector.use_matcher installs new ones.
+    """
+    if window <= 0:
+        raise ValueError("window must be >= 1")
+    n_workers = workers or os.cpu_count() or 1
+    it = iter(texts)
+    pool: Optional[ProcessPoolExecutor] = None
+    pool_matcher = None
+    try:
+        while True:
+            batch = list(itertools.islice(it, window))
+            if not batch:
+                return
+            matcher = current_matcher()
+            unique = list(dict.fromkeys(batch))
+            if n_workers > 1 and len(unique) >= min_parallel:
+                if pool is None or pool_matcher is not matcher:
+                    if pool is not None:
+                        pool.shutdown()
+                    pool = ProcessPoolExecutor(
+                        n_workers, initializer=use_matcher, initargs=(matcher,),
+                    )
+                    pool_matcher = matcher
+                chunk = max(1, len(unique) // (4 * n_workers))
+                reports = pool.map(analyse, unique, chunksize=chunk)
+            else:
+                reports = (analyse(t, matcher) for t in unique)
+            by_text: Dict[str, Report] = dict(zip(unique, reports))
+            for text in batch:
+                yield by_text[text]
+    finally:
+        if pool is not None:
+            pool.shutdown()
+
+
+def analyse_many(
+    texts: Iterable[str],
+    *,
+    workers: Optional[int] = None,
+    min_parallel: int = MIN_PARALLEL,
+) -> List[Report]:
+    """Reports for every input, in order; all duplicates share one analysis."""
+    items = list(texts)
+    return list(iter_reports(
+        items, workers=workers, window=max(1, len(items)), min_parallel=min_parallel,
+    ))
+
+
+def read_prompts(f: IO[str], field: Optional[str] = None) -> Iterator[str]:
+    """Prompts from a line-per-prompt stream, or JSON Lines when `field` is set."""
+    for lineno, line in enumerate(f, 1):
+        if field is None:
+            yield line.rstrip("\r\n")
+            continue
+        if not line.strip():
+            continue
+        try:
+            rec = json.loads(line)
+        except ValueError as e:
+            raise ValueError(f"line {lineno}: invalid JSON ({e})") from None
+        value = rec.get(field) if isinstance(rec, dict) else None
+        if not isinstance(value, str):
+            raise ValueError(f"line {lineno}: no string field {field!r}")
+        yield value
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    ap = argparse.ArgumentParser(description="Scan prompts with the ambiguity detector.")
+    ap.add_argument("prompts", help="text or .jsonl file, or - for stdin")
+    ap.add_argument("--field", help="JSONL field holding the prompt (default: prompt for .jsonl)")
+    ap.add_argument("--workers", type=int, default=None, help="processes (default: one per CPU)")
+    ap.add_argument("--only-flagged", action="store_true", help="omit clear prompts from the output")
+    opts = ap.parse_args(argv)
+
+    field = opts.field
+    if field is None and opts.prompts.endswith(".jsonl"):
+        field = "prompt"
+    counts = {s: 0 for s in Status}
+    with ExitStack() as stack:
+        f = sys.stdin if opts.prompts == "-" else stack.enter_context(
+            open(opts.prompts, encoding="utf-8")
+        )
+        reports = iter_reports(read_prompts(f, field), workers=opts.workers)
+        for n, report in enumerate(reports, 1):
+            counts[report.status] += 1
+            if opts.only_flagged and report.status is Status.CLEAR:
+                continue
+            print(json.dumps({"n": n, **report_to_dict(report)}))
+    print(" ".join(f"{s.value}={c}" for s, c in counts.items()), file=sys.stderr)
+    return 1 if counts[Status.DANGEROUS] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,8 +1,11 @@
 from __future__ import annotations
-import re
+import os
+from contextlib import ExitStack
 from dataclasses import dataclass
 from enum import Enum
-from typing import List
+from typing import IO, Any, Dict, List, Optional, Tuple, Union
+
+from matcher import Matcher, Rule
 
 
 class Status(str, Enum):
@@ -47,50 +50,44 @@ _AMBIG_REF_PATTERNS = [
 ]
 
 
-def _snip(s: str, m: re.Match, max_len: int = 80) -> str:
-    start = max(m.start() - 20, 0)
-    end = min(m.end() + 20, len(s))
-    frag = s[start:end].strip()
-    return (frag[: max_len - 1] + "...") if len(frag) >= max_len else frag
+RULES: List[Rule] = (
+    [Rule("injection", "high", p) for p in _INJECTION_PATTERNS]
+    + [Rule("conflict", "medium", p) for p in _CONFLICT_PATTERNS]
+    + [Rule("ambiguous_reference", "low", _AMBIG_REF_PATTERNS[0],
+            min_count=6, min_length=40, evidence="{count} vague refs")]
+)
 
+_MATCHER = Matcher(RULES)
 
-def analyse(text: str) -> Report:
-    t = (text or "").strip()
-    findings: List[Finding] = []
 
-    if t == "":
-        return Report(status=Status.CLEAR, findings=[])
+def current_matcher() -> Matcher:
+    return _MATCHER
 
-    low = t.lower()
-
-    # Injection / hostile patterns
-    for pat in _INJECTION_PATTERNS:
-        m = re.search(pat, low, flags=re.IGNORECASE | re.DOTALL)
-        if m:
-            findings.append(
-                Finding(kind="injection", severity="high", evidence=_snip(text, m))
-            )
-
-    # Conflicts
-    for pat in _CONFLICT_PATTERNS:
-        m = re.search(pat, low, flags=re.IGNORECASE | re.DOTALL)
-        if m:
-            findings.append(
-                Finding(kind="conflict", severity="medium", evidence=_snip(text, m))
-            )
-
-    # Ambiguous references (only meaningful if input is long enough)
-    if len(t) >= 40:
-        refs = re.findall(_AMBIG_REF_PATTERNS[0], low, flags=re.IGNORECASE)
-        if len(refs) >= 6:
-            findings.append(
-                Finding(
-                    kind="ambiguous_reference",
-                    severity="low",
-                    evidence=f"{len(refs)} vague refs",
-                )
-            )
 
+def use_matcher(matcher: Matcher) -> Matcher:
+    """Install compiled rules for analyse(); returns the previous ones.
+
+    The swap is a single rebinding: a call already running finishes with
+    the rules it started with, and callers never wait on a reload.
+    """
+    global _MATCHER
+    previous, _MATCHER = _MATCHER, matcher
+    return previous
+
+
+def _snip(s: str, span: Tuple[int, int], max_len: int = 80) -> str:
+    return _snip_piece(s, 0, len(s), span, max_len)
+
+
+def _snip_piece(piece: str, offset: int, length: int, span: Tuple[int, int], max_len: int = 80) -> str:
+    """_snip() on a text of `length` chars of which only piece, at offset, is held."""
+    start = max(span[0] - 20, 0)
+    end = min(span[1] + 20, length)
+    frag = piece[start - offset:end - offset].strip()
+    return (frag[: max_len - 1] + "...") if len(frag) >= max_len else frag
+
+
+def _report(findings: List[Finding]) -> Report:
     if any(f.kind == "injection" for f in findings):
         status = Status.DANGEROUS
     elif findings:
@@ -99,3 +96,71 @@ def analyse(text: str) -> Report:
         status = Status.CLEAR
 
     return Report(status=status, findings=findings)
+
+
+def analyse(text: str, matcher: Optional[Matcher] = None) -> Report:
+    m = matcher or _MATCHER
+    t = (text or "").strip()
+    findings: List[Finding] = []
+
+    if t == "":
+        return Report(status=Status.CLEAR, findings=[])
+
+    # Patterns are case-insensitive, so ASCII needs no lowered copy. Other
+    # text is still lowered: lower() can change its length, and match
+    # offsets must stay the same.
+    low = t if t.isascii() else t.lower()
+
+    for rule, span, count in m.evaluate(low, len(t)):
+        if span is not None:
+            evidence = _snip(text, span)
+        else:
+            evidence = rule.evidence.format(count=count)
+        findings.append(Finding(kind=rule.kind, severity=rule.severity, evidence=evidence))
+
+    return _report(findings)
+
+
+def analyse_stream(
+    source: Union[str, "os.PathLike[str]", IO[str]],
+    chunk_size: int = 1 << 16,
+    overlap: int = 4096,
+    matcher: Optional[Matcher] = None,
+) -> Report:
+    """analyse() for a file path or text stream, in constant memory.
+
+    The text is read chunk_size characters at a time and scanned in
+    overlapping windows (see matcher.MatchStream). The Report equals
+    analyse(text.lstrip()) for ASCII text, provided no single match is
+    longer than about overlap - 20 characters; leading whitespace only
+    ever shifted analyse()'s evidence offsets.
+    """
+    stream = (matcher or _MATCHER).stream(overlap)
+    with ExitStack() as stack:
+        if isinstance(source, (str, os.PathLike)):
+            source = stack.enter_context(open(source, encoding="utf-8"))
+        while True:
+            chunk = source.read(chunk_size)
+            if not chunk:
+                break
+            stream.feed(chunk)
+    hits, pieces = stream.finish()
+    findings: List[Finding] = []
+    for (rule, span, count), piece in zip(hits, pieces):
+        if span is not None and piece is not None:
+            evidence = _snip_piece(piece[1], piece[0], stream.length, span)
+        else:
+            evidence = rule.evidence.format(count=count)
+        findings.append(Finding(kind=rule.kind, severity=rule.severity, evidence=evidence))
+    return _report(findings)
+
+
+def report_to_dict(report: Report) -> Dict[str, Any]:
+    """JSON-ready form of a Report."""
+    return {
+        "status": report.status.value,
+        "findings": [
+            {"kind": f.kind, "severity": f.severity, "evidence": f.evidence}
+            for f in report.findings
+        ],
+    }
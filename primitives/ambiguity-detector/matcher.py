@@ -0,0 +1,565 @@
+"""Precompiled multi-rule matcher for the ambiguity detector.
+
+Every rule pattern is compiled once. Whole-word literals that a pattern
+cannot match without (e.g. ``ignore`` in ``\\bignore (all|any) ...``) are
+collected as keywords, and an input is tokenised once to learn which
+keywords occur and how often. Rules whose keywords are absent are
+skipped without running their regex, and count rules made of whole words
+are answered from the same scan.
+
+Top-level ``A.*B`` alternatives are split at the gap and evaluated in
+linear time (see _Alt), so hostile input cannot trigger the quadratic
+retry of ``.*`` from every occurrence of A. Matcher.superlinear lists
+rules whose ``.*`` could not be split and still run as written.
+
+Results are identical to calling re.search / re.findall with each pattern
+on the same text and flags.
+"""
+from __future__ import annotations
+import re
+from dataclasses import dataclass
+from typing import Dict, FrozenSet, List, Optional, Pattern, Sequence, Tuple
+
+FLAGS = re.IGNORECASE | re.DOTALL
+
+_WORD = re.compile(r"[A-Za-z0-9_]+")
+_QUANTIFIERS = "?*+{"
+_TOKEN = re.compile(r"\w+")
+
+
+@dataclass(frozen=True)
+class Rule:
+    kind: str
+    severity: str
+    pattern: str
+    # Count rules (min_count > 0) fire when at least min_count matches occur;
+    # search rules fire on the first match and quote it as evidence.
+    min_count: int = 0
+    # Only evaluated when the stripped input has at least this many chars.
+    min_length: int = 0
+    # Evidence for count rules; {count} is replaced by the match count.
+    evidence: str = "{count} matches"
+
+
+Span = Tuple[int, int]
+# (rule, span of the first match or None, match count or 0)
+Hit = Tuple[Rule, Optional[Span], int]
+
+
+def split_top(pattern: str, sep: str) -> Optional[List[str]]:
+    """Split a regex on `sep` outside groups, classes and escapes.
+
+    Returns None for patterns this parser does not handle (inline flags,
+    group extensions, backreferences).
+    """
+    parts: List[str] = []
+    depth = 0
+    start = 0
+    i = 0
+    n = len(pattern)
+    while i < n:
+        c = pattern[i]
+        if c == "\\":
+            if i + 1 < n and pattern[i + 1].isdigit():
+                return None
+            i += 2
+            continue
+        if c == "[":
+            # Skip a character class; "]" first in the class is literal.
+            j = i + 1
+            if j < n and pattern[j] == "^":
+                j += 1
+            if j < n and pattern[j] == "]":
+                j += 1
+            while j < n and pattern[j] != "]":
+                j += 2 if pattern[j] == "\\" else 1
+            i = j + 1
+            continue
+        if c == "(":
+            if pattern.startswith("(?", i):
+                return None
+            depth += 1
+        elif c == ")":
+            depth -= 1
+        elif depth == 0 and pattern.startswith(sep, i):
+            parts.append(pattern[start:i])
+            i += len(sep)
+            start = i
+            continue
+        i += 1
+    parts.append(pattern[start:])
+    return parts
+
+
+def _lead_words(segment: str) -> List[FrozenSet[str]]:
+    """Whole words a segment must start with, as any-of sets.
+
+    Only the literal prefix after a leading \\b is read: plain words
+    followed by a space or \\b, and groups of plain words like (a|b)
+    followed by a space or \\b. Anything else ends the prefix.
+    """
+    if not segment.startswith(r"\b"):
+        return []
+    out: List[FrozenSet[str]] = []
+    i = 2
+    while i < len(segment):
+        if segment[i] == "(":
+            close = segment.find(")", i)
+            if close < 0:
+                break
+            choices = segment[i + 1:close].split("|")
+            if not all(_WORD.fullmatch(w) for w in choices):
+                break
+            words, end = frozenset(w.lower() for w in choices), close + 1
+        else:
+            m = _WORD.match(segment, i)
+            if m is None:
+                break
+            words, end = frozenset([m.group().lower()]), m.end()
+        if segment.startswith(" ", end) and (
+            end + 1 == len(segment) or segment[end + 1] not in _QUANTIFIERS
+        ):
+            out.append(words)
+            i = end + 1
+        elif segment.startswith(r"\b", end):
+            out.append(words)
+            break
+        else:
+            break
+    return out
+
+
+_COUNT = re.compile(r"\\b(?:\(([A-Za-z0-9_]+(?:\|[A-Za-z0-9_]+)*)\)|([A-Za-z0-9_]+))\\b")
+
+
+def _count_words(pattern: str) -> Optional[FrozenSet[str]]:
+    r"""Words of a pattern that is exactly \bword\b or \b(w1|w2|...)\b."""
+    m = _COUNT.fullmatch(pattern)
+    if m is None:
+        return None
+    return frozenset(w.lower() for w in (m.group(1) or m.group(2)).split("|"))
+
+
+class _Alt:
+    """One top-level alternative: a plain regex, or A.*B split at the gap.
+
+    For A.*B the leftmost match starts at the first A whose match ends at
+    or before the last position where B matches, and (.* being greedy)
+    ends where that last B match ends. Both are found in linear time,
+    where the joined regex retries the tail of the text from every A.
+    """
+    __slots__ = ("head", "last_tail", "tail", "head_gate", "tail_gate")
+
+    def __init__(
+        self,
+        segments: List[str],
+        head_gate: Optional[FrozenSet[str]] = None,
+        tail_gate: Optional[FrozenSet[str]] = None,
+    ) -> None:
+        self.head = re.compile(segments[0], FLAGS)
+        # Any-of word sets each segment needs (None: no known keyword).
+        self.head_gate = head_gate
+        self.tail_gate = tail_gate
+        self.last_tail: Optional[Pattern[str]] = None
+        self.tail: Optional[Pattern[str]] = None
+        if len(segments) == 2:
+            # One anchored attempt: .* runs to the end and backs off to the
+            # last position where the tail matches.
+            self.last_tail = re.compile(f"(?s:.*)(?=({segments[1]}))", FLAGS)
+            # Every position where the tail matches (used by MatchStream).
+            self.tail = re.compile(f"(?=({segments[1]}))", FLAGS)
+
+    @property
+    def gate(self) -> List[FrozenSet[str]]:
+        return [g for g in (self.head_gate, self.tail_gate) if g is not None]
+
+    def search(self, low: str) -> Optional[Span]:
+        if self.last_tail is None:
+            m = self.head.search(low)
+            return None if m is None else m.span()
+        t = self.last_tail.match(low)
+        if t is None:
+            return None
+        q, end = t.span(1)
+        pos = 0
+        while True:
+            m = self.head.search(low, pos)
+            if m is None or m.start() > q:
+                return None
+            if m.end() <= q:
+                return m.start(), end
+            pos = m.start() + 1
+
+
+def _split_gap(alt: str) -> Optional[List[str]]:
+    """[alt] or [A, B] for A.*B; None if .* is used any other way."""
+    segments = split_top(alt, ".*")
+    if segments is None or len(segments) > 2:
+        return None
+    if len(segments) == 2 and segments[1][:1] in ("?", "+", "{", "*"):
+        return None  # lazy or possessive-looking quantifier, not a plain gap
+    for seg in segments:
+        if ".*" in seg or ".+" in seg:
+            return None  # nested gap inside a group
+    return segments
+
+
+class _Compiled:
+    __slots__ = ("rule", "regex", "alts", "count_words")
+
+    def __init__(self, rule: Rule) -> None:
+        self.rule = rule
+        self.regex = re.compile(rule.pattern, FLAGS)
+        self.count_words: Optional[FrozenSet[str]] = None
+        # None: the pattern is not split and is evaluated as written.
+        self.alts: Optional[List[_Alt]] = None
+        if rule.min_count > 0:
+            self.count_words = _count_words(rule.pattern)
+            return
+        alts = split_top(rule.pattern, "|")
+        if alts is None:
+            return
+        compiled = []
+        for alt in alts:
+            segments = _split_gap(alt)
+            if segments is None:
+                return
+            # One required word set per segment is enough to gate on;
+            # longer words are rarer and keep the keyword scan cheap.
+            gates = [
+                max(sets, key=lambda ws: min(map(len, ws))) if sets else None
+                for sets in map(_lead_words, segments)
+            ]
+            compiled.append(_Alt(segments, *gates))
+        self.alts = compiled
+
+    @property
+    def superlinear(self) -> bool:
+        """Whether the evaluated regexes still contain an unbounded gap."""
+        if self.alts is None:
+            return ".*" in self.rule.pattern or ".+" in self.rule.pattern
+        return False
+
+
+class Matcher:
+    """Rules compiled for repeated evaluation against many inputs."""
+
+    def __init__(self, rules: Sequence[Rule]) -> None:
+        self.rules: Tuple[Rule, ...] = tuple(rules)
+        self._compiled = [_Compiled(r) for r in self.rules]
+        words = set()
+        for c in self._compiled:
+            if c.count_words:
+                words |= c.count_words
+            for alt in c.alts or ():
+                for ws in alt.gate:
+                    words |= ws
+        self.keywords: Tuple[str, ...] = tuple(sorted(words))
+        self._bits: Dict[str, int] = {w: 1 << i for i, w in enumerate(self.keywords)}
+        # Per rule and alternative: the any-of bitmasks that must all hit.
+        self._masks: List[List[Tuple[int, ...]]] = [
+            [tuple(sum(self._bits[w] for w in ws) for ws in alt.gate) for alt in c.alts or ()]
+            for c in self._compiled
+        ]
+        self.superlinear: Tuple[Rule, ...] = tuple(
+            c.rule for c in self._compiled if c.superlinear
+        )
+        # Only consulted for non-ASCII tokens, where IGNORECASE folding
+        # (e.g. U+017F LONG S ~ "s") differs from str.lower().
+        self._fold = (
+            re.compile("|".join(f"({re.escape(w)})" for w in self.keywords), FLAGS)
+            if self.keywords
+            else None
+        )
+
+    def scan(self, low: str) -> Dict[str, int]:
+        """Whole-word occurrences of each keyword, from one tokenising pass."""
+        counts: Dict[str, int] = {}
+        if self.keywords:
+            if low.isascii():
+                self._tally(_TOKEN.findall(low.lower()), counts, lowered=True)
+            else:
+                self._tally(_TOKEN.findall(low), counts, lowered=False)
+        return counts
+
+    def _tally(self, tokens: List[str], counts: Dict[str, int], lowered: bool) -> None:
+        bits = self._bits
+        if lowered:
+            for tok in tokens:
+                if tok in bits:
+                    counts[tok] = counts.get(tok, 0) + 1
+            return
+        fold = self._fold
+        for tok in tokens:
+            if tok.isascii():
+                tok = tok.lower()
+                if tok not in bits:
+                    continue
+            else:
+                m = fold.fullmatch(tok)
+                if m is None:
+                    continue
+                tok = self.keywords[m.lastindex - 1]
+            counts[tok] = counts.get(tok, 0) + 1
+
+    def evaluate(self, low: str, length: int) -> List[Hit]:
+        """Fired rules in rule order.
+
+        `low` is the text to match (already case-normalised if needed) and
+        `length` the stripped input length used for min_length.
+        """
+        counts = self.scan(low)
+        present = 0
+        for w in counts:
+            present |= self._bits[w]
+        hits: List[Hit] = []
+        for c, masks in zip(self._compiled, self._masks):
+            rule = c.rule
+            if length < rule.min_length:
+                continue
+            if rule.min_count > 0:
+                if c.count_words is not None:
+                    n = 0
+                    for w in c.count_words:
+                        n += counts.get(w, 0)
+                else:
+                    n = sum(1 for _ in c.regex.finditer(low))
+                if n >= rule.min_count:
+                    hits.append((rule, None, n))
+                continue
+            if c.alts is None:
+                m = c.regex.search(low)
+                if m is not None:
+                    hits.append((rule, m.span(), 0))
+                continue
+            best: Optional[Span] = None
+            for alt, need in zip(c.alts, masks):
+                for mask in need:
+                    if not present & mask:
+                        break
+                else:
+                    span = alt.search(low)
+                    # Leftmost wins; on a tie the earlier alternative does.
+                    if span is not None and (best is None or span[0] < best[0]):
+                        best = span
+            if best is not None:
+                hits.append((rule, best, 0))
+        return hits
+
+    def stream(self, overlap: int = 4096) -> "MatchStream":
+        return MatchStream(self, overlap)
+
+
+_BACK = 64  # context kept before a window: lookbehind for \b, 20 chars of evidence
+
+
+def _is_word(s: str, i: int) -> bool:
+    return _TOKEN.match(s, i, i + 1) is not None
+
+
+class _Found:
+    """First match of one search alternative, with the text around it."""
+    __slots__ = ("start", "end", "offset", "piece")
+
+    def __init__(self, start: int, end: int, offset: int, piece: str) -> None:
+        self.start, self.end = start, end
+        self.offset, self.piece = offset, piece  # piece == text[offset:offset + len(piece)]
+
+
+class MatchStream:
+    """Evaluate a Matcher over text fed in chunks, in constant memory.
+
+    Text is processed in windows; a match counts for the window its start
+    falls in, and each window sees `overlap` characters of the next one,
+    so matches up to about overlap - 20 characters long are found across
+    chunk edges exactly as in one string. Leading whitespace is dropped,
+    so offsets are those of the left-stripped text. Matching is
+    case-insensitive on the text as fed, without a lowered copy. For
+    A.*B alternatives the first match of A is used, which is exact when
+    A's matches cannot nest (literal words and phrases).
+
+    finish() returns the hits, and for each hit with a span the original
+    text from 20 characters before the match start, up to the match end
+    plus 20 or `overlap` characters, whichever is shorter (enough for an
+    evidence snippet).
+    """
+
+    def __init__(self, matcher: Matcher, overlap: int = 4096) -> None:
+        longest = max(map(len, matcher.keywords), default=0)
+        if overlap <= max(longest, _BACK):
+            raise ValueError(f"overlap must exceed {max(longest, _BACK)} characters")
+        self._m = matcher
+        self.overlap = overlap
+        self._buf = ""
+        self._base = 0       # text offset of _buf[0]
+        self._lo = 0         # text offset where the next window starts
+        self._started = False
+        self.length = 0      # characters of left-stripped text fed so far
+        self._trail = 0      # trailing whitespace run at the end of that
+        self._counts: Dict[str, int] = {}
+        self._tok_pos = 0
+        self._count_pos: Dict[int, int] = {}
+        self._count_n: Dict[int, int] = {}
+        # Search rules: per alternative, [found head or None, last tail (q, end) or None]
+        self._alts: Dict[int, List[Tuple[_Alt, List[Optional[object]]]]] = {}
+        for i, c in enumerate(matcher._compiled):
+            if c.rule.min_count > 0:
+                if c.count_words is None:
+                    self._count_pos[i] = 0
+                    self._count_n[i] = 0
+            else:
+                alts = c.alts if c.alts is not None else [_Alt([c.rule.pattern])]
+                self._alts[i] = [(a, [None, None]) for a in alts]
+        self._finished = False
+
+    def feed(self, chunk: str) -> None:
+        if self._finished:
+            raise RuntimeError("stream already finished")
+        if not self._started:
+            chunk = chunk.lstrip()
+            if not chunk:
+                return
+            self._started = True
+        self.length += len(chunk)
+        body = chunk.rstrip()
+        self._trail = self._trail + len(chunk) if not body else len(chunk) - len(body)
+        self._buf += chunk
+        # Windows of at least `overlap` characters keep per-window overhead low.
+        if len(self._buf) - (self._lo - self._base) >= 2 * self.overlap:
+            self._window(len(self._buf) - self.overlap, eof=False)
+
+    def finish(self) -> Tuple[List[Hit], List[Optional[Tuple[int, str]]]]:
+        """Hits in rule order, and (text offset, text) context for each."""
+        if not self._finished:
+            self._window(len(self._buf), eof=True)
+            self._finished = True
+        stripped = self.length - self._trail
+        hits: List[Hit] = []
+        pieces: List[Optional[Tuple[int, str]]] = []
+        if not self._started:
+            return hits, pieces
+        for i, c in enumerate(self._m._compiled):
+            rule = c.rule
+            if stripped < rule.min_length:
+                continue
+            if rule.min_count > 0:
+                if c.count_words is not None:
+                    n = sum(self._counts.get(w, 0) for w in c.count_words)
+                else:
+                    n = self._count_n[i]
+                if n >= rule.min_count:
+                    hits.append((rule, None, n))
+                    pieces.append(None)
+                continue
+            best: Optional[Tuple[Span, _Found]] = None
+            for alt, (head, tail) in self._alts[i]:
+                if head is None:
+                    continue
+                if alt.tail is None:
+                    span = (head.start, head.end)
+                elif tail is not None and head.end <= tail[0]:
+                    span = (head.start, tail[1])
+                else:
+                    continue
+                if best is None or span[0] < best[0][0]:
+                    best = (span, head)
+            if best is not None:
+                hits.append((rule, best[0], 0))
+                pieces.append((best[1].offset, best[1].piece))
+        return hits, pieces
+
+    def _window(self, hi_rel: int, eof: bool) -> None:
+        buf, base = self._buf, self._base
+        lo = self._lo - base
+        if hi_rel > lo or eof:
+            present = self._tokens(buf, base, lo, hi_rel)
+            self._count_rules(buf, base, lo, hi_rel, eof)
+            self._search_rules(buf, base, lo, hi_rel, eof, present)
+        self._lo = base + hi_rel
+        keep = max(hi_rel - _BACK, 0)
+        self._buf = buf[keep:]
+        self._base = base + keep
+
+    def _tokens(self, buf: str, base: int, lo: int, hi: int) -> int:
+        """Count keywords starting in [lo, hi); return the bitmask of
+        keywords present anywhere from lo to the end of the buffer."""
+        m = self._m
+        if not m.keywords:
+            return 0
+        pos = max(lo, self._tok_pos - base)
+        if 0 < pos < len(buf) and _is_word(buf, pos - 1):
+            # Still inside a word that started in an earlier window.
+            run = _TOKEN.match(buf, pos)
+            if run is not None:
+                pos = run.end()
+        lowered = buf.isascii()
+        src = buf.lower() if lowered else buf
+        tokens = _TOKEN.findall(src, pos, hi)
+        end = max(pos, hi)
+        if tokens and hi < len(buf) and _is_word(buf, hi - 1) and _is_word(buf, hi):
+            # The last token straddles the window edge: count it whole here.
+            cut = tokens.pop()
+            full = _TOKEN.match(src, hi - len(cut))
+            tokens.append(full.group())
+            end = full.end()
+        window: Dict[str, int] = {}
+        m._tally(tokens, window, lowered)
+        for w, n in window.items():
+            self._counts[w] = self._counts.get(w, 0) + n
+        m._tally(_TOKEN.findall(src, end), window, lowered)
+        self._tok_pos = base + end
+        present = 0
+        for w in window:
+            present |= m._bits[w]
+        return present
+
+    def _count_rules(self, buf: str, base: int, lo: int, hi: int, eof: bool) -> None:
+        compiled = self._m._compiled
+        for i, pos in self._count_pos.items():
+            end = max(lo, pos - base)
+            n = 0
+            for match in compiled[i].regex.finditer(buf, end):
+                if match.start() >= hi and not eof:
+                    break
+                n += 1
+                end = match.end()
+            self._count_n[i] += n
+            self._count_pos[i] = base + max(end, hi)
+
+    def _search_rules(
+        self, buf: str, base: int, lo: int, hi: int, eof: bool, present: int
+    ) -> None:
+        bits = self._m._bits
+
+        def absent(gate: Optional[FrozenSet[str]]) -> bool:
+            return gate is not None and not any(present & bits[w] for w in gate)
+
+        for alts in self._alts.values():
+            for alt, state in alts:
+                if state[0] is None and not absent(alt.head_gate):
+                    m = alt.head.search(buf, lo)
+                    if m is not None and (m.start() < hi or eof):
+                        s0 = max(m.start() - 20, 0)
+                        stop = m.end() + 20 if alt.tail is None else s0 + self.overlap
+                        state[0] = _Found(base + m.start(), base + m.end(), base + s0, buf[s0:stop])
+                if alt.tail is None or state[0] is None or absent(alt.tail_gate):
+                    continue
+                last = self._last_tail(alt, buf, max(lo, state[0].end - base), hi, eof)
+                if last is not None:
+                    state[1] = (base + last[0], base + last[1])
+
+    @staticmethod
+    def _last_tail(alt: _Alt, buf: str, lo: int, hi: int, eof: bool) -> Optional[Span]:
+        """Last tail match starting in [lo, hi) (or anywhere from lo at eof)."""
+        t = alt.last_tail.match(buf, lo)
+        if t is None:
+            return None
+        if eof or t.start(1) < hi:
+            return t.span(1)
+        # The last one lies in the overlap; walk forward to the last before hi.
+        last = None
+        for m in alt.tail.finditer(buf, lo):
+            if m.start() >= hi:
+                break
+            last = m.span(1)
+        return last
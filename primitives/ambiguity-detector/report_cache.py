@@ -0,0 +1,147 @@
+from __future__ import annotations
+import hashlib
+import sys
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Callable, Optional, Tuple
+
+from detector import Report, analyse, current_matcher
+from matcher import Matcher
+
+# (digest of the stripped text, length of the stripped-off leading whitespace)
+Key = Tuple[bytes, int]
+
+
+@dataclass(frozen=True)
+class CacheStats:
+    hits: int
+    misses: int
+    evictions: int
+    expirations: int
+    entries: int
+    bytes: int
+    invalidations: int = 0  # times the cache was emptied because the rules changed
+
+
+def cache_key(text: str) -> Key:
+    """Key on the stripped text plus the leading-whitespace length.
+
+    Evidence snippets are cut from the original text at offsets found in
+    the stripped text, so the amount of leading whitespace can shift them;
+    nothing else outside the stripped text affects the Report.
+    """
+    raw = text or ""
+    t = raw.strip()
+    lead = len(raw) - len(raw.lstrip()) if t else 0
+    digest = hashlib.blake2b(t.encode("utf-8", "surrogatepass"), digest_size=16).digest()
+    return digest, lead
+
+
+def _report_size(report: Report) -> int:
+    n = sys.getsizeof(report) + sys.getsizeof(report.findings)
+    for f in report.findings:
+        n += sys.getsizeof(f) + sys.getsizeof(f.evidence)
+    return n
+
+
+class ReportCache:
+    """Thread-safe LRU cache in front of analyse(), with optional TTL.
+
+    capacity bounds the number of entries and max_bytes (if set) their
+    approximate size. Reports are shared between callers; they are frozen
+    dataclasses and must not be mutated. Concurrent misses on the same
+    text may each run analyse(); the last result wins.
+
+    Entries belong to the rules that produced them. When
+    detector.use_matcher installs new rules (e.g. a rule-pack reload),
+    the next call empties the cache, and a report computed with the old
+    rules is never stored.
+    """
+
+    def __init__(
+        self,
+        capacity: int = 4096,
+        max_bytes: Optional[int] = None,
+        ttl: Optional[float] = None,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        if capacity <= 0:
+            raise ValueError("capacity must be >= 1")
+        self.capacity = capacity
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._clock = clock
+        self._lock = threading.Lock()
+        # key -> (report, size, expiry or None); oldest first
+        self._entries: "OrderedDict[Key, Tuple[Report, int, Optional[float]]]" = OrderedDict()
+        self._bytes = 0
+        self._matcher = current_matcher()
+        self._hits = self._misses = self._evictions = self._expirations = 0
+        self._invalidations = 0
+
+    def analyse(self, text: str) -> Report:
+        key = cache_key(text)
+        matcher = current_matcher()
+        with self._lock:
+            if matcher is not self._matcher:
+                self._entries.clear()
+                self._bytes = 0
+                self._matcher = matcher
+                self._invalidations += 1
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry[2] is not None and self._clock() >= entry[2]:
+                    self._drop(key)
+                    self._expirations += 1
+                else:
+                    self._entries.move_to_end(key)
+                    self._hits += 1
+                    return entry[0]
+            self._misses += 1
+        report = analyse(text, matcher)
+        self._store(key, report, matcher)
+        return report
+
+    def _drop(self, key: Key) -> None:
+        _, size, _ = self._entries.pop(key)
+        self._bytes -= size
+
+    def _store(self, key: Key, report: Report, matcher: Matcher) -> None:
+        size = sys.getsizeof(key[0]) + _report_size(report)
+        if self.max_bytes is not None and size > self.max_bytes:
+            return
+        expiry = None if self.ttl is None else self._clock() + self.ttl
+        with self._lock:
+            if matcher is not self._matcher:
+                return
+            if key in self._entries:
+                self._drop(key)
+            self._entries[key] = (report, size, expiry)
+            self._bytes += size
+            while len(self._entries) > self.capacity or (
+                self.max_bytes is not None and self._bytes > self.max_bytes
+            ):
+                self._drop(next(iter(self._entries)))
+                self._evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> CacheStats:
+        with self._lock:
+            return CacheStats(
+                hits=self._hits,
+                misses=self._misses,
+                evictions=self._evictions,
+                expirations=self._expirations,
+                entries=len(self._entries),
+                bytes=self._bytes,
+                invalidations=self._invalidations,
+            )
+
+    def __len__(self) -> int:
+        return len(self._entries)
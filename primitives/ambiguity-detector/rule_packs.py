@@ -0,0 +1,186 @@
+"""Rule packs: detector rules loaded from JSON and hot-swapped.
+
+A pack is a JSON object:
+
+    {"name": "prod", "version": 7, "rules": [
+        {"kind": "injection", "severity": "high", "pattern": "\\\\bjailbreak\\\\b"},
+        {"kind": "ambiguous_reference", "severity": "low",
+         "pattern": "\\\\b(this|that|it)\\\\b", "min_count": 6, "min_length": 40,
+         "evidence": "{count} vague refs"}
+    ]}
+
+Patterns are compiled with IGNORECASE | DOTALL. A pack is fully compiled
+before it is installed, so a broken pack never replaces a working one.
+"""
+from __future__ import annotations
+import json
+import os
+import re
+import threading
+from dataclasses import asdict, dataclass, fields
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional, Tuple, Union
+
+import detector
+from matcher import FLAGS, Matcher, Rule
+
+SEVERITIES = ("low", "medium", "high")
+_FIELDS = {f.name for f in fields(Rule)}
+
+
+@dataclass(frozen=True)
+class RulePack:
+    name: str
+    version: Any
+    rules: Tuple[Rule, ...]
+    matcher: Matcher
+
+
+def _rule(i: int, raw: Any) -> Rule:
+    if not isinstance(raw, dict):
+        raise ValueError(f"rule {i}: expected an object")
+    unknown = set(raw) - _FIELDS
+    if unknown:
+        raise ValueError(f"rule {i}: unknown keys {sorted(unknown)}")
+    for key in ("kind", "severity", "pattern"):
+        if not isinstance(raw.get(key), str) or not raw[key]:
+            raise ValueError(f"rule {i}: {key!r} must be a non-empty string")
+    if raw["severity"] not in SEVERITIES:
+        raise ValueError(f"rule {i}: severity must be one of {SEVERITIES}")
+    for key in ("min_count", "min_length"):
+        v = raw.get(key, 0)
+        if not isinstance(v, int) or isinstance(v, bool) or v < 0:
+            raise ValueError(f"rule {i}: {key!r} must be a non-negative integer")
+    try:
+        re.compile(raw["pattern"], FLAGS)
+    except re.error as e:
+        raise ValueError(f"rule {i}: bad pattern ({e})") from None
+    if "evidence" in raw:
+        try:
+            raw["evidence"].format(count=0)
+        except (AttributeError, KeyError, IndexError, ValueError):
+            raise ValueError(f"rule {i}: evidence must be a string using only {{count}}") from None
+    return Rule(**raw)
+
+
+def parse_pack(data: Dict[str, Any]) -> RulePack:
+    if not isinstance(data, dict) or not isinstance(data.get("rules"), list):
+        raise ValueError("a rule pack is an object with a 'rules' list")
+    rules = tuple(_rule(i, r) for i, r in enumerate(data["rules"]))
+    return RulePack(
+        name=str(data.get("name", "")),
+        version=data.get("version"),
+        rules=rules,
+        matcher=Matcher(rules),
+    )
+
+
+def load_pack(path: Union[str, "os.PathLike[str]"]) -> RulePack:
+    """Read, validate and compile a pack; raises ValueError on any problem."""
+    try:
+        data = json.loads(Path(path).read_text(encoding="utf-8"))
+    except ValueError as e:
+        raise ValueError(f"{path}: invalid JSON ({e})") from None
+    return parse_pack(data)
+
+
+def pack_to_dict(rules: Tuple[Rule, ...], name: str = "", version: Any = None) -> Dict[str, Any]:
+    """JSON-ready pack; defaults are omitted. dict(rules=detector.RULES) exports the built-ins."""
+    default = Rule("", "", "")
+    out = []
+    for r in rules:
+        d = asdict(r)
+        out.append({k: v for k, v in d.items() if k in ("kind", "severity", "pattern")
+                    or v != getattr(default, k)})
+    return {"name": name, "version": version, "rules": out}
+
+
+class RulePackReloader:
+    """Poll a pack file and install it into the detector when it changes.
+
+    Loading and compiling happen on the polling thread; detector.analyse
+    keeps using the previous rules until the new ones are swapped in with
+    one assignment. A pack that fails to load is reported through
+    on_error and the rules in use are kept.
+
+    With install=False nothing is installed in this process; the
+    compiled pack is only handed to on_reload (and kept in .pack), for
+    callers that run the rules elsewhere, such as worker processes.
+    """
+
+    def __init__(
+        self,
+        path: Union[str, "os.PathLike[str]"],
+        interval: float = 1.0,
+        on_error: Optional[Callable[[Exception], None]] = None,
+        on_reload: Optional[Callable[[RulePack], None]] = None,
+        install: bool = True,
+    ) -> None:
+        self.path = Path(path)
+        self.interval = interval
+        self.on_error = on_error
+        self.on_reload = on_reload
+        self.install = install
+        self.pack: Optional[RulePack] = None
+        self.last_error: Optional[Exception] = None
+        self._stamp: Optional[Tuple[int, int, int]] = None
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def _stat(self) -> Optional[Tuple[int, int, int]]:
+        try:
+            st = os.stat(self.path)
+        except OSError:
+            return None
+        return (st.st_ino, st.st_size, st.st_mtime_ns)
+
+    def check(self) -> bool:
+        """Reload if the file changed; True if a new pack was loaded."""
+        stamp = self._stat()
+        if stamp is None or stamp == self._stamp:
+            return False
+        self._stamp = stamp
+        try:
+            pack = load_pack(self.path)
+        except (OSError, ValueError) as e:
+            self.last_error = e
+            if self.on_error is not None:
+                self.on_error(e)
+            return False
+        self.last_error = None
+        if self.install:
+            detector.use_matcher(pack.matcher)
+        self.pack = pack
+        if self.on_reload is not None:
+            self.on_reload(pack)
+        return True
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            self.check()
+
+    def start(self) -> "RulePackReloader":
+        """Load the pack now (raising if it is invalid), then poll."""
+        if self._thread is not None:
+            raise RuntimeError("reloader already started")
+        self._stamp = self._stat()
+        pack = load_pack(self.path)
+        if self.install:
+            detector.use_matcher(pack.matcher)
+        self.pack = pack
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def __enter__(self) -> "RulePackReloader":
+        return self.start()
+
+    def __exit__(self, *exc: Any) -> None:
+        self.stop()
@@ -0,0 +1,591 @@
+#!/usr/bin/env python3
+"""Asyncio screening service: prompts in, Report JSON out.
+
+Usage:
+    python service.py [--host HOST] [--port PORT | --unix PATH] [--workers N]
+                      [--max-batch N] [--max-delay-ms MS] [--rules PACK]
+                      [--reload-interval S] [--require AUTHORITY]
+
+Speaks a small subset of HTTP/1.1 (keep-alive, Content-Length bodies):
+
+    POST /screen   {"prompt": "...", "authority": "USER_CONFIRMED"}
+                   -> 200 {"status": ..., "findings": [...]}
+    GET  /metrics  -> latency and batch-size histograms
+    GET  /health   -> {"ok": true}
+
+Analysis runs in a process pool, so the event loop only parses and routes.
+Requests that arrive while every in-flight slot is busy are queued and go
+out together as one batch. With --rules, the pack is watched and a changed
+pack is rolled out on a fresh pool while the old one finishes its batches.
+With --require, each request is passed through an AuthorityGate and refused
+with 403 when its authority is too low.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import bisect
+import importlib.util
+import json
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass
+from pathlib import Path
+from time import perf_counter
+from typing import Any, Dict, List, Optional, Sequence, Set, Tuple
+
+import detector
+from detector import analyse, report_to_dict
+from matcher import Matcher
+from rule_packs import RulePack, RulePackReloader, load_pack
+
+MAX_BODY = 1 << 20
+_REASONS = {200: "OK", 400: "Bad Request", 403: "Forbidden", 404: "Not Found",
+            405: "Method Not Allowed", 413: "Payload Too Large", 500: "Internal Server Error",
+            503: "Service Unavailable"}
+
+
+class Overloaded(RuntimeError):
+    """Raised when the pending queue is full."""
+
+
+class Histogram:
+    """Counts of observations in fixed buckets; bounds are inclusive upper edges."""
+
+    # 1us .. ~16s, doubling
+    LATENCY = tuple(1e-6 * 2 ** i for i in range(25))
+
+    def __init__(self, bounds: Sequence[float] = LATENCY) -> None:
+        self.bounds = tuple(bounds)
+        self.counts = [0] * (len(self.bounds) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.count += 1
+        self.sum += value
+        if value > self.max:
+            self.max = value
+
+    def quantile(self, q: float) -> float:
+        """Upper edge of the bucket holding the q-quantile (max for the overflow bucket)."""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for i, n in enumerate(self.counts):
+            seen += n
+            if seen >= rank and n:
+                return min(self.bounds[i], self.max) if i < len(self.bounds) else self.max
+        return self.max
+
+    def snapshot(self) -> Dict[str, Any]:
+        # Cumulative counts for the non-empty buckets: [upper edge, count <= edge];
+        # the overflow bucket's edge is None.
+        buckets, seen = [], 0
+        for i, n in enumerate(self.counts):
+            seen += n
+            if n:
+                buckets.append([self.bounds[i] if i < len(self.bounds) else None, seen])
+        return {
+            "count": self.count,
+            "sum": self.sum,
+            "max": self.max,
+            "p50": self.quantile(0.5),
+            "p90": self.quantile(0.9),
+            "p99": self.quantile(0.99),
+            "buckets": buckets,
+        }
+
+
+def _init_worker(matcher: Optional[Matcher]) -> None:
+    if matcher is not None:
+        detector.use_matcher(matcher)
+
+
+def _analyse_batch(texts: List[str]) -> List[Dict[str, Any]]:
+    done: Dict[str, Dict[str, Any]] = {}
+    for t in texts:
+        if t not in done:
+            done[t] = report_to_dict(analyse(t))
+    return [done[t] for t in texts]
+
+
+@dataclass
+class _Pending:
+    text: str
+    queued: float
+    future: "asyncio.Future[Dict[str, Any]]"
+
+
+class Screener:
+    """Micro-batching front end to a process pool running analyse().
+
+    At most `2 * workers` batches are in flight. A batch takes everything
+    queued when a slot frees up, up to max_batch, after lingering
+    max_delay seconds (0: no lingering; batches then only form under load).
+    screen() raises Overloaded once max_pending requests are queued.
+
+    rules names a rule pack, compiled in this process and handed to the
+    workers. Unless reload_interval is None, the file is polled with a
+    RulePackReloader. A changed pack is compiled, a new pool is started
+    and warmed up with it, and only then swapped in. Batches already sent
+    to the old pool finish there with the old rules, so requests keep
+    being answered throughout. A pack that fails to load, or whose pool
+    fails to start, leaves the running rules in place and is reported
+    under "rules" in metrics().
+    """
+
+    def __init__(
+        self,
+        workers: Optional[int] = None,
+        max_batch: int = 64,
+        max_delay: float = 0.0,
+        max_pending: int = 10000,
+        rules: Optional[str] = None,
+        reload_interval: Optional[float] = 1.0,
+    ) -> None:
+        if max_batch <= 0:
+            raise ValueError("max_batch must be >= 1")
+        self.workers = workers or os.cpu_count() or 1
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self.max_pending = max_pending
+        self.rules = rules
+        self.reload_interval = reload_interval
+        self.pack: Optional[RulePack] = None
+        self.reloads = 0
+        self.reload_error: Optional[str] = None
+        self.latency = Histogram()
+        self.queue_wait = Histogram()
+        self.compute = Histogram()
+        self.batch_size = Histogram(tuple(2 ** i for i in range(max_batch.bit_length() + 1)))
+        self.in_flight = 0
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._queue: "Optional[asyncio.Queue[_Pending]]" = None
+        self._task: "Optional[asyncio.Task[None]]" = None
+        self._running: "Set[asyncio.Task[None]]" = set()
+        self._reloader: Optional[RulePackReloader] = None
+        self._swaps: "Set[asyncio.Task[None]]" = set()
+        self._swap_lock: Optional[asyncio.Lock] = None
+
+    def _new_pool(self, pack: Optional[RulePack]) -> ProcessPoolExecutor:
+        matcher = pack.matcher if pack is not None else None
+        return ProcessPoolExecutor(self.workers, initializer=_init_worker, initargs=(matcher,))
+
+    async def _warm(self, pool: ProcessPoolExecutor) -> None:
+        """Start pool's workers now rather than on the first request."""
+        try:
+            await asyncio.get_running_loop().run_in_executor(pool, _analyse_batch, [""])
+        except BaseException:
+            pool.shutdown(cancel_futures=True)
+            raise
+
+    async def start(self) -> "Screener":
+        if self._task is not None:
+            raise RuntimeError("screener already started")
+        loop = asyncio.get_running_loop()
+        self._swap_lock = asyncio.Lock()
+        # The pack is compiled here, so a bad one fails with its own error.
+        if self.rules is not None and self.reload_interval is not None:
+            self._reloader = RulePackReloader(
+                self.rules, self.reload_interval, install=False,
+                on_error=self._reload_failed,
+                on_reload=lambda pack: self._reloaded(loop, pack),
+            )
+            self.pack = self._reloader.start().pack
+        elif self.rules is not None:
+            self.pack = load_pack(self.rules)
+        try:
+            async with self._swap_lock:
+                pool = self._new_pool(self.pack)
+                await self._warm(pool)
+                self._pool = pool
+        except BaseException:
+            await self._stop_reloader()
+            raise
+        self._queue = asyncio.Queue()
+        self._task = loop.create_task(self._dispatch())
+        return self
+
+    def _reload_failed(self, e: Exception) -> None:
+        # Reloader thread; a plain attribute store.
+        self.reload_error = str(e)
+
+    def _reloaded(self, loop: asyncio.AbstractEventLoop, pack: RulePack) -> None:
+        # Reloader thread: hand the pack to the event loop.
+        try:
+            loop.call_soon_threadsafe(self._schedule_swap, pack)
+        except RuntimeError:  # loop already closed
+            pass
+
+    def _schedule_swap(self, pack: RulePack) -> None:
+        task = asyncio.get_running_loop().create_task(self._swap(pack))
+        self._swaps.add(task)
+        task.add_done_callback(self._swaps.discard)
+
+    async def _swap(self, pack: RulePack) -> None:
+        """Roll out pack: warm a new pool, switch to it, retire the old one."""
+        assert self._swap_lock is not None
+        async with self._swap_lock:
+            if self._pool is None:
+                return
+            pool = self._new_pool(pack)
+            try:
+                await self._warm(pool)
+            except Exception as e:
+                self.reload_error = f"{type(e).__name__}: {e}"
+                return
+            old, self._pool = self._pool, pool
+            self.pack = pack
+            self.reloads += 1
+            self.reload_error = None
+        # Batches already submitted to the old pool finish there.
+        await asyncio.get_running_loop().run_in_executor(None, old.shutdown)
+
+    async def _stop_reloader(self) -> None:
+        if self._reloader is not None:
+            reloader, self._reloader = self._reloader, None
+            await asyncio.get_running_loop().run_in_executor(None, reloader.stop)
+        if self._swaps:
+            await asyncio.wait(list(self._swaps))
+
+    async def close(self) -> None:
+        if self._task is None:
+            return
+        await self._stop_reloader()
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+        if self._running:
+            await asyncio.wait(list(self._running))
+        while self._queue is not None and not self._queue.empty():
+            p = self._queue.get_nowait()
+            if not p.future.done():
+                p.future.set_exception(RuntimeError("screener closed"))
+        if self._pool is not None:
+            pool, self._pool = self._pool, None
+            await asyncio.get_running_loop().run_in_executor(None, pool.shutdown)
+
+    async def __aenter__(self) -> "Screener":
+        return await self.start()
+
+    async def __aexit__(self, *exc: Any) -> None:
+        await self.close()
+
+    async def screen(self, prompt: str) -> Dict[str, Any]:
+        """report_to_dict(analyse(prompt)), computed off the event loop."""
+        if self._queue is None or self._task is None:
+            raise RuntimeError("screener is not started")
+        if self._queue.qsize() >= self.max_pending:
+            raise Overloaded(f"{self.max_pending} requests already pending")
+        t0 = perf_counter()
+        fut: "asyncio.Future[Dict[str, Any]]" = asyncio.get_running_loop().create_future()
+        self._queue.put_nowait(_Pending(prompt, t0, fut))
+        try:
+            return await fut
+        finally:
+            self.latency.observe(perf_counter() - t0)
+
+    async def _dispatch(self) -> None:
+        assert self._queue is not None
+        loop = asyncio.get_running_loop()
+        slots = asyncio.Semaphore(2 * self.workers)
+        while True:
+            await slots.acquire()
+            batch = [await self._queue.get()]
+            if self.max_delay > 0:
+                try:
+                    await asyncio.sleep(self.max_delay)
+                except asyncio.CancelledError:
+                    batch[0].future.set_exception(RuntimeError("screener closed"))
+                    raise
+            while len(batch) < self.max_batch and not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+            task = loop.create_task(self._run(batch, slots))
+            self._running.add(task)
+            task.add_done_callback(self._running.discard)
+
+    async def _run(self, batch: List[_Pending], slots: asyncio.Semaphore) -> None:
+        self.in_flight += 1
+        try:
+            start = perf_counter()
+            for p in batch:
+                self.queue_wait.observe(start - p.queued)
+            self.batch_size.observe(len(batch))
+            pool = self._pool
+            try:
+                assert pool is not None
+                results = await asyncio.get_running_loop().run_in_executor(
+                    pool, _analyse_batch, [p.text for p in batch]
+                )
+            except Exception as e:
+                # Replace the pool only if it is still current (not retired by a reload).
+                if isinstance(e, BrokenProcessPool) and pool is self._pool:
+                    self._pool = self._new_pool(self.pack)
+                for p in batch:
+                    if not p.future.done():
+                        p.future.set_exception(e)
+                return
+            self.compute.observe(perf_counter() - start)
+            for p, r in zip(batch, results):
+                if not p.future.done():
+                    p.future.set_result(r)
+        finally:
+            self.in_flight -= 1
+            slots.release()
+
+    def metrics(self) -> Dict[str, Any]:
+        """Histograms in seconds (batch_size in requests) plus current load."""
+        return {
+            "latency": self.latency.snapshot(),
+            "queue_wait": self.queue_wait.snapshot(),
+            "compute": self.compute.snapshot(),
+            "batch_size": self.batch_size.snapshot(),
+            "pending": self._queue.qsize() if self._queue is not None else 0,
+            "in_flight": self.in_flight,
+            "rules": None if self.pack is None else {
+                "name": self.pack.name,
+                "version": self.pack.version,
+                "reloads": self.reloads,
+                "error": self.reload_error,
+            },
+        }
+
+
+def load_authority_gate() -> Any:
+    """The authority-gate primitive's module, loaded by path as 'authority_gate'.
+
+    Both authority-gate and envelope-gate ship a gate.py, so it is not
+    imported by its bare name.
+    """
+    mod = sys.modules.get("authority_gate")
+    if mod is None:
+        path = Path(__file__).resolve().parent.parent / "authority-gate" / "gate.py"
+        spec = importlib.util.spec_from_file_location("authority_gate", str(path))
+        mod = importlib.util.module_from_spec(spec)
+        sys.modules["authority_gate"] = mod
+        spec.loader.exec_module(mod)
+    return mod
+
+
+class ScreeningServer:
+    """HTTP front end for a Screener, on TCP or a Unix socket.
+
+    With a gate (an AuthorityGate), a request's "authority" field names
+    the level it carries; a missing field means NONE. The gate records
+    every decision in its history.
+    """
+
+    def __init__(self, screener: Screener, gate: Any = None) -> None:
+        self.screener = screener
+        self.gate = gate
+        self.address: Any = None
+        self._server: Optional[asyncio.AbstractServer] = None
+
+    async def start(self, host: str = "127.0.0.1", port: int = 0, path: Optional[str] = None) -> "ScreeningServer":
+        if path is not None:
+            self._server = await asyncio.start_unix_server(self._handle, path=path)
+            self.address = path
+        else:
+            self._server = await asyncio.start_server(self._handle, host, port)
+            self.address = self._server.sockets[0].getsockname()[:2]
+        return self
+
+    async def close(self) -> None:
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+
+    async def __aenter__(self) -> "ScreeningServer":
+        return self
+
+    async def __aexit__(self, *exc: Any) -> None:
+        await self.close()
+
+    async def serve_forever(self) -> None:
+        assert self._server is not None
+        await self._server.serve_forever()
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    return
+                parts = line.decode("latin-1").split()
+                headers: Dict[str, str] = {}
+                while True:
+                    h = await reader.readline()
+                    if h in (b"\r\n", b"\n", b""):
+                        break
+                    k, _, v = h.decode("latin-1").partition(":")
+                    headers[k.strip().lower()] = v.strip()
+                if len(parts) != 3:
+                    await _respond(writer, 400, {"error": "bad request line"}, False)
+                    return
+                method, target, version = parts
+                try:
+                    length = int(headers.get("content-length", "0"))
+                except ValueError:
+                    length = -1
+                if length < 0 or length > MAX_BODY:
+                    await _respond(writer, 413 if length > 0 else 400, {"error": "bad Content-Length"}, False)
+                    return
+                body = await reader.readexactly(length) if length else b""
+                keep = version == "HTTP/1.1" and headers.get("connection", "").lower() != "close"
+                status, payload = await self._route(method, target, body)
+                await _respond(writer, status, payload, keep)
+                if not keep:
+                    return
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    async def _route(self, method: str, target: str, body: bytes) -> Tuple[int, Any]:
+        if target == "/screen":
+            if method != "POST":
+                return 405, {"error": "use POST"}
+            return await self._screen(body)
+        if target in ("/metrics", "/health"):
+            if method != "GET":
+                return 405, {"error": "use GET"}
+            return 200, self.screener.metrics() if target == "/metrics" else {"ok": True}
+        return 404, {"error": f"no route {target}"}
+
+    async def _screen(self, body: bytes) -> Tuple[int, Any]:
+        try:
+            req = json.loads(body)
+            prompt = req["prompt"]
+            if not isinstance(prompt, str):
+                raise TypeError
+        except (ValueError, KeyError, TypeError):
+            return 400, {"error": 'expected {"prompt": "<text>"}'}
+        try:
+            if self.gate is None:
+                pending = self.screener.screen(prompt)
+            else:
+                levels = type(self.gate.required)
+                try:
+                    authority = levels[req.get("authority") or "NONE"]
+                except KeyError:
+                    return 400, {"error": f"authority must be one of {[a.name for a in levels]}"}
+                pending = self.gate.call(self.screener.screen, prompt, authority=authority)
+            return 200, await pending
+        except PermissionError as e:
+            return 403, {"error": str(e)}
+        except Overloaded as e:
+            return 503, {"error": str(e)}
+        except Exception as e:
+            return 500, {"error": f"{type(e).__name__}: {e}"}
+
+
+async def _respond(writer: asyncio.StreamWriter, status: int, payload: Any, keep: bool) -> None:
+    data = json.dumps(payload).encode()
+    writer.write(
+        f"HTTP/1.1 {status} {_REASONS.get(status, '')}\r\n"
+        f"Content-Type: application/json\r\nContent-Length: {len(data)}\r\n"
+        f"Connection: {'keep-alive' if keep else 'close'}\r\n\r\n".encode() + data
+    )
+    await writer.drain()
+
+
+class ScreenClient:
+    """Keep-alive client for one connection to a ScreeningServer (one request at a time)."""
+
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        self._reader = reader
+        self._writer = writer
+
+    @classmethod
+    async def connect(cls, host: str = "127.0.0.1", port: int = 0, path: Optional[str] = None) -> "ScreenClient":
+        if path is not None:
+            reader, writer = await asyncio.open_unix_connection(path)
+        else:
+            reader, writer = await asyncio.open_connection(host, port)
+        return cls(reader, writer)
+
+    async def request(self, method: str, target: str, payload: Any = None) -> Tuple[int, Any]:
+        body = b"" if payload is None else json.dumps(payload).encode()
+        self._writer.write(
+            f"{method} {target} HTTP/1.1\r\nHost: screen\r\nContent-Type: application/json\r\n"
+            f"Content-Length: {len(body)}\r\n\r\n".encode() + body
+        )
+        await self._writer.drain()
+        status = int((await self._reader.readline()).split()[1])
+        length = 0
+        while True:
+            h = await self._reader.readline()
+            if h in (b"\r\n", b""):
+                break
+            k, _, v = h.decode("latin-1").partition(":")
+            if k.strip().lower() == "content-length":
+                length = int(v)
+        return status, json.loads(await self._reader.readexactly(length))
+
+    async def screen(self, prompt: str, authority: Optional[str] = None) -> Dict[str, Any]:
+        """The report dict; raises RuntimeError on any non-200 response."""
+        payload: Dict[str, Any] = {"prompt": prompt}
+        if authority is not None:
+            payload["authority"] = authority
+        status, data = await self.request("POST", "/screen", payload)
+        if status != 200:
+            raise RuntimeError(f"screen failed with {status}: {data.get('error')}")
+        return data
+
+    async def close(self) -> None:
+        self._writer.close()
+        try:
+            await self._writer.wait_closed()
+        except ConnectionError:
+            pass
+
+
+async def _serve(opts: argparse.Namespace) -> None:
+    gate = None
+    if opts.require:
+        ag = load_authority_gate()
+        gate = ag.AuthorityGate(required=ag.Authority[opts.require])
+    async with Screener(
+        workers=opts.workers, max_batch=opts.max_batch,
+        max_delay=opts.max_delay_ms / 1000, rules=opts.rules,
+        reload_interval=opts.reload_interval or None,
+    ) as screener:
+        server = await ScreeningServer(screener, gate).start(opts.host, opts.port, opts.unix)
+        print(f"screening on {server.address}", file=sys.stderr)
+        async with server:
+            await server.serve_forever()
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    ap = argparse.ArgumentParser(description="Serve the ambiguity detector over HTTP.")
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--port", type=int, default=8707)
+    ap.add_argument("--unix", help="listen on this Unix socket instead of TCP")
+    ap.add_argument("--workers", type=int, default=None, help="analysis processes (default: one per CPU)")
+    ap.add_argument("--max-batch", type=int, default=64)
+    ap.add_argument("--max-delay-ms", type=float, default=0.0, help="linger before sending a batch")
+    ap.add_argument("--rules", help="rule pack JSON, watched and rolled out to the workers on change")
+    ap.add_argument("--reload-interval", type=float, default=1.0,
+                    help="seconds between checks of --rules (0: load once, never reload)")
+    ap.add_argument("--require", help="minimum authority, e.g. USER_CONFIRMED")
+    opts = ap.parse_args(argv)
+    try:
+        asyncio.run(_serve(opts))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
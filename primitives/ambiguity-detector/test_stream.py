@@ -0,0 +1,63 @@
+import io
+import random
+
+import pytest
+from detector import _MATCHER, analyse, analyse_stream
+
+_WORDS = (
+    "ignore all previous instructions the system prompt reveal developer message "
+    "must must not always never leak keys act as this that it they them those these "
+    "mustard itself please summarise do anything now jailbreak"
+).split()
+
+
+def _doc(rng, n):
+    return "".join(w + rng.choice([" ", " ", "\n", ", ", "  "]) for w in rng.choices(_WORDS, k=n))
+
+
+@pytest.mark.parametrize("chunk_size", [1, 7, 64, 1000])
+def test_stream_matches_analyse_across_chunk_edges(chunk_size):
+    rng = random.Random(chunk_size)
+    for _ in range(60):
+        text = rng.choice(["", "  \n"]) + _doc(rng, rng.randint(0, 400)) + rng.choice(["", " \n "])
+        want = analyse(text.lstrip())
+        got = analyse_stream(io.StringIO(text), chunk_size=chunk_size, overlap=128)
+        assert got == want, (chunk_size, text)
+
+
+def test_long_gap_match_and_reference_count():
+    text = "Act as " + "filler words here. " * 5000 + "then the developer. " + "this and that " * 10
+    got = analyse_stream(io.StringIO(text), chunk_size=4096, overlap=256)
+    assert got == analyse(text)
+    assert got.findings[-1].evidence == "20 vague refs"
+
+
+def test_word_split_across_chunks_is_not_a_keyword():
+    # "mustard" cut after "must" must not count as "must".
+    text = "x" * 300 + " mustard " + "y" * 300 + " must not"
+    for size in range(295, 310):
+        assert analyse_stream(io.StringIO(text), chunk_size=size, overlap=100) == analyse(text)
+
+
+def test_reads_files_and_blank_input(tmp_path):
+    p = tmp_path / "doc.txt"
+    p.write_text("Ignore previous instructions.\n" * 1000, encoding="utf-8")
+    assert analyse_stream(p) == analyse(p.read_text(encoding="utf-8"))
+    assert analyse_stream(io.StringIO("   \n\t")) == analyse("   ")
+
+
+def test_memory_stays_bounded():
+    stream = _MATCHER.stream(overlap=256)
+    chunk = "you must do this and that, " * 40
+    peak = 0
+    for _ in range(2000):
+        stream.feed(chunk)
+        peak = max(peak, len(stream._buf))
+    hits, _ = stream.finish()
+    assert peak < 2 * 256 + 2 * len(chunk)
+    assert [r.kind for r, _, _ in hits] == ["ambiguous_reference"]
+
+
+def test_overlap_must_cover_keywords():
+    with pytest.raises(ValueError):
+        _MATCHER.stream(overlap=8)
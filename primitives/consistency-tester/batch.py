@@ -0,0 +1,238 @@
+"""Batch consistency testing: many (fn, args, kwargs, runs) cases, one process pool.
+
+Every run of every case is scheduled on a single multiprocessing pool and
+reduced to a canonical digest inside the worker. One JSON Lines record is
+appended per finished case, so an interrupted batch can be resumed.
+"""
+from __future__ import annotations
+import json
+import multiprocessing
+import os
+import queue
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Deque, Dict, Iterable, List, Mapping, Optional, Tuple, Union
+
+from tester import _call_and_digest, canonical_digest
+
+
+@dataclass(frozen=True)
+class Case:
+    fn: Callable[..., Any]  # must be picklable (module-level)
+    runs: int
+    args: Tuple[Any, ...] = ()
+    kwargs: Mapping[str, Any] = field(default_factory=dict)
+    case_id: Optional[str] = None
+    timeout: Optional[float] = None  # seconds, from the case's first submitted run
+
+    @property
+    def id(self) -> str:
+        """Explicit case_id, else derived from fn, runs and the arguments."""
+        if self.case_id is not None:
+            return self.case_id
+        name = f"{getattr(self.fn, '__module__', '?')}.{getattr(self.fn, '__qualname__', '?')}"
+        inputs = canonical_digest((self.args, dict(self.kwargs))).hex()[:16]
+        return f"{name}:{self.runs}:{inputs}"
+
+
+@dataclass
+class _State:
+    case: Case
+    submitted: int = 0
+    completed: int = 0
+    running: int = 0  # submitted to the current pool, not yet returned
+    classes: Dict[bytes, int] = field(default_factory=dict)
+    deadline: Optional[float] = None
+    started: Optional[float] = None
+    status: Optional[str] = None  # set once the case is finished
+    error: str = ""
+
+
+def read_report(path: Union[str, Path]) -> Dict[str, Dict[str, Any]]:
+    """Records by case_id. A torn final line from an interrupted run is ignored."""
+    records: Dict[str, Dict[str, Any]] = {}
+    p = Path(path)
+    if not p.exists():
+        return records
+    for line in p.read_text(encoding="utf-8").splitlines():
+        try:
+            rec = json.loads(line)
+        except ValueError:
+            continue
+        if isinstance(rec, dict) and "case_id" in rec:
+            records[rec["case_id"]] = rec
+    return records
+
+
+def _record(st: _State) -> Dict[str, Any]:
+    c = st.case
+    return {
+        "case_id": c.id,
+        "fn": f"{getattr(c.fn, '__module__', '?')}.{getattr(c.fn, '__qualname__', '?')}",
+        "status": st.status,
+        "runs": c.runs,
+        "completed": st.completed,
+        "deterministic": st.status in ("ok", "varied") and len(st.classes) == 1,
+        "unique_count": len(st.classes),
+        "classes": [[d.hex(), n] for d, n in st.classes.items()],
+        "stopped_early": st.status == "varied" and st.completed < c.runs,
+        "elapsed": round(time.monotonic() - st.started, 6) if st.started else 0.0,
+        "error": st.error,
+    }
+
+
+def run_batch(
+    cases: Iterable[Case],
+    report_path: Union[str, Path],
+    *,
+    workers: Optional[int] = None,
+    stop_on_variance: bool = False,
+    resume: bool = True,
+) -> List[Dict[str, Any]]:
+    """Run every case's runs on one shared process pool.
+
+    Records are appended to report_path as each case finishes, with status
+    "ok", "varied" (stopped at the second equivalence class), "timeout" or
+    "error". With resume=True, cases already recorded there are skipped.
+    Returns one record per case, in input order.
+
+    A started run cannot be interrupted. When a case's deadline passes
+    while any of its runs are still in flight, the pool is terminated and
+    replaced, and the in-flight runs of unfinished cases are submitted
+    again. A hung run therefore never holds a worker past its case's
+    deadline. Resubmitted cases keep their original deadlines.
+    """
+    all_cases = list(cases)
+    ids = [c.id for c in all_cases]
+    if len(set(ids)) != len(ids):
+        raise ValueError("case ids must be unique")
+    for c in all_cases:
+        if c.runs <= 0:
+            raise ValueError(f"runs must be >= 1 (case {c.id})")
+    done = read_report(report_path) if resume else {}
+    states = [_State(c) for c in all_cases if c.id not in done]
+    n_workers = workers or os.cpu_count() or 1
+    window = 4 * n_workers
+    results: "queue.Queue[Tuple[int, int, Any, Optional[BaseException]]]" = queue.Queue()
+    tasks = ((i, r) for i, st in enumerate(states) for r in range(st.case.runs))
+    next_task = next(tasks, None)
+    retry: Deque[int] = deque()  # cases whose runs were lost with a recycled pool
+    in_flight = 0
+    generation = 0  # results from an earlier pool are dropped
+    remaining = len(states)
+
+    torn = False
+    if Path(report_path).exists() and os.path.getsize(report_path) > 0:
+        with open(report_path, "rb") as f:
+            f.seek(-1, os.SEEK_END)
+            torn = f.read(1) != b"\n"
+
+    with open(report_path, "a", encoding="utf-8") as out:
+        if torn:
+            # Start new records on their own line after an interrupted write.
+            out.write("\n")
+        def finish(i: int, status: str, error: str = "") -> None:
+            nonlocal remaining
+            st = states[i]
+            st.status, st.error = status, error
+            rec = _record(st)
+            done[st.case.id] = rec
+            out.write(json.dumps(rec, sort_keys=True) + "\n")
+            out.flush()
+            remaining -= 1
+
+        def submit(i: int) -> None:
+            nonlocal in_flight
+            st = states[i]
+            now = time.monotonic()
+            if st.started is None:
+                st.started = now
+                if st.case.timeout is not None:
+                    st.deadline = now + st.case.timeout
+            st.submitted += 1
+            st.running += 1
+            in_flight += 1
+            pool.apply_async(
+                _call_and_digest,
+                (st.case.fn, st.case.args, dict(st.case.kwargs), False),
+                callback=lambda r, g=generation, i=i: results.put((g, i, r, None)),
+                error_callback=lambda e, g=generation, i=i: results.put((g, i, None, e)),
+            )
+
+        def recycle() -> None:
+            """Kill every worker (and the hung runs with them); requeue the
+            lost runs of unfinished cases on a fresh pool."""
+            nonlocal pool, in_flight, generation
+            pool.terminate()
+            pool.join()
+            generation += 1
+            in_flight = 0
+            for j, st in enumerate(states):
+                if st.status is None:
+                    retry.extend([j] * st.running)
+                    st.submitted -= st.running
+                st.running = 0
+            pool = ctx.Pool(n_workers)
+
+        ctx = multiprocessing.get_context()
+        pool = ctx.Pool(n_workers)
+        try:
+            while remaining:
+                # Top up the pool, skipping runs of cases that already finished.
+                while in_flight < window and (retry or next_task is not None):
+                    if retry:
+                        i = retry.popleft()
+                    else:
+                        i, _ = next_task
+                        next_task = next(tasks, None)
+                    if states[i].status is None:
+                        submit(i)
+
+                # A finished case's deadline still matters while its runs hold workers.
+                deadlines = [s.deadline for s in states
+                             if s.deadline is not None and (s.status is None or s.running)]
+                wait = max(0.0, min(deadlines) - time.monotonic()) if deadlines else None
+                try:
+                    item: Optional[Tuple[int, int, Any, Optional[BaseException]]] = results.get(timeout=wait)
+                except queue.Empty:
+                    item = None
+                if item is not None and item[0] == generation:
+                    _, i, res, err = item
+                    in_flight -= 1
+                    st = states[i]
+                    st.running -= 1
+                    if st.status is None:
+                        if err is not None:
+                            finish(i, "error", repr(err))
+                        else:
+                            st.completed += 1
+                            digest = res[1]
+                            st.classes[digest] = st.classes.get(digest, 0) + 1
+                            if stop_on_variance and len(st.classes) > 1:
+                                finish(i, "varied")
+                            elif st.completed == st.case.runs:
+                                finish(i, "ok")
+                now = time.monotonic()
+                hung = False
+                for j, st in enumerate(states):
+                    if st.deadline is not None and now >= st.deadline:
+                        if st.status is None:
+                            finish(j, "timeout", f"exceeded {st.case.timeout}s")
+                        hung = hung or st.running > 0
+                if hung and remaining:
+                    recycle()
+        finally:
+            # terminate() can deadlock against the pool's task handler, so it is
+            # kept for runs that must be killed: a timed-out case's. Leftover
+            # runs of finished cases are left to end; their results are dropped.
+            now = time.monotonic()
+            if any(st.running and st.deadline is not None and now >= st.deadline
+                   for st in states):
+                pool.terminate()
+            else:
+                pool.close()
+            pool.join()
+
+    return [done[c.id] for c in all_cases]
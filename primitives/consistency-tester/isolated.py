@@ -0,0 +1,249 @@
+"""Cross-process determinism checks: runs spread over interpreters with distinct hash seeds.
+
+In-process repetitions share caches, module globals and one PYTHONHASHSEED,
+so set/dict iteration orders and memoised state look stable even when they
+are not. IsolatedPool keeps a few long-lived worker interpreters, each
+started with its own PYTHONHASHSEED, and spreads a case's runs across them
+round-robin. Functions are named by import path and outputs are compared by
+canonical_digest(), computed in the worker. A pool is meant to be reused
+for many cases so interpreter start-up is paid once.
+
+Run as a script, this module is the worker loop.
+"""
+from __future__ import annotations
+import importlib
+import os
+import pickle
+import struct
+import subprocess
+import sys
+import threading
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, BinaryIO, Callable, Dict, List, Mapping, Optional, Sequence, Tuple, Union
+
+from tester import ConsistencyReport, canonical_digest
+
+_LEN = struct.Struct("!I")
+
+
+def _send(f: BinaryIO, obj: Any) -> None:
+    data = pickle.dumps(obj, protocol=pickle.HIGHEST_PROTOCOL)
+    f.write(_LEN.pack(len(data)))
+    f.write(data)
+    f.flush()
+
+
+def _recv(f: BinaryIO) -> Any:
+    head = f.read(_LEN.size)
+    if len(head) < _LEN.size:
+        raise EOFError("worker closed its pipe")
+    (n,) = _LEN.unpack(head)
+    data = f.read(n)
+    if len(data) < n:
+        raise EOFError("worker closed its pipe")
+    return pickle.loads(data)
+
+
+def fn_path(fn: Union[str, Callable[..., Any]]) -> str:
+    """'module:qualname' for a module-level callable (strings pass through)."""
+    if isinstance(fn, str):
+        return fn
+    module = getattr(fn, "__module__", None)
+    qualname = getattr(fn, "__qualname__", None)
+    if not module or not qualname or "<" in qualname or module == "__main__":
+        raise ValueError(f"{fn!r} is not importable by path; pass 'module:qualname'")
+    return f"{module}:{qualname}"
+
+
+def resolve(path: str) -> Callable[..., Any]:
+    """Import 'module:qualname' (or dotted 'module.name')."""
+    if ":" in path:
+        module, _, qualname = path.partition(":")
+    else:
+        module, _, qualname = path.rpartition(".")
+    if not module or not qualname:
+        raise ValueError(f"bad function path {path!r}")
+    obj: Any = importlib.import_module(module)
+    for part in qualname.split("."):
+        obj = getattr(obj, part)
+    return obj
+
+
+def _serve() -> None:
+    """Worker loop: (path, args, kwargs) in, (ok, digest or traceback) out."""
+    inp, out = sys.stdin.buffer, sys.stdout.buffer
+    # Keep stray prints from the functions under test off the protocol pipe.
+    sys.stdout = sys.stderr
+    sys.path[:0] = [p for p in _recv(inp) if p not in sys.path]
+    cache: Dict[str, Callable[..., Any]] = {}
+    while True:
+        try:
+            path, args, kwargs = _recv(inp)
+        except EOFError:
+            return
+        try:
+            fn = cache.get(path)
+            if fn is None:
+                fn = cache[path] = resolve(path)
+            _send(out, (True, canonical_digest(fn(*args, **kwargs))))
+        except Exception:
+            _send(out, (False, traceback.format_exc()))
+
+
+class _Worker:
+    def __init__(self, seed: int, env: Mapping[str, str]) -> None:
+        self.seed = seed
+        self.lock = threading.Lock()
+        self.proc = subprocess.Popen(
+            [sys.executable, os.path.abspath(__file__)],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            env={**env, "PYTHONHASHSEED": str(seed)},
+        )
+        _send(self.proc.stdin, list(sys.path))
+
+    def call(self, path: str, args: Tuple[Any, ...], kwargs: Dict[str, Any]) -> Tuple[bool, Any]:
+        with self.lock:
+            _send(self.proc.stdin, (path, args, kwargs))
+            return _recv(self.proc.stdout)
+
+    def close(self) -> None:
+        if self.proc.poll() is None:
+            try:
+                self.proc.stdin.close()
+                self.proc.wait(timeout=5)
+            except (OSError, subprocess.TimeoutExpired):
+                self.proc.kill()
+                self.proc.wait()
+        self.proc.stdout.close()
+
+
+class IsolatedPool:
+    """Long-lived worker interpreters, one PYTHONHASHSEED each.
+
+    Run i of a case goes to worker i % len(seeds), so with runs <= workers
+    no two runs of a case share a process. A worker that dies is restarted
+    with the same seed on its next run.
+    """
+
+    def __init__(
+        self,
+        workers: int = 4,
+        seeds: Optional[Sequence[int]] = None,
+        env: Optional[Mapping[str, str]] = None,
+    ) -> None:
+        seeds = list(range(1, workers + 1)) if seeds is None else list(seeds)
+        if not seeds:
+            raise ValueError("at least one worker is required")
+        if len(set(seeds)) != len(seeds):
+            raise ValueError("seeds must be distinct")
+        self.seeds: Tuple[int, ...] = tuple(seeds)
+        self._env = dict(os.environ if env is None else env)
+        self._workers: List[Optional[_Worker]] = [None] * len(seeds)
+        self._spawn_lock = threading.Lock()
+        self._threads = ThreadPoolExecutor(max_workers=len(seeds))
+        self._closed = False
+
+    def _worker(self, k: int) -> _Worker:
+        with self._spawn_lock:
+            w = self._workers[k]
+            if w is None or w.proc.poll() is not None:
+                if w is not None:
+                    w.close()
+                w = self._workers[k] = _Worker(self.seeds[k], self._env)
+            return w
+
+    def _call(self, k: int, path: str, args: Tuple[Any, ...], kwargs: Dict[str, Any]) -> bytes:
+        w = self._worker(k)
+        try:
+            ok, value = w.call(path, args, kwargs)
+        except (EOFError, OSError, BrokenPipeError):
+            raise RuntimeError(
+                f"worker (PYTHONHASHSEED={w.seed}) died running {path}"
+            ) from None
+        if not ok:
+            raise RuntimeError(f"{path} failed under PYTHONHASHSEED={w.seed}:\n{value}")
+        return value
+
+    def check(
+        self,
+        fn: Union[str, Callable[..., Any]],
+        runs: Optional[int] = None,
+        args: Tuple[Any, ...] = (),
+        kwargs: Optional[Mapping[str, Any]] = None,
+        *,
+        stop_on_variance: bool = False,
+    ) -> ConsistencyReport:
+        """Run fn `runs` times (default: once per worker) across the pool.
+
+        The report is digest-based: classes hold (digest, count) and
+        digests lists completed runs in run order; run i executes under
+        seeds[i % len(seeds)].
+        Arguments are pickled to the workers. Exceptions in fn are raised
+        here as RuntimeError carrying the worker's traceback.
+        """
+        if self._closed:
+            raise RuntimeError("pool is closed")
+        n = len(self.seeds) if runs is None else runs
+        if n <= 0:
+            raise ValueError("runs must be >= 1")
+        path = fn_path(fn)
+        kw = dict(kwargs or {})
+        stop = threading.Event()
+        lock = threading.Lock()
+        digests: Dict[int, bytes] = {}
+
+        def lane(k: int) -> None:
+            # Runs on one worker are sequential; lanes run in parallel.
+            for i in range(k, n, len(self.seeds)):
+                if stop.is_set():
+                    return
+                try:
+                    d = self._call(k, path, args, kw)
+                except BaseException:
+                    stop.set()
+                    raise
+                with lock:
+                    digests[i] = d
+                    if stop_on_variance and len(set(digests.values())) > 1:
+                        stop.set()
+
+        futures = [self._threads.submit(lane, k) for k in range(min(n, len(self.seeds)))]
+        errors = [f.exception() for f in futures]
+        first = next((e for e in errors if e is not None), None)
+        if first is not None:
+            raise first
+
+        ordered = [digests[i] for i in sorted(digests)]
+        counts: Dict[bytes, int] = {}
+        for d in ordered:
+            counts[d] = counts.get(d, 0) + 1
+        return ConsistencyReport(
+            runs=n,
+            deterministic=len(counts) == 1,
+            unique_count=len(counts),
+            outputs=(),
+            classes=tuple(counts.items()),
+            completed=len(ordered),
+            stopped_early=len(ordered) < n,
+            digests=tuple(ordered),
+        )
+
+    def close(self) -> None:
+        self._closed = True
+        self._threads.shutdown(wait=True)
+        for w in self._workers:
+            if w is not None:
+                w.close()
+        self._workers = [None] * len(self.seeds)
+
+    def __enter__(self) -> "IsolatedPool":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.close()
+
+
+if __name__ == "__main__":
+    _serve()
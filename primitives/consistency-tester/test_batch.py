@@ -0,0 +1,109 @@
+import json
+import multiprocessing.pool
+import threading
+import time
+
+import pytest
+from batch import Case, read_report, run_batch
+from tester import canonical_digest
+
+
+def _square(x):
+    return x * x
+
+
+def _noisy():
+    return time.perf_counter_ns()
+
+
+def _boom():
+    raise RuntimeError("nope")
+
+
+def _sleepy(s):
+    time.sleep(s)
+    return s
+
+
+def test_batch_writes_one_record_per_case(tmp_path):
+    report = tmp_path / "report.jsonl"
+    cases = [Case(_square, 5, (3,), case_id="sq3"), Case(_noisy, 5, case_id="noisy"),
+             Case(_boom, 2, case_id="boom")]
+    recs = run_batch(cases, report, workers=2)
+    assert [r["case_id"] for r in recs] == ["sq3", "noisy", "boom"]
+    sq, noisy, boom = recs
+    assert sq["status"] == "ok" and sq["deterministic"] is True
+    assert sq["classes"] == [[canonical_digest(9).hex(), 5]]
+    assert noisy["deterministic"] is False and noisy["unique_count"] > 1
+    assert boom["status"] == "error" and "nope" in boom["error"]
+    lines = report.read_text(encoding="utf-8").splitlines()
+    assert sorted(json.loads(x)["case_id"] for x in lines) == ["boom", "noisy", "sq3"]
+
+
+def test_resume_skips_recorded_cases_and_tolerates_torn_line(tmp_path):
+    report = tmp_path / "report.jsonl"
+    run_batch([Case(_square, 2, (2,), case_id="a")], report, workers=1)
+    with open(report, "a", encoding="utf-8") as f:
+        f.write('{"case_id": "b", "sta')  # interrupted mid-write
+    recs = run_batch([Case(_square, 2, (2,), case_id="a"), Case(_square, 2, (4,), case_id="b")],
+                     report, workers=1)
+    assert [r["case_id"] for r in recs] == ["a", "b"]
+    assert set(read_report(report)) == {"a", "b"}
+    assert report.read_text(encoding="utf-8").count('"case_id": "a"') == 1
+
+
+def test_timeout_and_stop_on_variance(tmp_path):
+    report = tmp_path / "report.jsonl"
+    recs = run_batch(
+        [Case(_sleepy, 1, (5,), case_id="slow", timeout=0.2),
+         Case(_noisy, 50, case_id="noisy")],
+        report, workers=2, stop_on_variance=True,
+    )
+    slow, noisy = recs
+    assert slow["status"] == "timeout"
+    assert noisy["status"] == "varied" and noisy["unique_count"] == 2
+
+
+def test_derived_case_ids_are_stable_and_unique():
+    assert Case(_square, 3, (1,)).id == Case(_square, 3, (1,)).id
+    assert Case(_square, 3, (1,)).id != Case(_square, 3, (2,)).id
+    with pytest.raises(ValueError):
+        run_batch([Case(_square, 1, (1,)), Case(_square, 1, (1,))], "unused.jsonl")
+
+
+def test_hung_case_does_not_hold_workers_past_its_deadline(tmp_path):
+    report = tmp_path / "report.jsonl"
+    t0 = time.monotonic()
+    recs = run_batch(
+        [Case(_sleepy, 2, (60,), case_id="hang", timeout=0.5),
+         Case(_square, 2, (3,), case_id="quick")],  # no timeout, queued behind the hang
+        report, workers=1,
+    )
+    assert time.monotonic() - t0 < 15
+    hang, quick = recs
+    assert hang["status"] == "timeout"
+    assert quick["status"] == "ok" and quick["completed"] == 2
+    assert quick["classes"] == [[canonical_digest(9).hex(), 2]]
+
+
+def test_early_error_closes_the_pool_instead_of_terminating(tmp_path, monkeypatch):
+    terminated = []
+    terminate = multiprocessing.pool.Pool.terminate
+    monkeypatch.setattr(multiprocessing.pool.Pool, "terminate",
+                        lambda self: (terminated.append(self), terminate(self)))
+    recs = []
+
+    def batches():
+        for n in range(10):
+            recs.append(run_batch(
+                [Case(_boom, 8, case_id="boom"), Case(_square, 4, (n,), case_id="sq")],
+                tmp_path / f"report{n}.jsonl", workers=2,
+            ))
+
+    t = threading.Thread(target=batches, daemon=True)
+    t.start()
+    t.join(60)  # a terminate() deadlock would hang here
+    assert not t.is_alive()
+    assert terminated == []
+    assert len(recs) == 10
+    assert all(boom["status"] == "error" and sq["status"] == "ok" for boom, sq in recs)
@@ -0,0 +1,93 @@
+import os
+
+import pytest
+from isolated import IsolatedPool, fn_path, resolve
+from tester import check_consistency
+
+_calls = []
+
+
+def _set_order(words):
+    return list(set(words))
+
+
+def _stable(words):
+    return sorted(set(words))
+
+
+def _hash_seed():
+    return os.environ.get("PYTHONHASHSEED")
+
+
+def _counter():
+    # In-process repetitions see each other's state; this is the point.
+    _calls.append(1)
+    return len(_calls)
+
+
+def _boom():
+    raise KeyError("nope")
+
+
+WORDS = [f"w{i}" for i in range(64)]
+
+
+@pytest.fixture(scope="module")
+def pool():
+    with IsolatedPool(workers=3) as p:
+        yield p
+
+
+def test_fn_path_round_trip():
+    assert fn_path(_stable) == "test_isolated:_stable"
+    assert resolve(fn_path(_stable)) is _stable
+    assert resolve("os.path.join") is os.path.join
+    with pytest.raises(ValueError):
+        fn_path(lambda: 1)
+
+
+def test_hash_seed_dependent_order_is_caught(pool):
+    r = pool.check(_set_order, 6, (WORDS,))
+    assert not r.deterministic and r.unique_count > 1
+    assert r.completed == 6 and len(r.digests) == 6
+    # Same seed, same order: run i and run i + 3 share a worker.
+    assert r.digests[0] == r.digests[3]
+
+
+def test_stable_output_is_deterministic_and_pool_is_reused(pool):
+    pids = {w.proc.pid for w in pool._workers if w is not None}
+    r = pool.check("test_isolated:_stable", 9, (WORDS,))
+    assert r.deterministic and r.classes[0][1] == 9
+    assert {w.proc.pid for w in pool._workers} >= pids
+
+
+def test_each_worker_has_its_own_seed(pool):
+    r = pool.check(_hash_seed)
+    assert r.unique_count == len(pool.seeds) == 3
+
+
+def test_module_state_is_per_worker(pool):
+    # In one process the counter leaks between runs; across three fresh
+    # workers each run sees its own first call.
+    assert not check_consistency(_counter, 3).deterministic
+    assert pool.check(_counter, 3).deterministic
+
+
+def test_errors_carry_the_worker_traceback(pool):
+    with pytest.raises(RuntimeError, match="KeyError"):
+        pool.check(_boom, 2)
+    assert pool.check(_stable, 3, (WORDS,)).deterministic
+
+
+def test_stop_on_variance():
+    with IsolatedPool(workers=2) as p:
+        r = p.check(_set_order, 40, (WORDS,), stop_on_variance=True)
+    assert not r.deterministic and r.stopped_early and r.completed < 40
+
+
+def test_dead_worker_is_restarted():
+    with IsolatedPool(workers=1) as p:
+        p.check(_stable, 1, (WORDS,))
+        p._workers[0].proc.kill()
+        p._workers[0].proc.wait()
+        assert p.check(_stable, 1, (WORDS,)).deterministic
@@ -1,6 +1,6 @@
 import random
 import pytest
-from tester import run_consistency_test
+from tester import canonical_digest, check_consistency, run_consistency_test, summarise
 
 
 def test_deterministic_function_passes():
@@ -34,3 +34,123 @@ def test_runs_one_is_trivially_deterministic():
 def test_runs_must_be_positive():
     with pytest.raises(ValueError):
         run_consistency_test(lambda: 1, 0)
+
+
+def _double(x):
+    return x * 2
+
+
+@pytest.mark.parametrize("executor", ["serial", "thread", "process"])
+def test_executors_agree_on_deterministic_function(executor):
+    r = check_consistency(_double, 8, (21,), executor=executor, workers=2)
+    assert r.deterministic is True
+    assert r.outputs == (42,) * 8
+    assert r.classes == ((42, 8),)
+    assert r.completed == 8
+
+
+def test_stop_on_variance_stops_at_second_class():
+    calls = []
+
+    def f():
+        calls.append(1)
+        return len(calls) > 2
+
+    r = check_consistency(f, 100, stop_on_variance=True)
+    assert r.deterministic is False
+    assert r.stopped_early is True
+    assert r.completed == len(calls) == 3
+    assert r.classes == ((False, 2), (True, 1))
+
+
+def test_keep_outputs_false_keeps_only_representatives():
+    def f():
+        return [1, 2]
+
+    r = check_consistency(f, 5, keep_outputs=False, executor="thread")
+    assert r.outputs == ()
+    assert r.classes == (([1, 2], 5),)
+    assert r.unique_count == 1
+
+
+def test_unknown_executor_is_rejected():
+    with pytest.raises(ValueError):
+        check_consistency(lambda: 1, 1, executor="gpu")
+
+
+def test_canonical_digest_ignores_dict_and_set_order():
+    a = {"x": [1, {"y": b"z"}], "k": {3, 1, 2}}
+    b = {"k": {2, 3, 1}, "x": [1, {"y": b"z"}]}
+    assert canonical_digest(a) == canonical_digest(b)
+    assert len(canonical_digest(a)) == 32
+    assert canonical_digest([1, 2]) != canonical_digest([2, 1])
+    assert canonical_digest([1]) != canonical_digest((1,))
+    assert canonical_digest(1) != canonical_digest(1.0)
+    assert canonical_digest(float("nan")) == canonical_digest(float("nan"))
+
+
+def test_canonical_digest_hashes_buffers_and_handles_cycles():
+    import array
+
+    assert canonical_digest(array.array("d", [1.0])) == canonical_digest(array.array("d", [1.0]))
+    assert canonical_digest(array.array("d", [1.0])) != canonical_digest(array.array("f", [1.0]))
+    loop = []
+    loop.append(loop)
+    assert canonical_digest(loop) == canonical_digest(loop)
+
+
+def test_digest_equivalence_groups_unhashable_outputs():
+    def f():
+        return {"b": [1, 2], "a": {"nested": True}}
+
+    r = check_consistency(f, 4, equivalence="digest", keep_outputs=False)
+    assert r.deterministic is True
+    assert r.outputs == ()
+    assert r.digests == (canonical_digest(f()),) * 4
+    assert r.classes == ((f(), 4),)
+
+
+def test_process_executor_ships_only_digests():
+    r = check_consistency(_double, 4, (2,), executor="process",
+                          equivalence="digest", keep_outputs=False, workers=2)
+    assert r.classes == ((canonical_digest(4), 4),)
+
+
+def test_summarise_percentiles_and_cv():
+    s = summarise([float(x) for x in range(1, 101)])
+    assert (s.count, s.min, s.max) == (100, 1.0, 100.0)
+    assert s.median == pytest.approx(50.5)
+    assert s.p95 == pytest.approx(95.05)
+    assert s.p99 == pytest.approx(99.01)
+    assert summarise([2.0, 2.0]).cv == 0.0
+
+
+def test_timing_excludes_warmup_and_reports_latency():
+    import time
+
+    calls = []
+
+    def f():
+        calls.append(1)
+        time.sleep(0.05 if len(calls) <= 2 else 0.001)
+        return 1
+
+    r = check_consistency(f, 5, timing=True, warmup=2)
+    assert len(calls) == 7
+    assert r.completed == 5 and r.warmup == 2
+    assert r.wall_time.count == 5
+    assert r.wall_time.max < 0.04
+    assert r.cpu_time is not None and r.cpu_time.max <= r.wall_time.max + 0.01
+    assert r.peak_memory is None
+
+
+def test_trace_memory_reports_peak_bytes():
+    def f():
+        return len(bytearray(1 << 20))
+
+    r = check_consistency(f, 3, trace_memory=True)
+    assert r.peak_memory.min >= 1 << 20
+    assert r.net_blocks is not None
+    assert r.wall_time is None
+    with pytest.raises(ValueError):
+        check_consistency(f, 1, trace_memory=True, executor="thread")
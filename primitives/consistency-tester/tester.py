@@ -1,6 +1,18 @@
 from __future__ import annotations
+import dataclasses
+import hashlib
+import pickle
+import statistics
+import sys
+import time
+import tracemalloc
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
 from dataclasses import dataclass
-from typing import Any, Callable, List, Tuple
+from enum import Enum
+from typing import Any, Callable, Dict, List, Mapping, Optional, Set, Tuple
+
+EXECUTORS = ("serial", "thread", "process")
+EQUIVALENCE = ("key", "digest")
 
 
 @dataclass(frozen=True)
@@ -9,6 +21,19 @@ class ConsistencyReport:
     deterministic: bool
     unique_count: int
     outputs: Tuple[Any, ...]
+    # One (representative output, count) per equivalence class, in
+    # order of first appearance.
+    classes: Tuple[Tuple[Any, int], ...] = ()
+    completed: int = 0
+    stopped_early: bool = False
+    # Per-run 32-byte canonical digests (equivalence="digest" only).
+    digests: Tuple[bytes, ...] = ()
+    # Per-call distributions (timing=True / trace_memory=True only).
+    wall_time: Optional["Stats"] = None
+    cpu_time: Optional["Stats"] = None
+    peak_memory: Optional["Stats"] = None
+    net_blocks: Optional["Stats"] = None
+    warmup: int = 0
 
 
 def _key(o: Any) -> Any:
@@ -20,31 +45,325 @@ def _key(o: Any) -> Any:
         return ("repr", repr(o))
 
 
-def run_consistency_test(
-    fn: Callable[..., Any], runs: int, *args: Any, **kwargs: Any
+class _HashWriter:
+    __slots__ = ("write",)
+
+    def __init__(self, h: Any) -> None:
+        self.write = h.update
+
+
+def _canon(h: Any, o: Any, stack: Set[int]) -> None:
+    """Stream a canonical, type-tagged encoding of o into h."""
+    t = type(o)
+    if o is None:
+        h.update(b"N")
+    elif t is bool:
+        h.update(b"T" if o else b"F")
+    elif t is int:
+        h.update(b"i%d;" % o)
+    elif t is float:
+        h.update(b"f" + o.hex().encode() + b";")
+    elif t is complex:
+        h.update(b"c" + o.real.hex().encode() + b"," + o.imag.hex().encode() + b";")
+    elif t is str:
+        data = o.encode("utf-8", errors="surrogatepass")
+        h.update(b"s%d:" % len(data))
+        h.update(data)
+    elif t is bytes or t is bytearray:
+        h.update(b"b%d:" % len(o))
+        h.update(o)
+    elif id(o) in stack:
+        h.update(b"@cycle;")
+    elif t is list or t is tuple:
+        h.update(b"%s%d:" % (t.__name__.encode(), len(o)))
+        stack.add(id(o))
+        for x in o:
+            _canon(h, x, stack)
+        stack.discard(id(o))
+    elif t is dict:
+        stack.add(id(o))
+        pairs = sorted(
+            (_digest(k, stack), _digest(v, stack)) for k, v in o.items()
+        )
+        stack.discard(id(o))
+        h.update(b"d%d:" % len(pairs))
+        for kd, vd in pairs:
+            h.update(kd)
+            h.update(vd)
+    elif t is set or t is frozenset:
+        stack.add(id(o))
+        items = sorted(_digest(x, stack) for x in o)
+        stack.discard(id(o))
+        h.update(b"S%d:" % len(items))
+        for d in items:
+            h.update(d)
+    elif isinstance(o, Enum):
+        h.update(b"e" + type(o).__qualname__.encode() + b"." + o.name.encode() + b";")
+    elif dataclasses.is_dataclass(o) and not isinstance(o, type):
+        h.update(b"D" + t.__qualname__.encode() + b":")
+        stack.add(id(o))
+        for f in dataclasses.fields(o):
+            _canon(h, f.name, stack)
+            _canon(h, getattr(o, f.name), stack)
+        stack.discard(id(o))
+    else:
+        try:
+            mv = memoryview(o)
+        except (TypeError, ValueError):
+            mv = None
+        if mv is not None:
+            with mv:
+                h.update(b"m%s:%s:%r:" % (t.__qualname__.encode(), mv.format.encode(), mv.shape))
+                h.update(mv.cast("B") if mv.c_contiguous else mv.tobytes())
+            return
+        h.update(b"p" + t.__qualname__.encode() + b":")
+        try:
+            pickle.Pickler(_HashWriter(h), protocol=pickle.HIGHEST_PROTOCOL).dump(o)
+        except Exception:
+            h.update(b"repr:" + repr(o).encode("utf-8", errors="replace"))
+
+
+def _digest(o: Any, stack: Set[int]) -> bytes:
+    h = hashlib.sha256()
+    _canon(h, o, stack)
+    return h.digest()
+
+
+def canonical_digest(o: Any) -> bytes:
+    """32-byte SHA-256 over a canonical encoding of o.
+
+    Dicts and sets are order-independent (entries sorted by digest),
+    lists/tuples recurse, bytes and buffer-protocol objects (arrays) are
+    hashed from memory, dataclasses by field. Type-strict: 1, 1.0 and
+    True differ, as do 0.0 and -0.0. Other objects fall back to their
+    pickle, then repr.
+    """
+    return _digest(o, set())
+
+
+def _call_and_digest(
+    fn: Callable[..., Any], args: Tuple[Any, ...], kwargs: Dict[str, Any], keep: bool,
+) -> Tuple[Any, bytes]:
+    """Worker body: reduce the output to its digest where it is produced."""
+    out = fn(*args, **kwargs)
+    return (out if keep else None), canonical_digest(out)
+
+
+# (wall seconds, cpu seconds, peak traced bytes, net allocated blocks)
+Sample = Tuple[float, float, Optional[int], Optional[int]]
+
+
+def _run_once(
+    fn: Callable[..., Any],
+    args: Tuple[Any, ...],
+    kwargs: Dict[str, Any],
+    digest: bool,
+    keep: bool,
+    timing: bool,
+    memory: bool,
+) -> Tuple[Any, Optional[bytes], Optional[Sample]]:
+    """Worker body: call fn once, optionally measure it, optionally digest it.
+
+    Only the call itself is measured, not the digest.
+    """
+    sample: Optional[Sample] = None
+    if timing or memory:
+        started = memory and not tracemalloc.is_tracing()
+        if started:
+            tracemalloc.start()
+        if memory:
+            base, _ = tracemalloc.get_traced_memory()
+            tracemalloc.reset_peak()
+            blocks = sys.getallocatedblocks()
+        c0 = time.thread_time()
+        t0 = time.perf_counter()
+        out = fn(*args, **kwargs)
+        wall = time.perf_counter() - t0
+        cpu = time.thread_time() - c0
+        peak = net = None
+        if memory:
+            net = sys.getallocatedblocks() - blocks
+            peak = tracemalloc.get_traced_memory()[1] - base
+            if started:
+                tracemalloc.stop()
+        sample = (wall, cpu, peak, net)
+    else:
+        out = fn(*args, **kwargs)
+    if digest:
+        return (out if keep else None), canonical_digest(out), sample
+    return out, None, sample
+
+
+@dataclass(frozen=True)
+class Stats:
+    """Distribution summary; percentiles interpolate linearly."""
+    count: int
+    min: float
+    median: float
+    p95: float
+    p99: float
+    max: float
+    mean: float
+    cv: float  # coefficient of variation: stdev / mean (0.0 if mean is 0)
+
+
+def _percentile(xs: List[float], q: float) -> float:
+    pos = (len(xs) - 1) * q
+    lo = int(pos)
+    hi = min(lo + 1, len(xs) - 1)
+    return xs[lo] + (xs[hi] - xs[lo]) * (pos - lo)
+
+
+def summarise(values: List[float]) -> Stats:
+    if not values:
+        raise ValueError("no values to summarise")
+    xs = sorted(values)
+    mean = statistics.fmean(xs)
+    sd = statistics.pstdev(xs, mean) if len(xs) > 1 else 0.0
+    return Stats(
+        count=len(xs),
+        min=xs[0],
+        median=_percentile(xs, 0.5),
+        p95=_percentile(xs, 0.95),
+        p99=_percentile(xs, 0.99),
+        max=xs[-1],
+        mean=mean,
+        cv=sd / mean if mean else 0.0,
+    )
+
+
+def check_consistency(
+    fn: Callable[..., Any],
+    runs: int,
+    args: Tuple[Any, ...] = (),
+    kwargs: Optional[Mapping[str, Any]] = None,
+    *,
+    executor: str = "serial",
+    workers: Optional[int] = None,
+    stop_on_variance: bool = False,
+    keep_outputs: bool = True,
+    equivalence: str = "key",
+    timing: bool = False,
+    trace_memory: bool = False,
+    warmup: int = 0,
 ) -> ConsistencyReport:
     """
     Run `fn(*args, **kwargs)` `runs` times and measure output consistency.
 
-    Deterministic = all outputs fall into one equivalence class
-    (hashable equality or repr fallback).
+    executor:          "serial", "thread" or "process" (fn and its outputs
+                       must then be picklable).
+    stop_on_variance:  stop as soon as a second equivalence class appears;
+                       unique_count is then a lower bound.
+    keep_outputs:      if False, keep only one representative per class
+                       (report.classes) and leave report.outputs empty.
+    equivalence:       "key" groups by hashable equality or repr; "digest"
+                       groups by canonical_digest(), computed in the worker
+                       as soon as each output is produced. With the process
+                       executor and keep_outputs=False only digests cross
+                       the process boundary, and class representatives are
+                       the digests themselves.
+    timing:            record wall-clock and per-thread CPU time of each
+                       call in report.wall_time / report.cpu_time.
+    trace_memory:      record tracemalloc peak bytes and the net change in
+                       allocated blocks per call (not with executor="thread":
+                       tracemalloc is process-wide).
+    warmup:            calls made first and discarded entirely.
     """
     if runs <= 0:
         raise ValueError("runs must be >= 1")
+    if warmup < 0:
+        raise ValueError("warmup must be >= 0")
+    if executor not in EXECUTORS:
+        raise ValueError(f"executor must be one of {EXECUTORS}, got {executor!r}")
+    if equivalence not in EQUIVALENCE:
+        raise ValueError(f"equivalence must be one of {EQUIVALENCE}, got {equivalence!r}")
+    if trace_memory and executor == "thread":
+        raise ValueError("trace_memory needs executor='serial' or 'process'")
+    kw = dict(kwargs or {})
+    use_digest = equivalence == "digest"
+    # Outputs only need to leave a worker process if someone keeps them.
+    ship = keep_outputs or executor != "process"
+    call_args = (fn, args, kw, use_digest, ship, timing, trace_memory)
 
-    outputs: List[Any] = []
-    keys: List[Any] = []
-    for _ in range(runs):
-        out = fn(*args, **kwargs)
-        outputs.append(out)
-        keys.append(_key(out))
+    classes: Dict[Any, List[Any]] = {}  # key -> [representative, count]
+    outputs: Dict[int, Any] = {}
+    digests: Dict[int, bytes] = {}
+    samples: List[Sample] = []
+    completed = 0
+
+    def record(i: int, result: Tuple[Any, Optional[bytes], Optional[Sample]]) -> bool:
+        """Fold one run's result in; True means stop."""
+        nonlocal completed
+        completed += 1
+        out, k, sample = result
+        if sample is not None:
+            samples.append(sample)
+        if k is not None:
+            digests[i] = k
+            rep = out if ship else k
+        else:
+            rep = out
+            k = _key(out)
+        slot = classes.get(k)
+        if slot is None:
+            classes[k] = [rep, 1]
+        else:
+            slot[1] += 1
+        if keep_outputs:
+            outputs[i] = out
+        return stop_on_variance and len(classes) > 1
 
-    unique_count = len(set(keys))
-    deterministic = unique_count == 1
+    stopped = False
+    if executor == "serial":
+        for _ in range(warmup):
+            _run_once(*call_args)
+        for i in range(runs):
+            if record(i, _run_once(*call_args)):
+                stopped = True
+                break
+    else:
+        pool_cls = ThreadPoolExecutor if executor == "thread" else ProcessPoolExecutor
+        with pool_cls(max_workers=workers) as pool:
+            for fut in [pool.submit(_run_once, *call_args) for _ in range(warmup)]:
+                fut.result()
+            futures = {pool.submit(_run_once, *call_args): i for i in range(runs)}
+            for fut in as_completed(futures):
+                if record(futures[fut], fut.result()):
+                    stopped = True
+                    for f in futures:
+                        f.cancel()
+                    break
 
+    def stats(col: int) -> Optional[Stats]:
+        values = [s[col] for s in samples if s[col] is not None]
+        return summarise(values) if values else None
+
+    unique_count = len(classes)
     return ConsistencyReport(
         runs=runs,
-        deterministic=deterministic,
+        deterministic=unique_count == 1,
         unique_count=unique_count,
-        outputs=tuple(outputs),
+        outputs=tuple(outputs[i] for i in sorted(outputs)),
+        classes=tuple((rep, n) for rep, n in classes.values()),
+        completed=completed,
+        stopped_early=stopped and completed < runs,
+        digests=tuple(digests[i] for i in sorted(digests)),
+        wall_time=stats(0) if timing else None,
+        cpu_time=stats(1) if timing else None,
+        peak_memory=stats(2),
+        net_blocks=stats(3),
+        warmup=warmup,
     )
+
+
+def run_consistency_test(
+    fn: Callable[..., Any], runs: int, *args: Any, **kwargs: Any
+) -> ConsistencyReport:
+    """
+    Run `fn(*args, **kwargs)` `runs` times and measure output consistency.
+
+    Deterministic = all outputs fall into one equivalence class
+    (hashable equality or repr fallback). See check_consistency() for
+    parallel and early-stopping options.
+    """
+    return check_consistency(fn, runs, args, kwargs)
@@ -0,0 +1,257 @@
+"""Sidecar index for a comms-center file: random access to envelopes.
+
+Records the byte offsets of every envelope block together with its
+routing fields (msg_id, from, to, mode, scope, exit, in_reply_to, ts_utc)
+in a SQLite file next to the archive. A lookup reads and parses one block
+instead of re-extracting the whole file; threads are followed through the
+in_reply_to index. Because the comms center is append-only, update() only
+scans bytes added since the last run. If the indexed prefix changed, the
+index is rebuilt from scratch.
+
+Deterministic. No network calls. Writes only the index file.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import importlib.util
+import mmap
+import re
+import sqlite3
+import sys
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, List, Optional, Tuple, Union
+
+# ---------------------------------------------------------------------------
+# Robust local imports via importlib (avoids sibling gate.py collision)
+# ---------------------------------------------------------------------------
+_HERE = Path(__file__).resolve().parent
+
+
+def _load_local(module_name: str):
+    """Load a module from this directory by file path."""
+    path = _HERE / f"{module_name}.py"
+    spec = importlib.util.spec_from_file_location(module_name, str(path))
+    mod = importlib.util.module_from_spec(spec)
+    sys.modules[module_name] = mod
+    spec.loader.exec_module(mod)
+    return mod
+
+
+_ep = _load_local("envelope_parser")
+Envelope = _ep.Envelope
+parse_envelope = _ep.parse_envelope
+
+# Byte-level twin of envelope_parser._ENVELOPE_BLOCK_RE, so spans are file offsets.
+_BLOCK_RE = re.compile(
+    rb"```\s*\n(ALVIANTECH_ENVELOPE v0\.1.*?)```",
+    re.DOTALL,
+)
+
+_SCHEMA_VERSION = "1"
+_PROBE = 4096  # bytes hashed at the start and end of the indexed prefix
+_IN_BATCH = 500  # ids per in_reply_to IN (...) query
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+CREATE TABLE IF NOT EXISTS envelopes (
+    seq INTEGER PRIMARY KEY,
+    msg_id TEXT NOT NULL,
+    start INTEGER NOT NULL,
+    end INTEGER NOT NULL,
+    ts_utc TEXT NOT NULL,
+    sender TEXT NOT NULL,
+    recipient TEXT NOT NULL,
+    mode TEXT NOT NULL,
+    scope TEXT NOT NULL,
+    exit TEXT NOT NULL,
+    in_reply_to TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS envelopes_msg_id ON envelopes (msg_id);
+CREATE INDEX IF NOT EXISTS envelopes_in_reply_to ON envelopes (in_reply_to);
+CREATE INDEX IF NOT EXISTS envelopes_sender ON envelopes (sender);
+"""
+
+_COLUMNS = "seq, msg_id, start, end, ts_utc, sender, recipient, mode, scope, exit, in_reply_to"
+
+
+@dataclass(frozen=True)
+class IndexEntry:
+    """One indexed envelope: its position in the archive and routing fields."""
+    seq: int           # 0-based order in the archive
+    msg_id: str
+    start: int         # byte offsets of the envelope text (inside the fence)
+    end: int
+    ts_utc: str
+    sender: str
+    recipient: str
+    mode: str
+    scope: str
+    exit: str
+    in_reply_to: str
+
+
+def default_index_path(archive: Union[str, Path]) -> Path:
+    """<archive>.idx next to the archive."""
+    p = Path(archive)
+    return p.with_name(p.name + ".idx")
+
+
+class ArchiveIndex:
+    """SQLite index over one comms-center Markdown file.
+
+    Envelopes without a msg_id are indexed under "". When a msg_id occurs
+    more than once, get() and entry() return the first occurrence; use
+    entries() for all of them.
+    """
+
+    def __init__(
+        self,
+        archive: Union[str, Path],
+        index_path: Optional[Union[str, Path]] = None,
+        refresh: bool = True,
+    ) -> None:
+        self.archive = Path(archive)
+        self.index_path = Path(index_path) if index_path else default_index_path(archive)
+        self._db = sqlite3.connect(str(self.index_path))
+        self._db.executescript(_SCHEMA)
+        if self._meta("version") not in (None, _SCHEMA_VERSION):
+            self._reset()
+        if refresh:
+            self.update()
+
+    # -- maintenance -------------------------------------------------------
+
+    def _meta(self, key: str) -> Optional[str]:
+        row = self._db.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def _reset(self) -> None:
+        with self._db:
+            self._db.execute("DELETE FROM envelopes")
+            self._db.execute("DELETE FROM meta")
+
+    @staticmethod
+    def _probe(data: Any, scanned: int) -> str:
+        h = hashlib.blake2b(digest_size=16)
+        h.update(data[:min(_PROBE, scanned)])
+        h.update(data[max(0, scanned - _PROBE):scanned])
+        return h.hexdigest()
+
+    def update(self) -> int:
+        """Index envelopes appended since the last update; returns how many.
+
+        The file is scanned from the end of the last complete block, so an
+        envelope still being written is picked up once its closing fence
+        lands. If the already-indexed prefix no longer matches (checked by
+        size and hashes of its first and last 4 KiB), the index is rebuilt.
+        """
+        with open(self.archive, "rb") as f:
+            size = f.seek(0, 2)
+            if size == 0:
+                self._reset()
+                return 0
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                scanned = int(self._meta("scanned") or 0)
+                if scanned and (scanned > size or self._meta("probe") != self._probe(data, scanned)):
+                    self._reset()
+                    scanned = 0
+                seq = self._db.execute("SELECT COUNT(*) FROM envelopes").fetchone()[0]
+                rows = []
+                for m in _BLOCK_RE.finditer(data, scanned):
+                    env = parse_envelope(m.group(1).decode("utf-8"))
+                    rows.append((
+                        seq + len(rows), env.msg_id, m.start(1), m.end(1), env.ts_utc,
+                        env.sender, env.recipient, env.mode, env.scope, env.exit_code,
+                        env.in_reply_to,
+                    ))
+                    scanned = m.end()
+                with self._db:
+                    self._db.executemany(
+                        f"INSERT INTO envelopes ({_COLUMNS}) VALUES (?,?,?,?,?,?,?,?,?,?,?)", rows
+                    )
+                    self._db.executemany(
+                        "INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)",
+                        [("version", _SCHEMA_VERSION), ("scanned", str(scanned)),
+                         ("probe", self._probe(data, scanned))],
+                    )
+        return len(rows)
+
+    def rebuild(self) -> int:
+        """Drop the index and scan the whole archive again."""
+        self._reset()
+        return self.update()
+
+    # -- lookups -----------------------------------------------------------
+
+    def _entries(self, where: str, args: Tuple[Any, ...], limit: int = -1) -> List[IndexEntry]:
+        rows = self._db.execute(
+            f"SELECT {_COLUMNS} FROM envelopes WHERE {where} ORDER BY seq LIMIT {int(limit)}", args
+        )
+        return [IndexEntry(*r) for r in rows]
+
+    def entry(self, msg_id: str) -> Optional[IndexEntry]:
+        found = self._entries("msg_id = ?", (msg_id,), limit=1)
+        return found[0] if found else None
+
+    def entries(self, msg_id: Optional[str] = None) -> List[IndexEntry]:
+        """All entries in archive order, or those carrying msg_id."""
+        if msg_id is None:
+            return self._entries("1", ())
+        return self._entries("msg_id = ?", (msg_id,))
+
+    def by_sender(self, sender: str) -> List[IndexEntry]:
+        return self._entries("sender = ?", (sender,))
+
+    def load(self, entry: IndexEntry) -> Envelope:
+        """Read and parse the one envelope an entry points at."""
+        with open(self.archive, "rb") as f:
+            f.seek(entry.start)
+            raw = f.read(entry.end - entry.start)
+        return parse_envelope(raw.decode("utf-8"))
+
+    def get(self, msg_id: str) -> Optional[Envelope]:
+        e = self.entry(msg_id)
+        return self.load(e) if e is not None else None
+
+    def thread(self, msg_id: str) -> List[IndexEntry]:
+        """The conversation msg_id belongs to, in archive order.
+
+        Walks in_reply_to up to the root (a message with no parent, or
+        one that replies to itself or to an unindexed id), then collects
+        every message replying, directly or not, to the root.
+        """
+        start = self.entry(msg_id)
+        if start is None:
+            return []
+        root, seen = start, {start.msg_id}
+        while root.in_reply_to and root.in_reply_to not in seen:
+            parent = self.entry(root.in_reply_to)
+            if parent is None:
+                break
+            seen.add(parent.msg_id)
+            root = parent
+        found = {root.seq: root}
+        frontier, visited = [root.msg_id], {root.msg_id}
+        while frontier:
+            batch, frontier = frontier[:_IN_BATCH], frontier[_IN_BATCH:]
+            marks = ",".join("?" * len(batch))
+            for c in self._entries(f"in_reply_to IN ({marks})", tuple(batch)):
+                found[c.seq] = c
+                if c.msg_id not in visited:
+                    visited.add(c.msg_id)
+                    frontier.append(c.msg_id)
+        return [found[s] for s in sorted(found)]
+
+    def __len__(self) -> int:
+        return self._db.execute("SELECT COUNT(*) FROM envelopes").fetchone()[0]
+
+    def close(self) -> None:
+        self._db.close()
+
+    def __enter__(self) -> "ArchiveIndex":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.close()
@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""Measure the cost of gate profiling, on and off.
+
+Usage:
+    python bench_gate.py [--envelopes N] [--repeat R]
+
+Parses the repo's comms center, cycles its envelopes up to N (default
+50000), and times evaluate_all three ways: the pre-instrumentation
+evaluate(), evaluate_all() with profiler=None, and evaluate_all() with a
+GateProfiler. Reports the best of R interleaved runs (default 5) and checks that all
+three give the same results.
+"""
+
+from __future__ import annotations
+
+import argparse
+import importlib.util
+import itertools
+import sys
+import time
+from pathlib import Path
+
+_HERE = Path(__file__).resolve().parent
+
+
+def _load_local(module_name: str):
+    """Load a module from this directory by file path."""
+    path = _HERE / f"{module_name}.py"
+    spec = importlib.util.spec_from_file_location(module_name, str(path))
+    mod = importlib.util.module_from_spec(spec)
+    sys.modules[module_name] = mod
+    spec.loader.exec_module(mod)
+    return mod
+
+
+_ga = _load_local("gate")
+_gp = _load_local("gate_profiler")
+COMMS = _HERE.parent.parent / "ALVIANTECH_COMMS_CENTER_v0.1.md"
+
+
+def _evaluate_before(env, policy="FIRST_FAIL"):
+    """gate.evaluate as it was before the profiler hook."""
+    violations = []
+    rules_checked = 0
+    for rule_fn in _ga.ALL_RULES:
+        rules_checked += 1
+        result = rule_fn(env)
+        if result is not None:
+            violations.append(result)
+            if policy == "FIRST_FAIL":
+                break
+    return _ga.GateResult(
+        msg_id=env.msg_id or "(unknown)",
+        exit=_ga._classify_exit(violations),
+        violations=violations,
+        rules_checked=rules_checked,
+        rules_total=len(_ga.ALL_RULES),
+    )
+
+
+def _baseline(envelopes, policy="FIRST_FAIL"):
+    return [_evaluate_before(env, policy=policy) for env in envelopes]
+
+
+def _best(variants, repeat):
+    """Best time per variant; the variants take turns so drift hits all alike."""
+    best = {name: float("inf") for name in variants}
+    results = {}
+    for _ in range(repeat):
+        for name, fn in variants.items():
+            t0 = time.perf_counter()
+            results[name] = fn()
+            best[name] = min(best[name], time.perf_counter() - t0)
+    return best, results
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--envelopes", type=int, default=50000)
+    ap.add_argument("--repeat", type=int, default=5)
+    opts = ap.parse_args()
+
+    parsed = _ga._ep.extract_envelopes(COMMS.read_text(encoding="utf-8"))
+    envelopes = list(itertools.islice(itertools.cycle(parsed), opts.envelopes))
+
+    variants = {
+        "baseline": lambda: _baseline(envelopes),
+        "profiler=None": lambda: _ga.evaluate_all(envelopes),
+        "GateProfiler": lambda: _ga.evaluate_all(envelopes, profiler=_gp.GateProfiler()),
+    }
+    best, results = _best(variants, opts.repeat)
+    assert results["baseline"] == results["profiler=None"] == results["GateProfiler"], \
+        "profiling changed gate results"
+
+    n = len(envelopes)
+    for name, t in best.items():
+        print(f"{name:<14} {t:8.3f}s  {1e6 * t / n:6.2f} us/envelope  {t / best['baseline'] - 1:+7.1%}")
+
+if __name__ == "__main__":
+    main()
@@ -4,6 +4,11 @@
 Usage:
     python cli.py check <comms_file>          Print gate results table
     python cli.py log   <comms_file> <logfile> Print + append to gate log
+    python cli.py audit <comms_file>          Check cross-envelope conversation rules
+
+Options:
+    --profile   After check/log/audit, print parse time, per-phase time
+                and per-rule calls, fire counts and latency percentiles
 
 Deterministic. No network calls. No side effects (except log append).
 """
@@ -12,9 +17,10 @@ from __future__ import annotations
 
 import importlib.util
 import sys
+from contextlib import nullcontext
 from datetime import datetime, timezone
 from pathlib import Path
-from typing import List
+from typing import List, Optional
 
 # ---------------------------------------------------------------------------
 # Robust local imports via importlib
@@ -34,12 +40,21 @@ def _load_local(module_name: str):
 
 _ep = _load_local("envelope_parser")
 extract_envelopes = _ep.extract_envelopes
+iter_envelopes = _ep.iter_envelopes
 
 _ga = _load_local("gate")
 evaluate = _ga.evaluate
 evaluate_all = _ga.evaluate_all
 GateResult = _ga.GateResult
 
+_cr = _load_local("conversation_rules")
+check_conversation = _cr.check_conversation
+ConversationResult = _cr.ConversationResult
+
+_gp = _load_local("gate_profiler")
+GateProfiler = _gp.GateProfiler
+format_report = _gp.format_report
+
 
 # ---------------------------------------------------------------------------
 # Formatting helpers
@@ -107,11 +122,18 @@ def _format_log_entry(results: List[GateResult]) -> str:
 _last_envelopes: list = []
 
 
-def cmd_check(comms_path: str) -> List[GateResult]:
+def _phase(profiler: Optional[GateProfiler], name: str):
+    """Timed block when profiling, otherwise a no-op context."""
+    return profiler.phase(name) if profiler is not None else nullcontext()
+
+
+def cmd_check(comms_path: str, profiler: Optional[GateProfiler] = None) -> List[GateResult]:
     """Read comms file, evaluate all envelopes, print table."""
     global _last_envelopes
-    text = Path(comms_path).read_text(encoding="utf-8")
-    envelopes = extract_envelopes(text)
+    with _phase(profiler, "read"):
+        text = Path(comms_path).read_text(encoding="utf-8")
+    with _phase(profiler, "parse"):
+        envelopes = extract_envelopes(text) if profiler is None else profiler.extract(text)
     _last_envelopes = envelopes
 
     if not envelopes:
@@ -119,52 +141,86 @@ def cmd_check(comms_path: str) -> List[GateResult]:
         return []
 
     print(f"Found {len(envelopes)} envelopes in {comms_path}")
-    results = evaluate_all(envelopes)
-    _print_table(results)
+    with _phase(profiler, "evaluate"):
+        results = evaluate_all(envelopes, profiler=profiler)
+    with _phase(profiler, "format"):
+        _print_table(results)
     return results
 
 
-def cmd_log(comms_path: str, log_path: str) -> None:
+def cmd_log(comms_path: str, log_path: str, profiler: Optional[GateProfiler] = None) -> None:
     """Run check and append results to gate log file."""
-    results = cmd_check(comms_path)
+    results = cmd_check(comms_path, profiler)
     if not results:
         return
 
-    entry = _format_log_entry(results)
-    log_file = Path(log_path)
+    with _phase(profiler, "log"):
+        entry = _format_log_entry(results)
+        log_file = Path(log_path)
 
-    if log_file.exists():
-        existing = log_file.read_text(encoding="utf-8")
-        log_file.write_text(existing + "\n" + entry, encoding="utf-8")
-    else:
-        log_file.write_text(entry, encoding="utf-8")
+        if log_file.exists():
+            existing = log_file.read_text(encoding="utf-8")
+            log_file.write_text(existing + "\n" + entry, encoding="utf-8")
+        else:
+            log_file.write_text(entry, encoding="utf-8")
 
     print(f"Results appended to {log_path}")
 
 
+def cmd_audit(comms_path: str, profiler: Optional[GateProfiler] = None) -> List[ConversationResult]:
+    """Read comms file, check cross-envelope rules in one pass, print findings."""
+    with _phase(profiler, "read"):
+        text = Path(comms_path).read_text(encoding="utf-8")
+    if profiler is None:
+        results = list(check_conversation(iter_envelopes(text)))
+    else:
+        # Parse up front so parsing and checking are timed as separate phases.
+        with profiler.phase("parse"):
+            envelopes = profiler.extract(text)
+        with profiler.phase("audit"):
+            results = list(check_conversation(envelopes, profiler=profiler))
+    if not results:
+        print(f"No conversation violations in {comms_path}")
+        return []
+
+    with _phase(profiler, "format"):
+        print(f"{len(results)} envelopes break conversation rules in {comms_path}")
+        for r in results:
+            for v in r.violations:
+                print(f"  #{r.seq:<5} {r.msg_id:<16} {v.code:<28} {v.message}")
+    return results
+
+
 # ---------------------------------------------------------------------------
 # Entry point
 # ---------------------------------------------------------------------------
 
 def main() -> None:
-    if len(sys.argv) < 3:
+    argv = [a for a in sys.argv if a != "--profile"]
+    profiler = GateProfiler() if len(argv) != len(sys.argv) else None
+    if len(argv) < 3:
         print(__doc__)
         sys.exit(1)
 
-    command = sys.argv[1]
+    command = argv[1]
 
     if command == "check":
-        cmd_check(sys.argv[2])
+        cmd_check(argv[2], profiler)
     elif command == "log":
-        if len(sys.argv) < 4:
+        if len(argv) < 4:
             print("Usage: python cli.py log <comms_file> <logfile>")
             sys.exit(1)
-        cmd_log(sys.argv[2], sys.argv[3])
+        cmd_log(argv[2], argv[3], profiler)
+    elif command == "audit":
+        cmd_audit(argv[2], profiler)
     else:
         print(f"Unknown command: {command}")
         print(__doc__)
         sys.exit(1)
 
+    if profiler is not None:
+        print(format_report(profiler.report()))
+
 
 if __name__ == "__main__":
     main()
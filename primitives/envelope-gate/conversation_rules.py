@@ -0,0 +1,241 @@
+"""Cross-envelope conversation rules for ALVIANTECH_ENVELOPE v0.1.
+
+rules.py judges each envelope on its own. The protocol also has rules
+that span messages:
+
+- Responses (-R) must reply, via RETURN.in_reply_to, to a request that
+  appears earlier in the archive (Section 2.4).
+- msg_ids are unique, and sequential ids (msg-NNNN, msg-NNNN-R) never
+  go backwards (Section 2.4).
+- PORTS.ts_utc never goes backwards (append-only log, Section 2.3).
+- A BODY.goal starting with CORRECTION: must point at an earlier
+  message through in_reply_to (Section 2.3).
+
+All of these are checked in one pass over the archive, in order. Each
+rule looks at the current envelope and a ConversationState (hash sets
+of earlier ids, the highest sequence key and the latest timestamp), so
+the cost is O(1) per envelope and nothing is compared pairwise.
+Identifiers and timestamps that do not follow the sequential format,
+such as the msg-NNNN schema template, are exempt from the ordering rules.
+
+Deterministic. No side effects. No network calls.
+"""
+
+from __future__ import annotations
+
+import importlib.util
+import re
+import sys
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Iterable, Iterator, List, Optional, Set, Tuple
+
+# ---------------------------------------------------------------------------
+# Robust local imports via importlib (avoids sibling gate.py collision)
+# ---------------------------------------------------------------------------
+_HERE = Path(__file__).resolve().parent
+
+
+def _load_local(module_name: str):
+    """Load a module from this directory by file path."""
+    path = _HERE / f"{module_name}.py"
+    spec = importlib.util.spec_from_file_location(module_name, str(path))
+    mod = importlib.util.module_from_spec(spec)
+    sys.modules[module_name] = mod
+    spec.loader.exec_module(mod)
+    return mod
+
+
+_ep = _load_local("envelope_parser")
+Envelope = _ep.Envelope
+
+_ru = _load_local("rules")
+Violation = _ru.Violation
+
+
+_SEQ_ID_RE = re.compile(r"msg-(\d+)(-R)?")
+# Fixed-width, zero-padded UTC: such strings sort chronologically, so they
+# are compared as text (strptime would dominate the sweep).
+_TS_RE = re.compile(r"\d{4}-\d{2}-\d{2}T\d{2}:\d{2}:\d{2}Z")
+_CORRECTION_PREFIX = "CORRECTION:"
+
+
+def sequence_key(msg_id: str) -> Optional[Tuple[int, int]]:
+    """(number, 0 for a request / 1 for its response), or None if not sequential."""
+    m = _SEQ_ID_RE.fullmatch(msg_id)
+    if not m:
+        return None
+    return int(m.group(1)), 1 if m.group(2) else 0
+
+
+def _ts_key(ts: str) -> Optional[str]:
+    """ts itself if it is YYYY-MM-DDTHH:MM:SSZ, else None."""
+    return ts if _TS_RE.fullmatch(ts) else None
+
+
+# ---------------------------------------------------------------------------
+# State carried across the sweep
+# ---------------------------------------------------------------------------
+
+@dataclass
+class ConversationState:
+    """Everything the rules know about the envelopes seen so far."""
+    seen: Set[str] = field(default_factory=set)       # every msg_id
+    requests: Set[str] = field(default_factory=set)   # msg_ids that are not -R
+    max_key: Optional[Tuple[int, int]] = None
+    max_key_id: str = ""
+    last_ts: Optional[str] = None
+    last_ts_id: str = ""
+    count: int = 0
+
+    def advance(self, env: Envelope) -> None:
+        """Record env after the rules have judged it."""
+        self.count += 1
+        if not env.msg_id:
+            return
+        self.seen.add(env.msg_id)
+        if not env.is_response:
+            self.requests.add(env.msg_id)
+        key = sequence_key(env.msg_id)
+        if key is not None and (self.max_key is None or key > self.max_key):
+            self.max_key, self.max_key_id = key, env.msg_id
+        ts = _ts_key(env.ts_utc)
+        if ts is not None and (self.last_ts is None or ts >= self.last_ts):
+            self.last_ts, self.last_ts_id = ts, env.msg_id
+
+
+ConversationRule = Callable[[Envelope, ConversationState], Optional[Violation]]
+
+
+# ---------------------------------------------------------------------------
+# Rules
+# ---------------------------------------------------------------------------
+
+def rule_unique_msg_id(env: Envelope, state: ConversationState) -> Optional[Violation]:
+    """A msg_id may appear only once in the archive."""
+    if env.msg_id and env.msg_id in state.seen:
+        return Violation(
+            code="CONV_DUPLICATE_MSG_ID",
+            message=f"msg_id '{env.msg_id}' was already used by an earlier envelope.",
+            field="PORTS.msg_id",
+        )
+    return None
+
+
+def rule_monotonic_msg_id(env: Envelope, state: ConversationState) -> Optional[Violation]:
+    """Sequential msg_ids must come after every earlier one."""
+    key = sequence_key(env.msg_id)
+    if key is not None and state.max_key is not None and key < state.max_key:
+        return Violation(
+            code="CONV_MSG_ID_OUT_OF_ORDER",
+            message=f"msg_id '{env.msg_id}' appears after '{state.max_key_id}'. "
+                    f"IDs must be sequential.",
+            field="PORTS.msg_id",
+        )
+    return None
+
+
+def rule_ts_not_backwards(env: Envelope, state: ConversationState) -> Optional[Violation]:
+    """PORTS.ts_utc must not be earlier than any earlier envelope's."""
+    ts = _ts_key(env.ts_utc)
+    if ts is not None and state.last_ts is not None and ts < state.last_ts:
+        return Violation(
+            code="CONV_TS_BACKWARDS",
+            message=f"ts_utc '{env.ts_utc}' is earlier than that of "
+                    f"'{state.last_ts_id}'. The log is append-only.",
+            field="PORTS.ts_utc",
+        )
+    return None
+
+
+def rule_response_references_request(env: Envelope, state: ConversationState) -> Optional[Violation]:
+    """A response must reply to a request that appears earlier."""
+    if env.is_response and env.in_reply_to not in state.requests:
+        target = env.in_reply_to or "(blank)"
+        return Violation(
+            code="CONV_REPLY_UNKNOWN_REQUEST",
+            message=f"Response in_reply_to {target} does not name an earlier request.",
+            field="RETURN.in_reply_to",
+        )
+    return None
+
+
+def rule_correction_targets_earlier(env: Envelope, state: ConversationState) -> Optional[Violation]:
+    """CORRECTION: goals must reference an earlier message (Section 2.3)."""
+    if env.goal.startswith(_CORRECTION_PREFIX) and (
+        env.in_reply_to == env.msg_id or env.in_reply_to not in state.seen
+    ):
+        target = env.in_reply_to or "(blank)"
+        return Violation(
+            code="CONV_CORRECTION_NO_TARGET",
+            message=f"CORRECTION in_reply_to {target} does not name an earlier message.",
+            field="RETURN.in_reply_to",
+        )
+    return None
+
+
+CONVERSATION_RULES: List[ConversationRule] = [
+    rule_unique_msg_id,
+    rule_monotonic_msg_id,
+    rule_ts_not_backwards,
+    rule_response_references_request,
+    rule_correction_targets_earlier,
+]
+
+
+# ---------------------------------------------------------------------------
+# Sweep
+# ---------------------------------------------------------------------------
+
+@dataclass(frozen=True)
+class ConversationResult:
+    """Cross-envelope violations for one envelope of the archive."""
+    seq: int  # 0-based position in the archive
+    msg_id: str
+    violations: List[Violation] = field(default_factory=list)
+
+
+class ConversationChecker:
+    """Feed envelopes in archive order; each gets judged against those before it."""
+
+    def __init__(
+        self,
+        policy: str = "ACCUMULATE_ALL",
+        rules: Optional[List[ConversationRule]] = None,
+        profiler: Optional[Any] = None,
+    ) -> None:
+        self.policy = policy
+        self.rules = CONVERSATION_RULES if rules is None else rules
+        if profiler is not None:
+            # gate_profiler.GateProfiler: time and count every rule call.
+            self.rules = profiler.wrap(self.rules)
+        self.state = ConversationState()
+
+    def check(self, env: Envelope) -> List[Violation]:
+        violations: List[Violation] = []
+        for rule_fn in self.rules:
+            result = rule_fn(env, self.state)
+            if result is not None:
+                violations.append(result)
+                if self.policy == "FIRST_FAIL":
+                    break
+        self.state.advance(env)
+        return violations
+
+
+def check_conversation(
+    envelopes: Iterable[Envelope],
+    policy: str = "ACCUMULATE_ALL",
+    profiler: Optional[Any] = None,
+) -> Iterator[ConversationResult]:
+    """Yield a ConversationResult for each envelope that breaks a rule.
+
+    Consumes envelopes lazily, so a generator over a large archive is
+    checked in constant memory apart from the id sets. With a
+    gate_profiler.GateProfiler, every rule call is timed and counted.
+    """
+    checker = ConversationChecker(policy=policy, profiler=profiler)
+    for seq, env in enumerate(envelopes):
+        violations = checker.check(env)
+        if violations:
+            yield ConversationResult(seq, env.msg_id or "(unknown)", violations)
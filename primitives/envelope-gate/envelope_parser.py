@@ -8,7 +8,7 @@ from __future__ import annotations
 
 import re
 from dataclasses import dataclass, field
-from typing import Dict, List, Optional
+from typing import Dict, Iterator, List, Optional
 
 
 _ENVELOPE_HEADER = "ALVIANTECH_ENVELOPE v0.1"
@@ -170,7 +170,12 @@ def parse_envelope(raw: str) -> Envelope:
     )
 
 
+def iter_envelopes(markdown_text: str) -> Iterator[Envelope]:
+    """Yield envelopes one at a time, in file order."""
+    for match in _ENVELOPE_BLOCK_RE.finditer(markdown_text):
+        yield parse_envelope(match.group(1))
+
+
 def extract_envelopes(markdown_text: str) -> List[Envelope]:
     """Extract all envelopes from a Markdown comms-center file."""
-    blocks = _ENVELOPE_BLOCK_RE.findall(markdown_text)
-    return [parse_envelope(block) for block in blocks]
+    return list(iter_envelopes(markdown_text))
@@ -20,7 +20,7 @@ import importlib.util
 import sys
 from dataclasses import dataclass, field
 from pathlib import Path
-from typing import List
+from typing import Any, List, Optional
 
 # ---------------------------------------------------------------------------
 # Robust local imports via importlib (avoids sibling gate.py collision)
@@ -76,20 +76,24 @@ def _classify_exit(violations: List[Violation]) -> str:
 def evaluate(
     envelope: Envelope,
     policy: str = "FIRST_FAIL",
+    profiler: Optional[Any] = None,
 ) -> GateResult:
     """Run all conformance rules against an envelope.
 
     Args:
         envelope: A parsed Envelope object.
         policy: "FIRST_FAIL" (default) or "ACCUMULATE_ALL".
+        profiler: Optional gate_profiler.GateProfiler; when given, every
+            rule call is timed and counted. None costs nothing.
 
     Returns:
         GateResult with exit decision and any violations found.
     """
     violations: List[Violation] = []
     rules_checked = 0
+    rules = ALL_RULES if profiler is None else profiler.wrap(ALL_RULES)
 
-    for rule_fn in ALL_RULES:
+    for rule_fn in rules:
         rules_checked += 1
         result = rule_fn(envelope)
         if result is not None:
@@ -109,6 +113,7 @@ def evaluate(
 def evaluate_all(
     envelopes: List[Envelope],
     policy: str = "FIRST_FAIL",
+    profiler: Optional[Any] = None,
 ) -> List[GateResult]:
     """Run conformance gate on a list of envelopes."""
-    return [evaluate(env, policy=policy) for env in envelopes]
+    return [evaluate(env, policy=policy, profiler=profiler) for env in envelopes]
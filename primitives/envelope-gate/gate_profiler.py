@@ -0,0 +1,256 @@
+"""Opt-in timing instrumentation for EnvelopeGate runs.
+
+A GateProfiler records, per rule: calls, how often the rule fired (returned
+a Violation), cumulative time and latency percentiles. It also records the
+parse time of every envelope and wall time per named phase (read, parse,
+evaluate, format, ...). Pass it to gate.evaluate / evaluate_all or to
+conversation_rules.check_conversation, parse through
+GateProfiler.extract, and read GateProfiler.report().
+
+Nothing here runs unless a profiler is passed in: evaluate() with
+profiler=None takes the same loop as before.
+
+Deterministic apart from the measured times. No network calls.
+"""
+
+from __future__ import annotations
+
+import importlib.util
+import sys
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from pathlib import Path
+from time import perf_counter_ns
+from typing import Any, Dict, Iterator, List, Sequence, Tuple
+
+# ---------------------------------------------------------------------------
+# Robust local imports via importlib (avoids sibling gate.py collision)
+# ---------------------------------------------------------------------------
+_HERE = Path(__file__).resolve().parent
+
+
+def _load_local(module_name: str):
+    """Load a module from this directory by file path."""
+    path = _HERE / f"{module_name}.py"
+    spec = importlib.util.spec_from_file_location(module_name, str(path))
+    mod = importlib.util.module_from_spec(spec)
+    sys.modules[module_name] = mod
+    spec.loader.exec_module(mod)
+    return mod
+
+
+_ep = _load_local("envelope_parser")
+Envelope = _ep.Envelope
+
+_ru = _load_local("rules")
+RuleFunc = _ru.RuleFunc
+
+
+# ---------------------------------------------------------------------------
+# Latency histogram
+# ---------------------------------------------------------------------------
+
+_SUB = 4  # buckets per power of two (~19% resolution)
+
+
+def _bucket(ns: int) -> int:
+    if ns < _SUB:
+        return max(ns, 0)
+    bits = ns.bit_length()
+    return (bits - 2) * _SUB + ((ns >> (bits - 3)) & (_SUB - 1))
+
+
+def _bucket_upper(i: int) -> int:
+    """Largest value that falls in bucket i."""
+    if i < _SUB:
+        return i
+    bits, sub = divmod(i, _SUB)
+    bits += 2
+    return ((_SUB + sub + 1) << (bits - 3)) - 1
+
+
+@dataclass
+class _Timings:
+    """Count, total and a log-linear histogram of nanosecond samples."""
+    count: int = 0
+    total_ns: int = 0
+    max_ns: int = 0
+    buckets: Dict[int, int] = field(default_factory=dict)
+
+    def add(self, ns: int) -> None:
+        self.count += 1
+        self.total_ns += ns
+        if ns > self.max_ns:
+            self.max_ns = ns
+        b = _bucket(ns)
+        self.buckets[b] = self.buckets.get(b, 0) + 1
+
+    def percentile(self, q: float) -> int:
+        """Upper edge of the bucket holding the q-quantile, capped at max."""
+        if not self.count:
+            return 0
+        rank = q * self.count
+        seen = 0
+        for b in sorted(self.buckets):
+            seen += self.buckets[b]
+            if seen >= rank:
+                return min(_bucket_upper(b), self.max_ns)
+        return self.max_ns
+
+
+# ---------------------------------------------------------------------------
+# Report types
+# ---------------------------------------------------------------------------
+
+@dataclass(frozen=True)
+class TimingStats:
+    """Latency summary in nanoseconds; percentiles are within ~19%."""
+    count: int
+    total_ns: int
+    mean_ns: float
+    p50_ns: int
+    p95_ns: int
+    p99_ns: int
+    max_ns: int
+
+
+@dataclass(frozen=True)
+class RuleStats:
+    name: str
+    fired: int
+    timing: TimingStats
+
+    @property
+    def calls(self) -> int:
+        return self.timing.count
+
+
+@dataclass(frozen=True)
+class ProfileReport:
+    rules: List[RuleStats]          # in rule order
+    parse: TimingStats              # one sample per parsed envelope
+    phases: Dict[str, int]          # wall ns per phase, in first-use order
+
+
+def _summary(t: _Timings) -> TimingStats:
+    return TimingStats(
+        count=t.count,
+        total_ns=t.total_ns,
+        mean_ns=t.total_ns / t.count if t.count else 0.0,
+        p50_ns=t.percentile(0.50),
+        p95_ns=t.percentile(0.95),
+        p99_ns=t.percentile(0.99),
+        max_ns=t.max_ns,
+    )
+
+
+# ---------------------------------------------------------------------------
+# Profiler
+# ---------------------------------------------------------------------------
+
+class GateProfiler:
+    """Collects rule, parse and phase timings. Not thread-safe."""
+
+    def __init__(self) -> None:
+        self._rules: Dict[str, Tuple[_Timings, List[int]]] = {}  # name -> (timings, [fired])
+        self._parse = _Timings()
+        self._phases: Dict[str, int] = {}
+        self._wrapped: Dict[Tuple[RuleFunc, ...], List[RuleFunc]] = {}
+
+    def _timed(self, rule_fn: RuleFunc) -> RuleFunc:
+        timings, fired = self._rules.setdefault(rule_fn.__name__, (_Timings(), [0]))
+        add = timings.add
+
+        def timed(env: Envelope):
+            t0 = perf_counter_ns()
+            result = rule_fn(env)
+            add(perf_counter_ns() - t0)
+            if result is not None:
+                fired[0] += 1
+            return result
+
+        def timed_with_state(env: Envelope, state: Any):
+            # Conversation rules; a separate closure keeps gate rules off *args.
+            t0 = perf_counter_ns()
+            result = rule_fn(env, state)
+            add(perf_counter_ns() - t0)
+            if result is not None:
+                fired[0] += 1
+            return result
+
+        if getattr(getattr(rule_fn, "__code__", None), "co_argcount", 1) == 2:
+            timed = timed_with_state
+
+        timed.__name__ = rule_fn.__name__
+        timed.__doc__ = rule_fn.__doc__
+        return timed
+
+    def wrap(self, rules: Sequence[RuleFunc]) -> List[RuleFunc]:
+        """Timed stand-ins for rules, in the same order (cached per rule list).
+
+        Takes gate rules (env) and conversation rules (env, state).
+        """
+        key = tuple(rules)
+        wrapped = self._wrapped.get(key)
+        if wrapped is None:
+            wrapped = self._wrapped[key] = [self._timed(fn) for fn in key]
+        return wrapped
+
+    def parse(self, raw: str) -> Envelope:
+        """parse_envelope(raw), timed."""
+        t0 = perf_counter_ns()
+        env = _ep.parse_envelope(raw)
+        self._parse.add(perf_counter_ns() - t0)
+        return env
+
+    def extract(self, markdown_text: str) -> List[Envelope]:
+        """extract_envelopes(markdown_text), timing each envelope's parse."""
+        return [self.parse(m.group(1)) for m in _ep._ENVELOPE_BLOCK_RE.finditer(markdown_text)]
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        """Add the wall time of the with-block to phase `name`."""
+        t0 = perf_counter_ns()
+        try:
+            yield
+        finally:
+            self._phases[name] = self._phases.get(name, 0) + perf_counter_ns() - t0
+
+    def report(self) -> ProfileReport:
+        return ProfileReport(
+            rules=[RuleStats(name, fired[0], _summary(t)) for name, (t, fired) in self._rules.items()],
+            parse=_summary(self._parse),
+            phases=dict(self._phases),
+        )
+
+
+# ---------------------------------------------------------------------------
+# Formatting
+# ---------------------------------------------------------------------------
+
+def _us(ns: float) -> str:
+    return f"{ns / 1000:.1f}"
+
+
+def format_report(report: ProfileReport) -> str:
+    """Plain-text tables: phases, parse time, then rules by cumulative time."""
+    lines: List[str] = []
+    if report.phases:
+        lines.append("Phases (ms):")
+        for name, ns in report.phases.items():
+            lines.append(f"  {name:<12} {ns / 1e6:10.3f}")
+        lines.append("")
+    p = report.parse
+    if p.count:
+        lines.append(f"Parse: {p.count} envelopes, total {p.total_ns / 1e6:.3f} ms, "
+                     f"mean {_us(p.mean_ns)} us, p50 {_us(p.p50_ns)} us, "
+                     f"p95 {_us(p.p95_ns)} us, p99 {_us(p.p99_ns)} us, max {_us(p.max_ns)} us")
+        lines.append("")
+    hdr = (f"{'rule':<34} {'calls':>8} {'fired':>7} {'total ms':>10} {'mean us':>9} "
+           f"{'p50 us':>8} {'p95 us':>8} {'p99 us':>8}")
+    lines += ["Rules (by cumulative time):", hdr, "-" * len(hdr)]
+    for r in sorted(report.rules, key=lambda r: -r.timing.total_ns):
+        t = r.timing
+        lines.append(f"{r.name:<34} {t.count:>8} {r.fired:>7} {t.total_ns / 1e6:>10.3f} "
+                     f"{_us(t.mean_ns):>9} {_us(t.p50_ns):>8} {_us(t.p95_ns):>8} {_us(t.p99_ns):>8}")
+    return "\n".join(lines)
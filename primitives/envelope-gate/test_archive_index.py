@@ -0,0 +1,130 @@
+"""Tests for the comms-center sidecar index."""
+
+import importlib.util
+import shutil
+import sys
+from pathlib import Path
+
+# ---------------------------------------------------------------------------
+# Robust local imports via importlib (avoids sibling gate.py collision)
+# ---------------------------------------------------------------------------
+_HERE = Path(__file__).resolve().parent
+
+
+def _load_local(module_name: str):
+    """Load a module from this directory by file path."""
+    path = _HERE / f"{module_name}.py"
+    spec = importlib.util.spec_from_file_location(module_name, str(path))
+    mod = importlib.util.module_from_spec(spec)
+    sys.modules[module_name] = mod
+    spec.loader.exec_module(mod)
+    return mod
+
+
+_ai = _load_local("archive_index")
+ArchiveIndex = _ai.ArchiveIndex
+extract_envelopes = _ai._ep.extract_envelopes
+
+COMMS = _HERE.parent.parent / "ALVIANTECH_COMMS_CENTER_v0.1.md"
+
+
+def _block(msg_id, in_reply_to="", sender="HUMAN", goal="Test goal.", exit_code=""):
+    return f"""
+### {msg_id}
+
+```
+ALVIANTECH_ENVELOPE v0.1
+PORTS:
+  msg_id: "{msg_id}"
+  ts_utc: "2026-02-18T11:00:00Z"
+  from: {sender}
+  to: TRINITY
+  mode: TEST
+  scope: NON_EXEC
+BODY:
+  goal: {goal}
+RETURN:
+  in_reply_to: "{in_reply_to}"
+  exit: {exit_code}
+```
+"""
+
+
+def _archive(tmp_path, *blocks):
+    p = tmp_path / "comms.md"
+    p.write_text("# Comms\n" + "".join(blocks), encoding="utf-8")
+    return p
+
+
+def test_index_matches_full_extraction(tmp_path):
+    p = tmp_path / "comms.md"
+    shutil.copy(COMMS, p)
+    envs = extract_envelopes(p.read_text(encoding="utf-8"))
+    with ArchiveIndex(p) as ix:
+        assert len(ix) == len(envs) > 0
+        assert [ix.load(e) for e in ix.entries()] == envs
+        assert ix.get("msg-0003-R") == next(e for e in envs if e.msg_id == "msg-0003-R")
+        assert ix.get("msg-9999") is None
+        assert [e.msg_id for e in ix.thread("msg-0002-R")] == ["msg-0002", "msg-0002-R"]
+
+
+def test_entry_fields_and_sender_lookup(tmp_path):
+    p = _archive(tmp_path, _block("msg-0001"), _block("msg-0001-R", "msg-0001", "TRINITY", exit_code="ALLOW"))
+    with ArchiveIndex(p) as ix:
+        e = ix.entry("msg-0001-R")
+        assert (e.seq, e.sender, e.recipient, e.exit, e.in_reply_to) == (1, "TRINITY", "TRINITY", "ALLOW", "msg-0001")
+        assert p.read_bytes()[e.start:e.end].startswith(b"ALVIANTECH_ENVELOPE v0.1")
+        assert [x.msg_id for x in ix.by_sender("HUMAN")] == ["msg-0001"]
+
+
+def test_appends_are_indexed_incrementally(tmp_path):
+    p = _archive(tmp_path, _block("msg-0001"))
+    with ArchiveIndex(p) as ix:
+        assert len(ix) == 1
+        first = ix.entry("msg-0001")
+        full = _block("msg-0002")
+        cut = full.index("RETURN:")
+        with open(p, "a", encoding="utf-8") as f:
+            f.write(full[:cut])  # envelope still being written
+        assert ix.update() == 0
+        with open(p, "a", encoding="utf-8") as f:
+            f.write(full[cut:] + _block("msg-0003"))
+        assert ix.update() == 2
+        assert ix.update() == 0
+        assert ix.entry("msg-0001") == first
+        assert [e.seq for e in ix.entries()] == [0, 1, 2]
+        assert ix.get("msg-0002").goal == "Test goal."
+        assert [ix.load(e) for e in ix.entries()] == extract_envelopes(p.read_text(encoding="utf-8"))
+
+
+def test_index_persists_and_rebuilds_on_rewrite(tmp_path):
+    p = _archive(tmp_path, _block("msg-0001"), _block("msg-0002"))
+    with ArchiveIndex(p) as ix:
+        assert len(ix) == 2
+    with ArchiveIndex(p, refresh=False) as ix:
+        assert len(ix) == 2 and ix.update() == 0
+    p.write_text(p.read_text(encoding="utf-8").replace("msg-0001", "msg-0101"), encoding="utf-8")
+    with ArchiveIndex(p) as ix:
+        assert [e.msg_id for e in ix.entries()] == ["msg-0101", "msg-0002"]
+    p.write_text("", encoding="utf-8")
+    with ArchiveIndex(p) as ix:
+        assert len(ix) == 0
+
+
+def test_thread_follows_reply_chains_without_cycles(tmp_path):
+    p = _archive(
+        tmp_path,
+        _block("msg-0001", "msg-0001"),           # requests may name themselves
+        _block("msg-0002"),
+        _block("msg-0001-R", "msg-0001", "TRINITY", exit_code="ALLOW"),
+        _block("msg-0003", "msg-0001-R", goal="CORRECTION: fix the reply."),
+        _block("msg-0003-R", "msg-0003", "TRINITY", exit_code="ALLOW"),
+        _block("msg-0004", "msg-0404"),            # parent not in the archive
+    )
+    with ArchiveIndex(p) as ix:
+        want = ["msg-0001", "msg-0001-R", "msg-0003", "msg-0003-R"]
+        for m in want:
+            assert [e.msg_id for e in ix.thread(m)] == want
+        assert [e.msg_id for e in ix.thread("msg-0002")] == ["msg-0002"]
+        assert [e.msg_id for e in ix.thread("msg-0004")] == ["msg-0004"]
+        assert ix.thread("msg-9999") == []
@@ -0,0 +1,134 @@
+"""Tests for cross-envelope conversation rules."""
+
+import importlib.util
+import sys
+from pathlib import Path
+
+# ---------------------------------------------------------------------------
+# Robust local imports via importlib (avoids sibling gate.py collision)
+# ---------------------------------------------------------------------------
+_HERE = Path(__file__).resolve().parent
+
+
+def _load_local(module_name: str):
+    """Load a module from this directory by file path."""
+    path = _HERE / f"{module_name}.py"
+    spec = importlib.util.spec_from_file_location(module_name, str(path))
+    mod = importlib.util.module_from_spec(spec)
+    sys.modules[module_name] = mod
+    spec.loader.exec_module(mod)
+    return mod
+
+
+_cr = _load_local("conversation_rules")
+Envelope = _cr.Envelope
+check_conversation = _cr.check_conversation
+ConversationChecker = _cr.ConversationChecker
+sequence_key = _cr.sequence_key
+iter_envelopes = _cr._ep.iter_envelopes
+
+COMMS = _HERE.parent.parent / "ALVIANTECH_COMMS_CENTER_v0.1.md"
+
+
+def _env(msg_id, in_reply_to="", ts="2026-02-18T11:00:00Z", goal="Test goal."):
+    return Envelope(raw="", msg_id=msg_id, ts_utc=ts, goal=goal, in_reply_to=in_reply_to)
+
+
+def _codes(envelopes, policy="ACCUMULATE_ALL"):
+    return {r.msg_id: [v.code for v in r.violations] for r in check_conversation(envelopes, policy)}
+
+
+def test_repo_comms_center_is_clean():
+    text = COMMS.read_text(encoding="utf-8")
+    assert list(check_conversation(iter_envelopes(text))) == []
+
+
+def test_well_formed_conversation_passes():
+    envs = [
+        _env("msg-0001", "msg-0001", "2026-02-18T10:00:00Z"),
+        _env("msg-0001-R", "msg-0001", "2026-02-18T10:05:00Z"),
+        _env("msg-0002", "msg-0001-R", "2026-02-18T10:05:00Z", "CORRECTION: fix 0001-R."),
+        _env("msg-0002-R", "msg-0002", "2026-02-18T11:00:00Z"),
+    ]
+    assert _codes(envs) == {}
+
+
+def test_sequence_key():
+    assert sequence_key("msg-0007") == (7, 0)
+    assert sequence_key("msg-0007-R") == (7, 1)
+    assert sequence_key("msg-NNNN") is None
+    assert sequence_key("ziggy-clarify-001") is None
+
+
+def test_duplicate_msg_id():
+    assert _codes([_env("msg-0001"), _env("msg-0001")]) == {"msg-0001": ["CONV_DUPLICATE_MSG_ID"]}
+
+
+def test_msg_ids_must_not_go_backwards():
+    codes = _codes([_env("msg-0001"), _env("msg-0003"), _env("msg-0002"), _env("msg-0004")])
+    assert codes == {"msg-0002": ["CONV_MSG_ID_OUT_OF_ORDER"]}
+    # A response after the next request is out of order too.
+    envs = [_env("msg-0001"), _env("msg-0002"), _env("msg-0001-R", "msg-0001")]
+    assert _codes(envs) == {"msg-0001-R": ["CONV_MSG_ID_OUT_OF_ORDER"]}
+    # Non-sequential ids are exempt.
+    assert _codes([_env("msg-0005"), _env("ziggy-clarify-001"), _env("msg-0006")]) == {}
+
+
+def test_timestamps_must_not_go_backwards():
+    envs = [
+        _env("msg-0001", ts="2026-02-18T12:00:00Z"),
+        _env("msg-0002", ts="2026-02-18T11:59:59Z"),
+        _env("msg-0003", ts="YYYY-MM-DDTHH:MM:SSZ"),  # unparseable: not compared
+        _env("msg-0004", ts="2026-02-18T12:00:00Z"),  # equal is fine
+    ]
+    assert _codes(envs) == {"msg-0002": ["CONV_TS_BACKWARDS"]}
+
+
+def test_responses_must_reply_to_an_earlier_request():
+    envs = [
+        _env("msg-0001"),
+        _env("msg-0001-R"),                    # blank in_reply_to
+        _env("msg-0002-R", "msg-0002"),        # request not (yet) seen
+        _env("msg-0003-R", "msg-0001-R"),      # a response, not a request
+    ]
+    codes = _codes(envs)
+    assert codes["msg-0001-R"] == ["CONV_REPLY_UNKNOWN_REQUEST"]
+    assert codes["msg-0002-R"] == ["CONV_REPLY_UNKNOWN_REQUEST"]
+    assert codes["msg-0003-R"] == ["CONV_REPLY_UNKNOWN_REQUEST"]
+
+
+def test_corrections_must_target_an_earlier_message():
+    envs = [
+        _env("msg-0001"),
+        _env("msg-0002", "", goal="CORRECTION: something."),
+        _env("msg-0003", "msg-0003", goal="CORRECTION: myself."),
+        _env("msg-0004", "msg-0009", goal="CORRECTION: the future."),
+        _env("msg-0005", "msg-0001", goal="CORRECTION: msg-0001."),
+    ]
+    codes = _codes(envs)
+    assert set(codes) == {"msg-0002", "msg-0003", "msg-0004"}
+    assert all(c == ["CONV_CORRECTION_NO_TARGET"] for c in codes.values())
+
+
+def test_first_fail_and_accumulate_all():
+    envs = [_env("msg-0002", ts="2026-02-18T12:00:00Z"),
+            _env("msg-0001-R", "", ts="2026-02-18T10:00:00Z")]
+    assert _codes(envs) == {"msg-0001-R": [
+        "CONV_MSG_ID_OUT_OF_ORDER", "CONV_TS_BACKWARDS", "CONV_REPLY_UNKNOWN_REQUEST",
+    ]}
+    assert _codes(envs, "FIRST_FAIL") == {"msg-0001-R": ["CONV_MSG_ID_OUT_OF_ORDER"]}
+
+
+def test_sweep_is_streaming_and_linear():
+    n = 20_000
+
+    def gen():
+        for i in range(1, n + 1):
+            yield _env(f"msg-{i:07d}", f"msg-{i:07d}")
+            yield _env(f"msg-{i:07d}-R", f"msg-{i:07d}")
+
+    checker = ConversationChecker()
+    for env in gen():
+        assert checker.check(env) == []
+    assert checker.state.count == 2 * n
+    assert len(checker.state.seen) == 2 * n and len(checker.state.requests) == n
@@ -0,0 +1,133 @@
+"""Tests for gate profiling instrumentation."""
+
+import importlib.util
+import subprocess
+import sys
+from pathlib import Path
+
+# ---------------------------------------------------------------------------
+# Robust local imports via importlib (avoids sibling gate.py collision)
+# ---------------------------------------------------------------------------
+_HERE = Path(__file__).resolve().parent
+
+
+def _load_local(module_name: str):
+    """Load a module from this directory by file path."""
+    path = _HERE / f"{module_name}.py"
+    spec = importlib.util.spec_from_file_location(module_name, str(path))
+    mod = importlib.util.module_from_spec(spec)
+    sys.modules[module_name] = mod
+    spec.loader.exec_module(mod)
+    return mod
+
+
+_ga = _load_local("gate")
+evaluate = _ga.evaluate
+evaluate_all = _ga.evaluate_all
+ALL_RULES = _ga.ALL_RULES
+
+_gp = _load_local("gate_profiler")
+GateProfiler = _gp.GateProfiler
+format_report = _gp.format_report
+_Timings = _gp._Timings
+_bucket = _gp._bucket
+_bucket_upper = _gp._bucket_upper
+
+COMMS = _HERE.parent.parent / "ALVIANTECH_COMMS_CENTER_v0.1.md"
+
+
+def _envelopes():
+    return _ga._ep.extract_envelopes(COMMS.read_text(encoding="utf-8"))
+
+
+def test_buckets_cover_values_in_order():
+    prev = -1
+    for ns in list(range(200)) + [10 ** k + d for k in range(3, 10) for d in (-1, 0, 1)]:
+        b = _bucket(ns)
+        assert ns <= _bucket_upper(b)
+        assert b == 0 or _bucket_upper(b - 1) < ns
+        assert b >= prev
+        prev = b
+
+
+def test_percentiles_are_close():
+    t = _Timings()
+    for ns in range(1, 10001):
+        t.add(ns * 100)
+    assert t.count == 10000 and t.max_ns == 1_000_000
+    for q in (0.5, 0.95, 0.99):
+        exact = q * 1_000_000
+        assert exact <= t.percentile(q) <= exact * 1.25
+    assert t.percentile(1.0) == 1_000_000
+    assert _Timings().percentile(0.5) == 0
+
+
+def test_profiled_evaluation_matches_and_counts():
+    envs = _envelopes()
+    for policy in ("FIRST_FAIL", "ACCUMULATE_ALL"):
+        prof = GateProfiler()
+        plain = evaluate_all(envs, policy=policy)
+        assert evaluate_all(envs, policy=policy, profiler=prof) == plain
+        report = prof.report()
+        assert [r.name for r in report.rules] == [fn.__name__ for fn in ALL_RULES]
+        assert sum(r.calls for r in report.rules) == sum(g.rules_checked for g in plain)
+        assert sum(r.fired for r in report.rules) == sum(len(g.violations) for g in plain)
+        for r in report.rules:
+            t = r.timing
+            assert t.count == 0 or 0 < t.p50_ns <= t.p95_ns <= t.p99_ns <= t.max_ns
+
+
+def test_profiler_accumulates_across_calls_and_rule_lists():
+    env = _envelopes()[1]
+    prof = GateProfiler()
+    evaluate(env, policy="ACCUMULATE_ALL", profiler=prof)
+    evaluate(env, policy="ACCUMULATE_ALL", profiler=prof)
+    counts = {r.name: r.calls for r in prof.report().rules}
+    assert set(counts.values()) == {2}
+    # A different rule list gets its own wrappers but shares the per-rule stats.
+    wrapped = prof.wrap(ALL_RULES[:2])
+    wrapped[0](env)
+    assert prof.report().rules[0].calls == 3
+
+
+def test_parse_timing_and_phases():
+    text = COMMS.read_text(encoding="utf-8")
+    prof = GateProfiler()
+    with prof.phase("parse"):
+        envs = prof.extract(text)
+    with prof.phase("parse"):
+        pass
+    assert envs == _gp._ep.extract_envelopes(text)
+    report = prof.report()
+    assert report.parse.count == len(envs)
+    assert list(report.phases) == ["parse"] and report.phases["parse"] >= report.parse.total_ns
+    text_report = format_report(report)
+    assert "Rules (by cumulative time):" in text_report and "Parse: " in text_report
+
+
+def test_cli_profile_flag():
+    cli = str(_HERE / "cli.py")
+    plain = subprocess.run([sys.executable, cli, "check", str(COMMS)],
+                           capture_output=True, text=True, check=True).stdout
+    profiled = subprocess.run([sys.executable, cli, "check", str(COMMS), "--profile"],
+                              capture_output=True, text=True, check=True).stdout
+    assert profiled.startswith(plain)
+    assert "Rules (by cumulative time):" not in plain
+    for needle in ("Phases (ms):", "evaluate", "rule_has_header", "p99 us"):
+        assert needle in profiled
+
+
+def test_conversation_rules_are_profiled():
+    _cr = _load_local("conversation_rules")
+    envs = _cr._ep.extract_envelopes(COMMS.read_text(encoding="utf-8"))
+    prof = GateProfiler()
+    assert list(_cr.check_conversation(envs, profiler=prof)) == list(_cr.check_conversation(envs))
+    report = prof.report()
+    assert [r.name for r in report.rules] == [fn.__name__ for fn in _cr.CONVERSATION_RULES]
+    assert all(r.calls == len(envs) for r in report.rules)
+
+    cli = str(_HERE / "cli.py")
+    out = subprocess.run([sys.executable, cli, "audit", str(COMMS), "--profile"],
+                         capture_output=True, text=True, check=True).stdout
+    for needle in ("Phases (ms):", "audit", "rule_unique_msg_id"):
+        assert needle in out
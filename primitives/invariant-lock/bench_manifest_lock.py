@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+"""Benchmark ManifestLock seal/verify: serial vs thread pool.
+
+Usage:
+    python bench_manifest_lock.py [--small N] [--large N] [--large-mb MB]
+
+Builds a temporary tree of N small files plus a few large ones, then
+times seal() and verify() with workers=1 and with the default pool.
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from manifest_lock import ManifestLock  # noqa: E402
+
+
+def _build(root: Path, small: int, large: int, large_mb: int) -> None:
+    for i in range(small):
+        d = root / f"d{i // 500:03d}"
+        d.mkdir(exist_ok=True)
+        (d / f"f{i:05d}.txt").write_bytes(os.urandom(512))
+    block = os.urandom(1 << 20)
+    for i in range(large):
+        with open(root / f"large{i}.bin", "wb") as f:
+            for _ in range(large_mb):
+                f.write(block)
+
+
+def _time(label: str, fn) -> None:
+    t0 = time.perf_counter()
+    fn()
+    print(f"  {label:<28} {time.perf_counter() - t0:8.3f}s")
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--small", type=int, default=10_000)
+    ap.add_argument("--large", type=int, default=4)
+    ap.add_argument("--large-mb", type=int, default=256)
+    opts = ap.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp)
+        print(f"building {opts.small} small + {opts.large} x {opts.large_mb} MB files ...")
+        _build(root, opts.small, opts.large, opts.large_mb)
+        lock = ManifestLock.seal(root)
+        for workers in (1, None):
+            name = "serial" if workers == 1 else "pool"
+            _time(f"seal   ({name})", lambda: ManifestLock.seal(root, workers=workers))
+            _time(f"verify ({name})", lambda: lock.verify(workers=workers))
+
+
+if __name__ == "__main__":
+    main()
@@ -5,16 +5,37 @@ from __future__ import annotations
 import hashlib
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Union
+from typing import TYPE_CHECKING, Optional, Union
+
+if TYPE_CHECKING:
+    from verify_cache import VerifyCache
+
+# Read size for streaming file hashes. Memory use is bounded by this,
+# not by the file size.
+CHUNK_SIZE = 1 << 20
 
 
 def sha256_bytes(data: bytes) -> str:
     return hashlib.sha256(data).hexdigest()
 
 
-def sha256_file(path: Union[str, Path]) -> str:
-    p = Path(path)
-    return sha256_bytes(p.read_bytes())
+def sha256_file(path: Union[str, Path], chunk_size: int = CHUNK_SIZE) -> str:
+    """Stream *path* through SHA-256 using one reused buffer.
+
+    Same digest as hashing the whole file at once.
+    """
+    if chunk_size <= 0:
+        raise ValueError("chunk_size must be >= 1")
+    h = hashlib.sha256()
+    buf = bytearray(chunk_size)
+    view = memoryview(buf)
+    with open(path, "rb", buffering=0) as f:
+        while True:
+            n = f.readinto(buf)
+            if not n:
+                break
+            h.update(view[:n])
+    return h.hexdigest()
 
 
 @dataclass(frozen=True)
@@ -27,5 +48,7 @@ class InvariantLock:
         p = Path(path)
         return InvariantLock(str(p), sha256_file(p))
 
-    def verify(self) -> bool:
+    def verify(self, cache: Optional["VerifyCache"] = None) -> bool:
+        if cache is not None:
+            return cache.check(self.path, self.digest)
         return sha256_file(self.path) == self.digest
@@ -0,0 +1,121 @@
+# primitives/invariant-lock/manifest_lock.py
+
+from __future__ import annotations
+
+import hashlib
+import os
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple, TypeVar, Union
+
+from invariant_lock import sha256_file
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+
+def _list_files(root: Path) -> List[str]:
+    """Sorted POSIX-style relative paths of every regular file under *root*."""
+    out: List[str] = []
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames.sort()
+        for name in filenames:
+            full = Path(dirpath) / name
+            if full.is_file():
+                out.append(full.relative_to(root).as_posix())
+    out.sort()
+    return out
+
+
+def _map(fn: Callable[[T], R], items: List[T], workers: Optional[int]) -> List[R]:
+    """Order-preserving map on a thread pool (hashlib releases the GIL)."""
+    if workers == 1 or len(items) <= 1:
+        return [fn(x) for x in items]
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(fn, items))
+
+
+def _hash_or_none(path: Path) -> Optional[str]:
+    try:
+        return sha256_file(path)
+    except OSError:
+        return None
+
+
+def root_digest(entries: Tuple[Tuple[str, str], ...]) -> str:
+    """SHA-256 over the manifest text (sha256sum format, sorted by path)."""
+    return hashlib.sha256(_render(entries).encode("utf-8")).hexdigest()
+
+
+def _render(entries: Tuple[Tuple[str, str], ...]) -> str:
+    return "".join(f"{digest}  {rel}\n" for rel, digest in entries)
+
+
+@dataclass(frozen=True)
+class ManifestDrift:
+    changed: Tuple[str, ...]
+    missing: Tuple[str, ...]
+    added: Tuple[str, ...]
+
+    @property
+    def clean(self) -> bool:
+        return not (self.changed or self.missing or self.added)
+
+
+@dataclass(frozen=True)
+class ManifestLock:
+    root: str
+    entries: Tuple[Tuple[str, str], ...]  # sorted (relative path, digest)
+    digest: str
+
+    @staticmethod
+    def seal(
+        root: Union[str, Path], workers: Optional[int] = None
+    ) -> "ManifestLock":
+        r = Path(root)
+        if not r.is_dir():
+            raise NotADirectoryError(str(r))
+        rels = _list_files(r)
+        digests = _map(sha256_file, [r / rel for rel in rels], workers)
+        entries = tuple(zip(rels, digests))
+        return ManifestLock(str(r), entries, root_digest(entries))
+
+    def dumps(self) -> str:
+        """Manifest as sha256sum-compatible text."""
+        return _render(self.entries)
+
+    @staticmethod
+    def loads(root: Union[str, Path], text: str) -> "ManifestLock":
+        entries: List[Tuple[str, str]] = []
+        for line in text.splitlines():
+            if not line.strip():
+                continue
+            digest, sep, rel = line.partition("  ")
+            if not sep or len(digest) != 64:
+                raise ValueError(f"malformed manifest line: {line!r}")
+            entries.append((rel, digest))
+        entries.sort()
+        frozen = tuple(entries)
+        return ManifestLock(str(Path(root)), frozen, root_digest(frozen))
+
+    def diff(self, workers: Optional[int] = None) -> ManifestDrift:
+        """Rehash the tree and report exactly which files drifted."""
+        r = Path(self.root)
+        sealed: Dict[str, str] = dict(self.entries)
+        present = set(_list_files(r)) if r.is_dir() else set()
+        rels = [rel for rel in sealed if rel in present]
+        now = _map(_hash_or_none, [r / rel for rel in rels], workers)
+        changed = []
+        vanished = []
+        for rel, digest in zip(rels, now):
+            if digest is None:
+                vanished.append(rel)
+            elif digest != sealed[rel]:
+                changed.append(rel)
+        missing = sorted(vanished + [rel for rel in sealed if rel not in present])
+        added = sorted(present - sealed.keys())
+        return ManifestDrift(tuple(changed), tuple(missing), tuple(added))
+
+    def verify(self, workers: Optional[int] = None) -> bool:
+        return self.diff(workers).clean
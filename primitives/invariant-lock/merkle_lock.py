@@ -0,0 +1,156 @@
+# primitives/invariant-lock/merkle_lock.py
+
+from __future__ import annotations
+
+import hashlib
+import os
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import closing
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Iterator, List, Optional, Sequence, Tuple, Union
+
+DEFAULT_CHUNK_SIZE = 4 << 20
+
+# Domain separation so a leaf can never be confused with an inner node.
+_LEAF = b"\x00"
+_NODE = b"\x01"
+
+Range = Tuple[int, int]  # half-open byte range [start, end)
+
+
+def _chunk_count(size: int, chunk_size: int) -> int:
+    return max(1, -(-size // chunk_size))
+
+
+def _leaf_digest(fd: int, index: int, chunk_size: int) -> str:
+    data = os.pread(fd, chunk_size, index * chunk_size)
+    return hashlib.sha256(_LEAF + data).hexdigest()
+
+
+def merkle_root(leaves: Sequence[str]) -> str:
+    """Fold leaf digests pairwise into a root. An odd node is promoted as-is."""
+    if not leaves:
+        raise ValueError("at least one leaf is required")
+    level = [bytes.fromhex(h) for h in leaves]
+    while len(level) > 1:
+        nxt = [
+            hashlib.sha256(_NODE + level[i] + level[i + 1]).digest()
+            for i in range(0, len(level) - 1, 2)
+        ]
+        if len(level) % 2:
+            nxt.append(level[-1])
+        level = nxt
+    return level[0].hex()
+
+
+def _pool_size(workers: Optional[int]) -> int:
+    return workers or min(32, (os.cpu_count() or 1) + 4)
+
+
+def _hash_chunks(
+    fd: int, indices: Sequence[int], chunk_size: int, workers: Optional[int]
+) -> Iterator[Tuple[int, str]]:
+    """Yield (index, leaf digest) in order, hashing a bounded window in parallel.
+
+    Stopping iteration early leaves at most one window of extra work.
+    """
+    n = _pool_size(workers)
+    if n == 1 or len(indices) <= 1:
+        for i in indices:
+            yield i, _leaf_digest(fd, i, chunk_size)
+        return
+    window = 2 * n
+    with ThreadPoolExecutor(max_workers=n) as pool:
+        for lo in range(0, len(indices), window):
+            batch = indices[lo:lo + window]
+            futures = [pool.submit(_leaf_digest, fd, i, chunk_size) for i in batch]
+            for i, fut in zip(batch, futures):
+                yield i, fut.result()
+
+
+def _merge(ranges: List[Range]) -> List[Range]:
+    out: List[Range] = []
+    for start, end in sorted(ranges):
+        if out and start <= out[-1][1]:
+            out[-1] = (out[-1][0], max(out[-1][1], end))
+        else:
+            out.append((start, end))
+    return out
+
+
+@dataclass(frozen=True)
+class MerkleLock:
+    path: str
+    size: int
+    chunk_size: int
+    leaves: Tuple[str, ...]
+    digest: str  # Merkle root
+
+    @staticmethod
+    def seal(
+        path: Union[str, Path],
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+        workers: Optional[int] = None,
+    ) -> "MerkleLock":
+        if chunk_size <= 0:
+            raise ValueError("chunk_size must be >= 1")
+        p = Path(path)
+        fd = os.open(p, os.O_RDONLY)
+        try:
+            size = os.fstat(fd).st_size
+            indices = range(_chunk_count(size, chunk_size))
+            leaves = tuple(h for _, h in _hash_chunks(fd, indices, chunk_size, workers))
+        finally:
+            os.close(fd)
+        return MerkleLock(str(p), size, chunk_size, leaves, merkle_root(leaves))
+
+    def diff(
+        self,
+        start: int = 0,
+        end: Optional[int] = None,
+        first_only: bool = False,
+        workers: Optional[int] = None,
+    ) -> List[Range]:
+        """Byte ranges within [start, end) that no longer match the seal.
+
+        With first_only=True, hashing stops at the first mismatching chunk.
+        """
+        if merkle_root(self.leaves) != self.digest:
+            raise ValueError("leaves do not match the sealed Merkle root")
+        if start < 0 or (end is not None and end < start):
+            raise ValueError("invalid byte range")
+        fd = os.open(self.path, os.O_RDONLY)
+        try:
+            size = os.fstat(fd).st_size
+            hi = max(self.size, size) if end is None else end
+            drift: List[Range] = []
+            tail = (max(start, self.size), min(hi, size))
+            if tail[0] < tail[1]:
+                # Appended bytes are drift regardless of chunk contents.
+                drift.append(tail)
+                if first_only:
+                    return drift
+            first = start // self.chunk_size
+            last = min(len(self.leaves), -(-hi // self.chunk_size))
+            chunks = _hash_chunks(fd, range(first, last), self.chunk_size, workers)
+            # closing() drains the pool before the fd is closed below.
+            with closing(chunks):
+                for i, h in chunks:
+                    if h != self.leaves[i]:
+                        lo = i * self.chunk_size
+                        drift.append((lo, min(lo + self.chunk_size, max(self.size, size))))
+                        if first_only:
+                            break
+        finally:
+            os.close(fd)
+        return _merge(drift)
+
+    def verify(self, workers: Optional[int] = None) -> bool:
+        return not self.diff(first_only=True, workers=workers)
+
+    def verify_range(
+        self, start: int, end: int, workers: Optional[int] = None
+    ) -> bool:
+        """Re-verify only the chunks overlapping bytes [start, end)."""
+        return not self.diff(start, end, first_only=True, workers=workers)
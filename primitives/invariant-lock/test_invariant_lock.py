@@ -1,7 +1,7 @@
 # primitives/invariant-lock/test_invariant_lock.py
 
 from pathlib import Path
-from invariant_lock import InvariantLock, sha256_bytes
+from invariant_lock import InvariantLock, sha256_bytes, sha256_file
 
 
 def test_sha256_bytes_is_deterministic():
@@ -25,3 +25,13 @@ def test_verify_is_replay_stable(tmp_path: Path):
     lock = InvariantLock.seal(f)
     assert lock.verify() is True
     assert lock.verify() is True
+
+
+def test_streamed_digest_matches_whole_file_digest(tmp_path: Path):
+    f = tmp_path / "big.bin"
+    data = bytes(range(256)) * 1000 + b"tail"
+    f.write_bytes(data)
+    expected = sha256_bytes(data)
+    assert sha256_file(f) == expected
+    assert sha256_file(f, chunk_size=7) == expected
+    assert sha256_file(f, chunk_size=len(data) * 2) == expected
@@ -0,0 +1,48 @@
+# primitives/invariant-lock/test_manifest_lock.py
+
+from pathlib import Path
+
+import pytest
+
+from invariant_lock import sha256_bytes
+from manifest_lock import ManifestLock
+
+
+def _tree(root: Path) -> Path:
+    (root / "a").mkdir()
+    (root / "a" / "one.txt").write_text("one", encoding="utf-8")
+    (root / "a" / "two.txt").write_text("two", encoding="utf-8")
+    (root / "top.bin").write_bytes(b"\x00" * 4096)
+    return root
+
+
+def test_seal_is_deterministic_and_parallel_matches_serial(tmp_path: Path):
+    _tree(tmp_path)
+    serial = ManifestLock.seal(tmp_path, workers=1)
+    pooled = ManifestLock.seal(tmp_path, workers=4)
+    assert serial == pooled
+    assert [rel for rel, _ in serial.entries] == ["a/one.txt", "a/two.txt", "top.bin"]
+    assert dict(serial.entries)["a/one.txt"] == sha256_bytes(b"one")
+    assert serial.verify() is True
+
+
+def test_diff_reports_changed_missing_and_added(tmp_path: Path):
+    _tree(tmp_path)
+    lock = ManifestLock.seal(tmp_path)
+    (tmp_path / "a" / "one.txt").write_text("ONE", encoding="utf-8")
+    (tmp_path / "a" / "two.txt").unlink()
+    (tmp_path / "new.txt").write_text("new", encoding="utf-8")
+    drift = lock.diff()
+    assert drift.changed == ("a/one.txt",)
+    assert drift.missing == ("a/two.txt",)
+    assert drift.added == ("new.txt",)
+    assert lock.verify() is False
+
+
+def test_dumps_loads_round_trip_preserves_root_digest(tmp_path: Path):
+    _tree(tmp_path)
+    lock = ManifestLock.seal(tmp_path)
+    again = ManifestLock.loads(tmp_path, lock.dumps())
+    assert again == lock
+    with pytest.raises(ValueError):
+        ManifestLock.loads(tmp_path, "not a manifest line\n")
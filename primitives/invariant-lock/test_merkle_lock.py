@@ -0,0 +1,66 @@
+# primitives/invariant-lock/test_merkle_lock.py
+
+from pathlib import Path
+
+import pytest
+
+from merkle_lock import MerkleLock, merkle_root
+
+
+def _file(tmp_path: Path, size: int = 10_000) -> Path:
+    f = tmp_path / "blob.bin"
+    f.write_bytes(bytes(i % 251 for i in range(size)))
+    return f
+
+
+def _poke(f: Path, offset: int) -> None:
+    data = bytearray(f.read_bytes())
+    data[offset] ^= 0xFF
+    f.write_bytes(bytes(data))
+
+
+def test_seal_is_deterministic_and_parallel_matches_serial(tmp_path: Path):
+    f = _file(tmp_path)
+    a = MerkleLock.seal(f, chunk_size=1000, workers=1)
+    b = MerkleLock.seal(f, chunk_size=1000, workers=4)
+    assert a == b
+    assert len(a.leaves) == 10
+    assert a.digest == merkle_root(a.leaves)
+    assert a.verify() is True
+
+
+def test_diff_locates_drifted_byte_ranges(tmp_path: Path):
+    f = _file(tmp_path)
+    lock = MerkleLock.seal(f, chunk_size=1000)
+    _poke(f, 2500)
+    _poke(f, 7001)
+    assert lock.diff() == [(2000, 3000), (7000, 8000)]
+    assert lock.diff(first_only=True) == [(2000, 3000)]
+    assert lock.verify() is False
+
+
+def test_verify_range_only_checks_overlapping_chunks(tmp_path: Path):
+    f = _file(tmp_path)
+    lock = MerkleLock.seal(f, chunk_size=1000)
+    _poke(f, 9999)
+    assert lock.verify_range(0, 9000) is True
+    assert lock.verify_range(8500, 10_000) is False
+
+
+def test_size_changes_are_drift(tmp_path: Path):
+    f = _file(tmp_path, 2500)
+    lock = MerkleLock.seal(f, chunk_size=1000)
+    with open(f, "ab") as fh:
+        fh.write(b"extra")
+    assert lock.diff() == [(2000, 2505)]
+    f.write_bytes(f.read_bytes()[:1500])
+    assert lock.diff() == [(1000, 2500)]
+
+
+def test_tampered_leaves_are_rejected(tmp_path: Path):
+    f = _file(tmp_path)
+    lock = MerkleLock.seal(f, chunk_size=1000)
+    forged = MerkleLock(lock.path, lock.size, lock.chunk_size,
+                        ("0" * 64,) + lock.leaves[1:], lock.digest)
+    with pytest.raises(ValueError):
+        forged.verify()
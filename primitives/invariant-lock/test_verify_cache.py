@@ -0,0 +1,97 @@
+# primitives/invariant-lock/test_verify_cache.py
+
+import os
+import time
+from pathlib import Path
+
+import verify_cache
+from invariant_lock import InvariantLock
+from verify_cache import VerifyCache
+
+
+def _old_file(path: Path, text: str) -> Path:
+    """Write *text* and backdate mtime out of the racy window."""
+    path.write_text(text, encoding="utf-8")
+    past = time.time() - 60
+    os.utime(path, (past, past))
+    return path
+
+
+def _count_hashes(monkeypatch):
+    calls = []
+    real = verify_cache.sha256_file
+    monkeypatch.setattr(verify_cache, "sha256_file", lambda p: calls.append(p) or real(p))
+    return calls
+
+
+def test_unchanged_file_is_hashed_once(tmp_path: Path, monkeypatch):
+    f = _old_file(tmp_path / "a.bin", "alpha")
+    lock = InvariantLock.seal(f)
+    calls = _count_hashes(monkeypatch)
+    cache = VerifyCache()
+    assert lock.verify(cache) is True
+    assert lock.verify(cache) is True
+    assert len(calls) == 1
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_modified_file_is_rehashed_and_fails(tmp_path: Path):
+    f = _old_file(tmp_path / "a.bin", "alpha")
+    lock = InvariantLock.seal(f)
+    cache = VerifyCache()
+    assert lock.verify(cache) is True
+    f.write_text("gamma", encoding="utf-8")  # same size, new mtime/ctime
+    assert lock.verify(cache) is False
+
+
+def test_paranoid_and_recheck_after_force_hashing(tmp_path: Path, monkeypatch):
+    f = _old_file(tmp_path / "a.bin", "alpha")
+    lock = InvariantLock.seal(f)
+    calls = _count_hashes(monkeypatch)
+
+    paranoid = VerifyCache(paranoid=True)
+    lock.verify(paranoid)
+    lock.verify(paranoid)
+    assert len(calls) == 2
+
+    now = [1000.0]
+    periodic = VerifyCache(recheck_after=30, clock=lambda: now[0])
+    lock.verify(periodic)
+    lock.verify(periodic)
+    assert len(calls) == 3
+    now[0] += 31
+    lock.verify(periodic)
+    assert len(calls) == 4
+
+
+def test_recently_modified_file_is_not_cached(tmp_path: Path, monkeypatch):
+    f = tmp_path / "fresh.bin"
+    f.write_text("alpha", encoding="utf-8")
+    lock = InvariantLock.seal(f)
+    calls = _count_hashes(monkeypatch)
+    cache = VerifyCache()
+    lock.verify(cache)
+    lock.verify(cache)
+    assert len(calls) == 2
+
+
+def test_cache_persists_across_instances(tmp_path: Path, monkeypatch):
+    f = _old_file(tmp_path / "a.bin", "alpha")
+    lock = InvariantLock.seal(f)
+    store = tmp_path / "cache.json"
+    first = VerifyCache(cache_file=str(store))
+    assert lock.verify(first) is True
+    first.save()
+
+    calls = _count_hashes(monkeypatch)
+    second = VerifyCache(cache_file=str(store))
+    assert lock.verify(second) is True
+    assert calls == []
+    assert second.hits == 1
+
+
+def test_corrupt_cache_file_is_a_cold_start(tmp_path: Path):
+    store = tmp_path / "cache.json"
+    store.write_text("{not json", encoding="utf-8")
+    f = _old_file(tmp_path / "a.bin", "alpha")
+    assert InvariantLock.seal(f).verify(VerifyCache(cache_file=str(store))) is True
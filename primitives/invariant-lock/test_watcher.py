@@ -0,0 +1,115 @@
+# primitives/invariant-lock/test_watcher.py
+
+import os
+import time
+from pathlib import Path
+
+import pytest
+
+from invariant_lock import InvariantLock, sha256_file
+from manifest_lock import ManifestLock
+from watcher import LockWatcher, inotify_available
+
+MODES = [False] + ([True] if inotify_available() else [])
+
+
+def _touch(path: Path, text: str) -> None:
+    path.write_text(text, encoding="utf-8")
+    # Make sure the stat-polling fallback sees a new mtime even on coarse clocks.
+    st = path.stat()
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000_000))
+
+
+def _locks(tmp_path: Path, n: int = 3):
+    files = []
+    for i in range(n):
+        f = tmp_path / f"f{i}.txt"
+        f.write_text(f"v{i}", encoding="utf-8")
+        files.append(f)
+    return files, [InvariantLock.seal(f) for f in files]
+
+
+@pytest.mark.parametrize("use_inotify", MODES)
+def test_only_changed_files_are_rehashed(tmp_path: Path, use_inotify):
+    files, locks = _locks(tmp_path)
+    seen = []
+    w = LockWatcher(locks, seen.append, use_inotify=use_inotify)
+    try:
+        assert w.poll_once(0.05) == []
+        assert w.rehashed == 0
+        _touch(files[1], "tampered")
+        found = w.poll_once(1.0)
+        assert [v.path for v in found] == [str(files[1])]
+        assert seen == found
+        assert w.rehashed == 1
+    finally:
+        w.close()
+
+
+@pytest.mark.parametrize("use_inotify", MODES)
+def test_rename_over_and_delete_are_reported(tmp_path: Path, use_inotify):
+    files, locks = _locks(tmp_path, 2)
+    w = LockWatcher(locks, lambda v: None, use_inotify=use_inotify)
+    try:
+        staged = tmp_path / "staged.tmp"
+        staged.write_text("swapped", encoding="utf-8")
+        os.replace(staged, files[0])
+        files[1].unlink()
+        found = {v.path: v.actual for v in w.poll_once(1.0)}
+        assert set(found) == {str(files[0]), str(files[1])}
+        assert found[str(files[1])] is None
+    finally:
+        w.close()
+
+
+@pytest.mark.skipif(not inotify_available(), reason="needs inotify")
+def test_file_is_rehashed_when_its_writer_closes_it(tmp_path: Path):
+    files, locks = _locks(tmp_path, 1)
+    w = LockWatcher(locks, lambda v: None, use_inotify=True)
+    try:
+        with open(files[0], "w", encoding="utf-8") as f:
+            f.write("half")
+            f.flush()
+            assert w.poll_once(0.1) == []
+            assert w.rehashed == 0
+            f.write(" written")
+        found = w.poll_once(1.0)
+        assert [(v.path, v.actual) for v in found] == [
+            (str(files[0]), sha256_file(str(files[0])))
+        ]
+        assert w.rehashed == 1
+    finally:
+        w.close()
+
+
+def test_rewrite_with_same_content_is_not_a_violation(tmp_path: Path):
+    files, locks = _locks(tmp_path, 1)
+    w = LockWatcher(locks, lambda v: None, use_inotify=False)
+    _touch(files[0], "v0")
+    assert w.poll_once() == []
+    assert w.rehashed == 1
+
+
+def test_background_thread_publishes_from_manifest(tmp_path: Path):
+    files, _ = _locks(tmp_path)
+    manifest = ManifestLock.seal(tmp_path)
+    seen = []
+    with LockWatcher.from_manifest(manifest, seen.append, poll_interval=0.02):
+        _touch(files[2], "changed")
+        deadline = time.monotonic() + 5
+        while not seen and time.monotonic() < deadline:
+            time.sleep(0.01)
+    assert [v.path for v in seen] == [str(files[2])]
+
+
+def test_same_drift_is_reported_once(tmp_path: Path):
+    files, locks = _locks(tmp_path, 1)
+    w = LockWatcher(locks, lambda v: None, use_inotify=False)
+    _touch(files[0], "bad")
+    assert len(w.poll_once()) == 1
+    _touch(files[0], "bad")
+    assert w.poll_once() == []
+    _touch(files[0], "v0")
+    assert w.poll_once() == []
+    _touch(files[0], "bad")
+    assert len(w.poll_once()) == 1
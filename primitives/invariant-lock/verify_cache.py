@@ -0,0 +1,126 @@
+# primitives/invariant-lock/verify_cache.py
+
+from __future__ import annotations
+
+import json
+import os
+import threading
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable, Dict, Optional, Tuple, Union
+
+from invariant_lock import sha256_file
+
+# Files modified less than this long before hashing are not cached: with
+# coarse filesystem timestamps a second write in the same tick would keep
+# the same mtime ("racily clean", as git calls it).
+RACY_WINDOW_NS = 2_000_000_000
+
+_FORMAT_VERSION = 1
+
+StatKey = Tuple[int, int, int, int]  # (inode, size, mtime_ns, ctime_ns)
+
+
+def _stat_key(st: os.stat_result) -> StatKey:
+    return (st.st_ino, st.st_size, st.st_mtime_ns, st.st_ctime_ns)
+
+
+@dataclass(frozen=True)
+class _Entry:
+    stat: StatKey
+    digest: str
+    verified_at: float
+
+
+@dataclass
+class VerifyCache:
+    """Skip rehashing files whose (path, inode, size, mtime, ctime) is unchanged.
+
+    paranoid:       always hash; the cache is still refreshed.
+    recheck_after:  seconds after which a cached result is re-hashed anyway.
+    cache_file:     JSON file loaded on construction and written by save().
+    """
+
+    cache_file: Optional[str] = None
+    paranoid: bool = False
+    recheck_after: Optional[float] = None
+    clock: Callable[[], float] = time.time
+    hits: int = 0
+    misses: int = 0
+    _entries: Dict[str, _Entry] = field(default_factory=dict)
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    def __post_init__(self) -> None:
+        if self.cache_file is not None:
+            self._load(Path(self.cache_file))
+
+    def digest(self, path: Union[str, Path]) -> str:
+        """Current SHA-256 of *path*, from cache when the stat key matches."""
+        p = os.path.abspath(path)
+        key = _stat_key(os.stat(p))
+        now = self.clock()
+        with self._lock:
+            entry = self._entries.get(p)
+            if (
+                not self.paranoid
+                and entry is not None
+                and entry.stat == key
+                and (self.recheck_after is None
+                     or now - entry.verified_at < self.recheck_after)
+            ):
+                self.hits += 1
+                return entry.digest
+            self.misses += 1
+
+        started_ns = time.time_ns()
+        actual = sha256_file(p)
+        after = _stat_key(os.stat(p))
+        with self._lock:
+            if after == key and started_ns - key[2] >= RACY_WINDOW_NS:
+                self._entries[p] = _Entry(key, actual, now)
+            else:
+                self._entries.pop(p, None)
+        return actual
+
+    def check(self, path: Union[str, Path], digest: str) -> bool:
+        return self.digest(path) == digest
+
+    def forget(self, path: Union[str, Path]) -> None:
+        with self._lock:
+            self._entries.pop(os.path.abspath(path), None)
+
+    def save(self) -> None:
+        """Atomically persist entries to cache_file."""
+        if self.cache_file is None:
+            raise ValueError("cache_file is not set")
+        with self._lock:
+            data = {
+                "version": _FORMAT_VERSION,
+                "entries": {
+                    p: [*e.stat, e.digest, e.verified_at]
+                    for p, e in sorted(self._entries.items())
+                },
+            }
+        target = Path(self.cache_file)
+        tmp = target.with_name(target.name + ".tmp")
+        tmp.write_text(json.dumps(data), encoding="utf-8")
+        os.replace(tmp, target)
+
+    def _load(self, path: Path) -> None:
+        # The cache is advisory: an unreadable file just means a cold start.
+        try:
+            data = json.loads(path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return
+        if not isinstance(data, dict) or data.get("version") != _FORMAT_VERSION:
+            return
+        for p, row in data.get("entries", {}).items():
+            try:
+                ino, size, mtime_ns, ctime_ns, digest, verified_at = row
+                self._entries[p] = _Entry(
+                    (int(ino), int(size), int(mtime_ns), int(ctime_ns)),
+                    str(digest), float(verified_at),
+                )
+            except (TypeError, ValueError):
+                continue
@@ -0,0 +1,244 @@
+# primitives/invariant-lock/watcher.py
+
+from __future__ import annotations
+
+import ctypes
+import errno
+import os
+import select
+import struct
+import sys
+import threading
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+from invariant_lock import InvariantLock, sha256_file
+from manifest_lock import ManifestLock
+
+# inotify(7) constants
+_IN_ATTRIB = 0x00000004
+_IN_CLOSE_WRITE = 0x00000008
+_IN_MOVED_FROM = 0x00000040
+_IN_MOVED_TO = 0x00000080
+_IN_DELETE = 0x00000200
+_IN_Q_OVERFLOW = 0x00004000
+_IN_NONBLOCK = os.O_NONBLOCK
+_IN_CLOEXEC = os.O_CLOEXEC
+# No IN_MODIFY/IN_CREATE: a file is rehashed once its writer closes it (or
+# a replacement is renamed in), never half-written.
+_WATCH_MASK = (
+    _IN_ATTRIB | _IN_CLOSE_WRITE | _IN_MOVED_FROM | _IN_MOVED_TO | _IN_DELETE
+)
+_EVENT = struct.Struct("iIII")  # wd, mask, cookie, len
+
+
+@dataclass(frozen=True)
+class Violation:
+    path: str
+    expected: str
+    actual: Optional[str]  # None if the file is missing or unreadable
+
+
+def _libc() -> Optional[ctypes.CDLL]:
+    if not sys.platform.startswith("linux"):
+        return None
+    try:
+        libc = ctypes.CDLL(None, use_errno=True)
+        libc.inotify_init1  # noqa: B018 -- probe symbol
+        libc.inotify_add_watch
+    except (OSError, AttributeError):
+        return None
+    return libc
+
+
+def inotify_available() -> bool:
+    return _libc() is not None
+
+
+class _Inotify:
+    """Minimal ctypes binding: one fd, watches on parent directories."""
+
+    def __init__(self, libc: ctypes.CDLL) -> None:
+        self._libc = libc
+        fd = libc.inotify_init1(_IN_NONBLOCK | _IN_CLOEXEC)
+        if fd < 0:
+            e = ctypes.get_errno()
+            raise OSError(e, os.strerror(e))
+        self.fd = fd
+        self._dirs: Dict[int, str] = {}
+
+    def add_dir(self, directory: str) -> None:
+        wd = self._libc.inotify_add_watch(
+            self.fd, os.fsencode(directory), _WATCH_MASK
+        )
+        if wd < 0:
+            e = ctypes.get_errno()
+            raise OSError(e, os.strerror(e), directory)
+        self._dirs[wd] = directory
+
+    def read(self, timeout: float) -> Tuple[Set[str], bool]:
+        """Paths touched within *timeout* seconds, and whether the queue overflowed."""
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        touched: Set[str] = set()
+        overflow = False
+        if not ready:
+            return touched, overflow
+        while True:
+            try:
+                buf = os.read(self.fd, 64 * 1024)
+            except BlockingIOError:
+                break
+            except OSError as e:  # pragma: no cover - EINTR etc.
+                if e.errno == errno.EINTR:
+                    continue
+                raise
+            off = 0
+            while off < len(buf):
+                wd, mask, _cookie, length = _EVENT.unpack_from(buf, off)
+                off += _EVENT.size
+                name = buf[off:off + length].rstrip(b"\0")
+                off += length
+                if mask & _IN_Q_OVERFLOW:
+                    overflow = True
+                elif wd in self._dirs and name:
+                    touched.add(os.path.join(self._dirs[wd], os.fsdecode(name)))
+        return touched, overflow
+
+    def close(self) -> None:
+        os.close(self.fd)
+
+
+class LockWatcher:
+    """Rehash sealed files only when they change; report drift to a callback.
+
+    Uses Linux inotify on the parent directories of the sealed files (so
+    atomic rename-over replacements are seen) and falls back to stat()
+    polling elsewhere. To halt a StopMachine on drift, pass
+    ``on_violation=lambda v: machine.send(Event.STOP)``.
+    """
+
+    def __init__(
+        self,
+        locks: Iterable[InvariantLock],
+        on_violation: Callable[[Violation], None],
+        poll_interval: float = 1.0,
+        use_inotify: Optional[bool] = None,
+    ) -> None:
+        self._locks: Dict[str, InvariantLock] = {
+            os.path.abspath(lk.path): lk for lk in locks
+        }
+        self._on_violation = on_violation
+        self.poll_interval = poll_interval
+        self.rehashed = 0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._inotify: Optional[_Inotify] = None
+        self._stats: Dict[str, Optional[Tuple[int, int, int, int]]] = {}
+        # Last observed digest per path, so one drift is reported once.
+        self._seen: Dict[str, Optional[str]] = {
+            p: lk.digest for p, lk in self._locks.items()
+        }
+
+        libc = _libc() if use_inotify in (None, True) else None
+        if use_inotify and libc is None:
+            raise OSError("inotify is not available on this platform")
+        if libc is not None:
+            self._inotify = _Inotify(libc)
+            for d in sorted({os.path.dirname(p) for p in self._locks}):
+                self._inotify.add_dir(d)
+        else:
+            self._stats = {p: self._stat(p) for p in self._locks}
+
+    @classmethod
+    def from_manifest(
+        cls,
+        manifest: ManifestLock,
+        on_violation: Callable[[Violation], None],
+        **kwargs,
+    ) -> "LockWatcher":
+        root = Path(manifest.root)
+        locks = [InvariantLock(str(root / rel), d) for rel, d in manifest.entries]
+        return cls(locks, on_violation, **kwargs)
+
+    @property
+    def mode(self) -> str:
+        return "inotify" if self._inotify is not None else "poll"
+
+    @staticmethod
+    def _stat(path: str) -> Optional[Tuple[int, int, int, int]]:
+        try:
+            st = os.stat(path)
+        except OSError:
+            return None
+        return (st.st_ino, st.st_size, st.st_mtime_ns, st.st_ctime_ns)
+
+    def _dirty(self, timeout: float) -> Set[str]:
+        if self._inotify is not None:
+            touched, overflow = self._inotify.read(timeout)
+            if overflow:
+                return set(self._locks)
+            return touched & self._locks.keys()
+        dirty = set()
+        for p in self._locks:
+            now = self._stat(p)
+            if now != self._stats[p]:
+                self._stats[p] = now
+                dirty.add(p)
+        return dirty
+
+    def poll_once(self, timeout: float = 0.0) -> List[Violation]:
+        """Process pending changes once and return new violations.
+
+        A file that stays in the same drifted state is reported once.
+        """
+        found: List[Violation] = []
+        for p in sorted(self._dirty(timeout)):
+            lock = self._locks[p]
+            self.rehashed += 1
+            try:
+                actual: Optional[str] = sha256_file(p)
+            except OSError:
+                actual = None
+            previous, self._seen[p] = self._seen[p], actual
+            if actual != lock.digest and actual != previous:
+                v = Violation(lock.path, lock.digest, actual)
+                found.append(v)
+                self._on_violation(v)
+        return found
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            if self._inotify is not None:
+                self.poll_once(self.poll_interval)
+            else:
+                self.poll_once()
+                self._stop.wait(self.poll_interval)
+
+    def start(self) -> "LockWatcher":
+        if self._thread is not None:
+            raise RuntimeError("watcher already started")
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def close(self) -> None:
+        """Stop and release the inotify descriptor."""
+        self.stop()
+        if self._inotify is not None:
+            self._inotify.close()
+            self._inotify = None
+            self._stats = {p: self._stat(p) for p in self._locks}
+
+    def __enter__(self) -> "LockWatcher":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.close()
@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""Benchmark no_optimisation_wrapper modes against argument size.
+
+Usage:
+    python bench_wrapper.py [--max-mb MB]
+
+Times one wrapped call of a read-only function for bytes and list
+arguments from 1 KB up to --max-mb (default 64; use 1024 for 1 GB),
+comparing mode="deep" (the original path) with mode="fingerprint"
+under each hash algorithm.
+"""
+
+from __future__ import annotations
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from wrapper import HASHES, no_optimisation_wrapper  # noqa: E402
+
+
+def _reader(x):
+    return len(x)
+
+
+def _payloads(nbytes: int):
+    yield "bytes", bytes(nbytes)
+    yield "bytearray", bytearray(nbytes)
+    # ~8 bytes of pickle per small int; cap lists to keep memory sane.
+    if nbytes <= 256 << 20:
+        yield "list[int]", list(range(nbytes // 8))
+        yield "dict[list]", {f"k{i}": list(range(128)) for i in range(max(1, nbytes // 1024))}
+
+
+def _time(fn, arg) -> float:
+    t0 = time.perf_counter()
+    fn(arg)
+    return time.perf_counter() - t0
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--max-mb", type=int, default=64)
+    opts = ap.parse_args()
+
+    sizes = [1 << 10, 1 << 20, 16 << 20, 64 << 20, 256 << 20, 1 << 30]
+    sizes = [s for s in sizes if s <= opts.max_mb << 20]
+    variants = [("deep/sha256", dict(mode="deep"))] + [
+        (f"fingerprint/{a}", dict(mode="fingerprint", algorithm=a)) for a in HASHES
+    ]
+
+    print(f"{'size':>8} {'arg':<11} {'bare':>9} " + " ".join(f"{n:>19}" for n, _ in variants))
+    for size in sizes:
+        for kind, arg in _payloads(size):
+            bare = _time(_reader, arg)
+            cols = [_time(no_optimisation_wrapper(_reader, **kw), arg) for _, kw in variants]
+            label = f"{size >> 20}M" if size >= 1 << 20 else f"{size >> 10}K"
+            print(f"{label:>8} {kind:<11} {bare:9.4f} " + " ".join(f"{c:19.4f}" for c in cols))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,7 @@
 import pytest
-from wrapper import MutationDetected, no_optimisation_wrapper
+from wrapper import (
+    EveryNth, MutationDetected, RandomFraction, TimeBudget, no_optimisation_wrapper,
+)
 
 
 def test_determinism_passes_for_pure_function():
@@ -43,3 +45,432 @@ def test_clean_passthrough_does_not_raise_and_does_not_mutate():
     out = w(xs)
     assert out == (1, 2, 3)
     assert xs == [1, 2, 3]
+
+
+@pytest.mark.parametrize("algorithm", ["sha256", "blake2b", "crc32"])
+def test_fingerprint_mode_detects_mutation_without_copies(algorithm, monkeypatch):
+    import copy
+
+    def no_deepcopy(*a, **k):
+        raise AssertionError("fingerprint mode must not deep-copy")
+
+    monkeypatch.setattr(copy, "deepcopy", no_deepcopy)
+
+    @no_optimisation_wrapper(mode="fingerprint", algorithm=algorithm)
+    def mutator(buf, *, cfg):
+        cfg["lr"] = 0.1
+        return len(buf)
+
+    @no_optimisation_wrapper(mode="fingerprint", algorithm=algorithm)
+    def reader(buf, *, cfg):
+        return len(buf) + len(cfg)
+
+    assert reader(bytearray(1024), cfg={"lr": 1.0}) == 1025
+    with pytest.raises(MutationDetected):
+        mutator(bytearray(1024), cfg={"lr": 1.0})
+
+
+def test_unknown_mode_or_algorithm_is_rejected():
+    with pytest.raises(ValueError):
+        no_optimisation_wrapper(lambda: 1, mode="lazy")
+    with pytest.raises(ValueError):
+        no_optimisation_wrapper(lambda: 1, algorithm="md5")
+
+
+def _appender(xs):
+    xs.append(0)
+
+
+def _run(w, calls):
+    raised = []
+    for i in range(calls):
+        try:
+            w([])
+        except MutationDetected:
+            raised.append(i)
+    return raised
+
+
+def test_every_nth_policy_checks_first_and_every_nth_call():
+    w = no_optimisation_wrapper(_appender, policy=EveryNth(3))
+    assert _run(w, 7) == [0, 3, 6]
+    assert (w.stats.calls, w.stats.checked, w.stats.mutations) == (7, 3, 3)
+
+
+def test_random_fraction_is_replayable_and_policies_are_per_function():
+    policy = RandomFraction(0.5, seed=42)
+    a = no_optimisation_wrapper(_appender, policy=policy)
+    b = no_optimisation_wrapper(_appender, policy=policy)
+    assert _run(a, 50) == _run(b, 50)
+    assert 0 < a.stats.checked < 50
+    assert a.stats.mutations == a.stats.checked
+
+
+def test_time_budget_stops_checking_until_next_window():
+    now = [0.0]
+    w = no_optimisation_wrapper(
+        _appender, policy=TimeBudget(0.0, clock=lambda: now[0]),
+    )
+    assert _run(w, 3) == []
+    assert w.stats.checked == 0
+
+    w = no_optimisation_wrapper(
+        _appender, policy=TimeBudget(1e-12, clock=lambda: now[0]),
+    )
+    assert _run(w, 3) == [0]
+    now[0] += 1.0
+    assert _run(w, 1) == [0]
+    assert (w.stats.calls, w.stats.checked) == (4, 2)
+
+
+@pytest.mark.parametrize("make", [
+    lambda: bytearray(b"abc"),
+    lambda: __import__("array").array("d", [1.0, 2.0]),
+    lambda: memoryview(bytearray(b"xyz")),
+])
+def test_buffer_mutation_is_detected(make):
+    @no_optimisation_wrapper(mode="fingerprint")
+    def poke(buf):
+        buf[0] = buf[0] + 1
+
+    with pytest.raises(MutationDetected):
+        poke(make())
+
+
+def test_nested_buffer_mutation_is_detected():
+    @no_optimisation_wrapper(mode="fingerprint")
+    def poke(cfg):
+        cfg["blobs"][1][0] ^= 0xFF
+
+    with pytest.raises(MutationDetected):
+        poke({"blobs": [bytearray(8), bytearray(8)]})
+
+
+def test_immutable_arguments_are_not_fingerprinted():
+    from dataclasses import dataclass
+
+    from wrapper import _fingerprint
+
+    @dataclass(frozen=True)
+    class Cfg:
+        lr: float
+        tags: tuple
+
+    for value in (1, "s", b"b" * 1000, (1, ("x", None)), frozenset({1}), Cfg(0.1, ("a",))):
+        assert _fingerprint(value) == "immutable"
+    assert _fingerprint(([1],)) != "immutable"
+    assert _fingerprint(Cfg(0.1, ([1],))) != "immutable"
+
+
+def test_numpy_array_mutation_is_detected():
+    np = pytest.importorskip("numpy")
+
+    @no_optimisation_wrapper(mode="fingerprint")
+    def scale(a):
+        a *= 2
+
+    with pytest.raises(MutationDetected):
+        scale(np.arange(10.0))
+
+
+def test_proxy_mode_reports_exact_path_and_blocks_the_write():
+    @no_optimisation_wrapper(mode="proxy")
+    def tune(job):
+        job["cfg"]["lr"] = 0.5
+
+    job = {"cfg": {"lr": 0.1}}
+    with pytest.raises(MutationDetected) as exc:
+        tune(job)
+    assert exc.value.path == "args[0]['cfg']['lr']"
+    assert job == {"cfg": {"lr": 0.1}}
+    assert tune.stats.mutations == 1
+
+
+@pytest.mark.parametrize("body, path", [
+    (lambda xs, *, opts: xs[1].append(0), "args[0][1].append()"),
+    (lambda xs, *, opts: opts.add("x"), "kwargs['opts'].add()"),
+    (lambda xs, *, opts: xs.sort(), "args[0].sort()"),
+])
+def test_proxy_mode_covers_lists_and_sets(body, path):
+    w = no_optimisation_wrapper(body, mode="proxy")
+    with pytest.raises(MutationDetected) as exc:
+        w([[1], [2]], opts={"a"})
+    assert exc.value.path == path
+
+
+def test_proxy_mode_refuses_attribute_writes():
+    class Model:
+        def __init__(self):
+            self.weights = [1.0]
+
+    @no_optimisation_wrapper(mode="proxy")
+    def train(m):
+        m.weights = []
+
+    with pytest.raises(MutationDetected) as exc:
+        train(Model())
+    assert exc.value.path == "args[0].weights"
+
+
+def test_proxy_mode_allows_reads():
+    @no_optimisation_wrapper(mode="proxy")
+    def read(cfg, xs):
+        return (cfg["a"]["b"], cfg.get("missing", 7), sorted(cfg), xs[-1],
+                [x * 2 for x in xs], 2 in xs, xs == [1, 2, 3], bytes(cfg["buf"]))
+
+    assert read({"a": {"b": 1}, "buf": bytearray(b"z")}, [1, 2, 3]) == (
+        1, 7, ["a", "buf"], 3, [2, 4, 6], True, True, b"z",
+    )
+
+
+def test_proxy_mode_returns_plain_values():
+    @no_optimisation_wrapper(mode="proxy")
+    def pick(cfg, xs):
+        return cfg["a"], {"first": xs[0], "all": [cfg["a"], xs]}
+
+    cfg, xs = {"a": [1]}, [[2], [3]]
+    a, out = pick(cfg, xs)
+    assert type(a) is list and a is cfg["a"]
+    assert out["first"] is xs[0] and out["all"][1] is xs
+    a.append(2)  # the caller owns its data again once the call returns
+    assert cfg == {"a": [1, 2]} and pick.stats.mutations == 0
+
+
+@pytest.mark.parametrize("body, expected", [
+    (lambda cfg, xs, t, s: cfg.copy(), {"a": [1], "n": 2}),
+    (lambda cfg, xs, t, s: cfg | {"n": 3}, {"a": [1], "n": 3}),
+    (lambda cfg, xs, t, s: {"z": 0} | cfg, {"z": 0, "a": [1], "n": 2}),
+    (lambda cfg, xs, t, s: xs + [3], [[1], 2, 3]),
+    (lambda cfg, xs, t, s: [0] + xs, [0, [1], 2]),
+    (lambda cfg, xs, t, s: xs[:1] * 2, [[1], [1]]),
+    (lambda cfg, xs, t, s: t + (1,), ([0], 1)),
+    (lambda cfg, xs, t, s: s | {9}, {1, 9}),
+    (lambda cfg, xs, t, s: (hash(("k", 1)), xs < [[2]], sorted([xs, [[0]]])[0]),
+     (hash(("k", 1)), True, [[0]])),
+])
+def test_proxy_mode_pure_functions_copy_and_concatenate(body, expected):
+    cfg, xs, t, s = {"a": [1], "n": 2}, [[1], 2], ([0],), {1}
+    w = no_optimisation_wrapper(body, mode="proxy")
+    result = w(cfg, xs, t, s)
+    assert result == expected and type(result) is type(expected)
+    assert cfg == {"a": [1], "n": 2} and xs == [[1], 2] and t == ([0],) and s == {1}
+    assert w.stats.mutations == 0
+
+
+def test_proxy_mode_copies_still_protect_nested_input():
+    @no_optimisation_wrapper(mode="proxy")
+    def sneaky(cfg):
+        c = cfg.copy()
+        c["a"].append(2)
+
+    with pytest.raises(MutationDetected) as exc:
+        sneaky({"a": [1]})
+    assert exc.value.path == "args[0]['a'].append()"
+
+
+def test_proxy_mode_counts_writes_the_function_swallows():
+    @no_optimisation_wrapper(mode="proxy")
+    def careless(xs):
+        try:
+            xs.append(1)
+        except Exception:
+            pass
+        return len(xs)
+
+    assert careless([]) == 0
+    assert careless.stats.mutations == 1
+
+
+def test_proxy_mode_passes_buffers_and_checks_them_by_fingerprint():
+    @no_optimisation_wrapper(mode="proxy")
+    def decode(msg):
+        return msg["body"].decode()
+
+    @no_optimisation_wrapper(mode="proxy")
+    def scribble(msg):
+        msg["body"][0] = ord("X")
+
+    msg = {"body": bytearray(b"hi")}
+    assert decode(msg) == "hi"
+    with pytest.raises(MutationDetected) as exc:
+        scribble(msg)
+    assert exc.value.path == "args[0]['body']"
+    assert scribble.stats.mutations == 1
+
+
+def test_proxy_mode_truth_and_len_follow_the_target():
+    class Plain:
+        def __init__(self):
+            self.x = 1
+
+    class Empty:
+        def __init__(self):
+            self.items = []
+
+        def __len__(self):
+            return len(self.items)
+
+    @no_optimisation_wrapper(mode="proxy")
+    def probe(obj):
+        return bool(obj), hasattr(obj, "__len__") and len(obj)
+
+    assert probe(Plain()) == (True, False)
+    assert probe(Empty()) == (False, 0)
+    assert probe([]) == (False, 0) and probe({"a": 1}) == (True, 1)
+    with pytest.raises(TypeError):
+        no_optimisation_wrapper(len, mode="proxy")(Plain())
+
+
+def test_proxy_mode_passes_container_subclasses_and_fingerprints_them():
+    from collections import Counter, defaultdict
+
+    @no_optimisation_wrapper(mode="proxy")
+    def top(counts):
+        return counts.most_common(1)
+
+    assert top(Counter("abca")) == [("a", 2)]
+    assert top.stats.mutations == 0
+
+    @no_optimisation_wrapper(mode="proxy")
+    def lookup(msg):
+        return msg["groups"]["x"]
+
+    groups = defaultdict(list, {"a": [1]})
+    with pytest.raises(MutationDetected) as exc:
+        lookup({"groups": groups})
+    assert exc.value.path == "args[0]['groups']"
+    assert lookup.stats.mutations == 1
+
+
+@pytest.mark.parametrize("mode", ["fingerprint", "proxy"])
+def test_time_budget_limits_proxy_mode_too(mode):
+    w = no_optimisation_wrapper(
+        lambda cfg: cfg["a"], mode=mode, policy=TimeBudget(1e-12, clock=lambda: 0.0),
+    )
+    for _ in range(5):
+        assert w({"a": 1}) == 1
+    assert (w.stats.calls, w.stats.checked) == (5, 1)
+
+
+def test_proxy_mode_strips_generator_output():
+    @no_optimisation_wrapper(mode="proxy")
+    def rows(table):
+        got = yield table[0]
+        yield got
+        return table[1]
+
+    table = [[1], [2]]
+    g = rows(table)
+    assert next(g) is table[0]
+    assert g.send("x") == "x"
+    with pytest.raises(StopIteration) as stop:
+        next(g)
+    assert stop.value.value is table[1]
+
+
+def test_coroutine_is_checked_after_it_completes():
+    import asyncio
+
+    @no_optimisation_wrapper
+    async def grow(xs):
+        await asyncio.sleep(0)
+        xs.append(1)
+        return len(xs)
+
+    @no_optimisation_wrapper
+    async def count(xs):
+        await asyncio.sleep(0)
+        return len(xs)
+
+    assert asyncio.run(count([1, 2])) == 2
+    with pytest.raises(MutationDetected):
+        asyncio.run(grow([]))
+
+
+def test_large_async_inputs_are_snapshotted_off_the_loop(monkeypatch):
+    import asyncio
+    import threading
+
+    import wrapper
+
+    threads = []
+    real = wrapper.snapshot
+
+    def spy(*a, **k):
+        threads.append(threading.current_thread())
+        return real(*a, **k)
+
+    monkeypatch.setattr(wrapper, "snapshot", spy)
+
+    @no_optimisation_wrapper(mode="fingerprint", offload_threshold=1000)
+    async def read(xs):
+        return len(xs)
+
+    async def main():
+        await read([0])
+        await read(list(range(1000)))
+
+    asyncio.run(main())
+    assert threads[0] is threading.main_thread()
+    assert threads[1] is not threading.main_thread()
+
+
+def test_generator_is_checked_on_exhaustion_and_keeps_send():
+    @no_optimisation_wrapper
+    def echo(xs):
+        got = yield len(xs)
+        yield got
+        return "done"
+
+    @no_optimisation_wrapper
+    def drain(xs):
+        while xs:
+            yield xs.pop()
+
+    g = echo([1, 2])
+    assert next(g) == 2
+    assert g.send("hi") == "hi"
+    with pytest.raises(StopIteration) as stop:
+        next(g)
+    assert stop.value.value == "done"
+
+    with pytest.raises(MutationDetected):
+        list(drain([1, 2, 3]))
+
+
+def test_async_generator_is_checked_on_exhaustion():
+    import asyncio
+
+    @no_optimisation_wrapper
+    async def drain(xs):
+        while xs:
+            yield xs.pop()
+
+    @no_optimisation_wrapper(mode="proxy")
+    async def drain_proxied(xs):
+        while xs:
+            yield xs.pop()
+
+    @no_optimisation_wrapper
+    async def ticks(xs):
+        for x in xs:
+            got = yield x
+            if got:
+                yield got
+
+    async def collect(agen):
+        return [x async for x in agen]
+
+    async def talk():
+        g = ticks([1, 2])
+        first = await g.__anext__()
+        echoed = await g.asend("echo")
+        rest = [x async for x in g]
+        return first, echoed, rest
+
+    with pytest.raises(MutationDetected):
+        asyncio.run(collect(drain([1, 2])))
+    with pytest.raises(MutationDetected) as exc:
+        asyncio.run(collect(drain_proxied([1, 2])))
+    assert exc.value.path == "args[0].pop()"
+    assert asyncio.run(talk()) == (1, "echo", [2])
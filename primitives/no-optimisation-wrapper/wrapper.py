@@ -2,77 +2,822 @@
 
 from __future__ import annotations
 
+import asyncio
 import copy
+import dataclasses
 import hashlib
+import inspect
 import pickle
-from dataclasses import dataclass
-from typing import Any, Callable, Dict, Tuple
+import random
+import sys
+import threading
+import time
+import types
+import zlib
+from collections.abc import Mapping, Sequence, Set as AbstractSet
+from dataclasses import dataclass, field
+from enum import Enum
+from typing import Any, Callable, Dict, Iterator, Optional, Tuple
+
+MODES = ("deep", "fingerprint", "proxy")
 
 
 class MutationDetected(RuntimeError):
-    """Raised when a wrapped callable mutates its input arguments."""
+    """Raised when a wrapped callable mutates its input arguments.
+
+    `path` names the mutated location when it is known (proxy mode),
+    e.g. ``args[0]['cfg']['lr']``.
+    """
+
+    def __init__(self, message: str, path: Optional[str] = None) -> None:
+        super().__init__(message)
+        self.path = path
+
+
+class _Crc32:
+    """Non-cryptographic hashlib-style adapter: fast, but only 32 bits + length."""
+
+    __slots__ = ("_crc", "_n")
+
+    def __init__(self) -> None:
+        self._crc = 0
+        self._n = 0
+
+    def update(self, data: Any) -> None:
+        self._crc = zlib.crc32(data, self._crc)
+        self._n += memoryview(data).nbytes
+
+    def hexdigest(self) -> str:
+        return f"{self._crc:08x}:{self._n:x}"
+
+
+HASHES: Dict[str, Callable[[], Any]] = {
+    "sha256": hashlib.sha256,
+    "blake2b": hashlib.blake2b,
+    "crc32": _Crc32,
+}
+
+
+class _HashWriter:
+    """File-like sink so pickle streams into the hash without building bytes."""
+
+    __slots__ = ("write",)
+
+    def __init__(self, h: Any) -> None:
+        self.write = h.update
+
+
+class _FingerprintPickler(pickle.Pickler):
+    """Pickler that hashes buffer-protocol objects (bytearray, memoryview,
+    array.array, NumPy arrays, ...) straight from their memory.
+
+    Each buffer is replaced in the stream by a token carrying its type,
+    format, shape and digest. Lists, dicts, tuples, sets and scalars stay
+    on the C pickler's fast path, which never calls reducer_override.
+    """
+
+    def __init__(self, h: Any, algorithm: str) -> None:
+        super().__init__(_HashWriter(h), protocol=pickle.HIGHEST_PROTOCOL)
+        self._algorithm = algorithm
+
+    def reducer_override(self, obj: Any) -> Any:
+        try:
+            mv = memoryview(obj)
+        except (TypeError, ValueError):
+            return NotImplemented
+        with mv:
+            sub = HASHES[self._algorithm]()
+            sub.update(mv.cast("B") if mv.c_contiguous else mv.tobytes())
+            token = f"buffer:{type(obj).__qualname__}:{mv.format}:{mv.shape}:{sub.hexdigest()}"
+        return (str, (token,))
 
 
-def _fingerprint(obj: Any) -> str:
+# Exact types whose instances cannot change in place.
+_SCALARS = frozenset({type(None), bool, int, float, complex, str, bytes, range})
+
+
+def _is_immutable(obj: Any) -> bool:
+    """True for values no callee can mutate: scalars, enums, and tuples,
+    frozensets and frozen dataclasses built only from such values."""
+    t = type(obj)
+    if t in _SCALARS or isinstance(obj, Enum):
+        return True
+    if t is tuple or t is frozenset:
+        return all(map(_is_immutable, obj))
+    if (
+        dataclasses.is_dataclass(obj)
+        and not isinstance(obj, type)
+        and obj.__dataclass_params__.frozen  # type: ignore[attr-defined]
+    ):
+        return all(_is_immutable(getattr(obj, f.name)) for f in dataclasses.fields(obj))
+    return False
+
+
+def _fingerprint(obj: Any, algorithm: str = "sha256") -> str:
+    """Digest of obj's current state; immutable values are skipped."""
+    if _is_immutable(obj):
+        return "immutable"
+    h = HASHES[algorithm]()
     try:
-        data = pickle.dumps(obj, protocol=pickle.HIGHEST_PROTOCOL)
+        _FingerprintPickler(h, algorithm).dump(obj)
     except Exception:
-        data = repr(obj).encode("utf-8", errors="replace")
-    return hashlib.sha256(data).hexdigest()
+        h.update(b"repr:")
+        h.update(repr(obj).encode("utf-8", errors="replace"))
+    return h.hexdigest()
 
 
 @dataclass(frozen=True)
 class Snapshot:
-    args_copy: Tuple[Any, ...]
-    kwargs_copy: Dict[str, Any]
+    args_copy: Optional[Tuple[Any, ...]]
+    kwargs_copy: Optional[Dict[str, Any]]
     args_fp: Tuple[str, ...]
     kwargs_fp: Dict[str, str]
+    algorithm: str = "sha256"
 
 
-def snapshot(args: Tuple[Any, ...], kwargs: Dict[str, Any]) -> Snapshot:
-    args_copy = copy.deepcopy(args)
-    kwargs_copy = copy.deepcopy(kwargs)
-    args_fp = tuple(_fingerprint(a) for a in args)
-    kwargs_fp = {k: _fingerprint(v) for k, v in kwargs.items()}
+def snapshot(
+    args: Tuple[Any, ...],
+    kwargs: Dict[str, Any],
+    deep: bool = True,
+    algorithm: str = "sha256",
+) -> Snapshot:
+    """Fingerprint args/kwargs; with deep=True also keep deep copies."""
+    args_copy = copy.deepcopy(args) if deep else None
+    kwargs_copy = copy.deepcopy(kwargs) if deep else None
+    args_fp = tuple(_fingerprint(a, algorithm) for a in args)
+    kwargs_fp = {k: _fingerprint(v, algorithm) for k, v in kwargs.items()}
     return Snapshot(
         args_copy=args_copy, kwargs_copy=kwargs_copy,
-        args_fp=args_fp, kwargs_fp=kwargs_fp,
+        args_fp=args_fp, kwargs_fp=kwargs_fp, algorithm=algorithm,
     )
 
 
 def _diff_snapshot(
     before: Snapshot, args: Tuple[Any, ...], kwargs: Dict[str, Any],
 ) -> str | None:
-    after_args_fp = tuple(_fingerprint(a) for a in args)
-    after_kwargs_fp = {k: _fingerprint(v) for k, v in kwargs.items()}
+    algorithm = before.algorithm
+    after_args_fp = tuple(_fingerprint(a, algorithm) for a in args)
     if after_args_fp != before.args_fp:
         return "args"
+    after_kwargs_fp = {k: _fingerprint(v, algorithm) for k, v in kwargs.items()}
     if after_kwargs_fp != before.kwargs_fp:
         return "kwargs"
     try:
-        if args != before.args_copy:
+        if before.args_copy is not None and args != before.args_copy:
             return "args"
     except Exception:
         pass
     try:
-        if kwargs != before.kwargs_copy:
+        if before.kwargs_copy is not None and kwargs != before.kwargs_copy:
             return "kwargs"
     except Exception:
         pass
     return None
 
 
-def no_optimisation_wrapper(fn: Callable[..., Any]) -> Callable[..., Any]:
-    """Wrap fn and refuse hidden state mutation of arguments."""
-    def wrapped(*args: Any, **kwargs: Any) -> Any:
-        before = snapshot(args, kwargs)
-        result = fn(*args, **kwargs)
-        changed = _diff_snapshot(before, args, kwargs)
+# ---------------------------------------------------------------------------
+# Read-only proxies: refuse writes at the moment they happen.
+# ---------------------------------------------------------------------------
+
+_PASSTHROUGH = (
+    type, types.ModuleType, types.FunctionType, types.BuiltinFunctionType,
+    types.MethodType,
+)
+
+
+class _Call:
+    """State shared by the proxies of one checked call: how many writes were
+    refused, and the values passed through unwrapped (buffers, container
+    subclasses) that were read, checked by fingerprint after the call."""
+
+    __slots__ = ("algorithm", "refused", "watched")
+
+    def __init__(self, algorithm: str) -> None:
+        self.algorithm = algorithm
+        self.refused = 0
+        self.watched: Dict[int, Tuple[Any, str, str]] = {}  # id -> (obj, path, fp)
+
+    def watch(self, obj: Any, path: str) -> None:
+        if id(obj) not in self.watched:
+            self.watched[id(obj)] = (obj, path, _fingerprint(obj, self.algorithm))
+
+    def changed(self) -> Optional[str]:
+        """Path of the first watched value whose contents changed, if any."""
+        for obj, path, fp in self.watched.values():
+            if _fingerprint(obj, self.algorithm) != fp:
+                return path
+        return None
+
+
+def _refuse(proxy: "_Proxy", what: str) -> None:
+    object.__getattribute__(proxy, "_call").refused += 1
+    path = f"{object.__getattribute__(proxy, '_path')}{what}"
+    raise MutationDetected(f"Input mutation detected at {path}", path=path)
+
+
+def _unwrap(obj: Any) -> Any:
+    return object.__getattribute__(obj, "_target") if isinstance(obj, _Proxy) else obj
+
+
+def _wrap(obj: Any, path: str, call: _Call) -> Any:
+    """Wrap obj in a read-only view whose children are wrapped on access.
+
+    Immutable values pass through. Buffers and subclasses of the built-in
+    containers (Counter, defaultdict, namedtuples, ...) pass through
+    unchanged too: a view would hide their own methods, and a defaultdict
+    would run __missing__ on the caller's dict. They are fingerprinted
+    here and re-checked when the call returns.
+    """
+    t = type(obj)
+    if t in _SCALARS or isinstance(obj, (Enum, _Proxy) + _PASSTHROUGH):
+        return obj
+    if t is dict:
+        return _DictProxy(obj, path, call)
+    if (t is tuple or t is frozenset) and _is_immutable(obj):
+        return obj
+    if t is list or t is tuple:
+        return _SeqProxy(obj, path, call)
+    if t is set or t is frozenset:
+        return _SetProxy(obj, path, call)
+    if isinstance(obj, (dict, list, tuple, set, frozenset)):
+        call.watch(obj, path)
+        return obj
+    try:
+        memoryview(obj).release()
+    except (TypeError, ValueError):
+        pass
+    else:
+        call.watch(obj, path)
+        return obj
+    if hasattr(obj, "__dict__") or hasattr(t, "__slots__"):
+        if hasattr(t, "__len__"):
+            return _SizedObjectProxy(obj, path, call)
+        return _ObjectProxy(obj, path, call)
+    return obj
+
+
+def _strip(obj: Any, seen: Optional[set] = None) -> Any:
+    """obj with every proxy in it replaced by its target.
+
+    Lists and dicts are fixed in place, tuples and sets are rebuilt; a
+    container with no proxies in it is returned as is.
+    """
+    if isinstance(obj, _Proxy):
+        return object.__getattribute__(obj, "_target")
+    t = type(obj)
+    if t not in (list, tuple, dict, set, frozenset):
+        return obj
+    if seen is None:
+        seen = set()
+    if id(obj) in seen:
+        return obj
+    seen.add(id(obj))
+    if t is list:
+        for i, v in enumerate(obj):
+            s = _strip(v, seen)
+            if s is not v:
+                obj[i] = s
+        return obj
+    if t is dict:
+        items = [(_strip(k, seen), _strip(v, seen)) for k, v in obj.items()]
+        if any(k is not k0 for (k, _), k0 in zip(items, obj)):
+            obj.clear()
+            obj.update(items)
+        else:
+            for k, v in items:
+                if v is not obj[k]:
+                    obj[k] = v
+        return obj
+    stripped = [_strip(v, seen) for v in obj]
+    if all(s is v for s, v in zip(stripped, obj)):
+        return obj
+    return t(stripped)
+
+
+class _Proxy:
+    __slots__ = ("_target", "_path", "_call")
+
+    def __init__(self, target: Any, path: str, call: _Call) -> None:
+        object.__setattr__(self, "_target", target)
+        object.__setattr__(self, "_path", path)
+        object.__setattr__(self, "_call", call)
+
+    def _child(self, value: Any, suffix: str) -> Any:
+        return _wrap(value, f"{self._path}{suffix}", self._call)
+
+    def __repr__(self) -> str:
+        return repr(self._target)
+
+    def __bool__(self) -> bool:
+        return bool(self._target)
+
+    def __contains__(self, item: Any) -> bool:
+        return _unwrap(item) in self._target
+
+    def __eq__(self, other: Any) -> bool:
+        return self._target == _unwrap(other)
+
+    def __ne__(self, other: Any) -> bool:
+        return self._target != _unwrap(other)
+
+    def __hash__(self) -> int:
+        return hash(self._target)
+
+    def __deepcopy__(self, memo: Dict[int, Any]) -> Any:
+        return copy.deepcopy(self._target, memo)
+
+
+class _SizedProxy(_Proxy):
+    """Adds len(); only for targets that have one."""
+
+    __slots__ = ()
+
+    def __len__(self) -> int:
+        return len(self._target)
+
+
+def _refusing(*names: str) -> Callable[[type], type]:
+    """Class decorator: define each mutator in *names* to refuse the write."""
+    def deco(cls: type) -> type:
+        for name in names:
+            def method(self: Any, *a: Any, _name: str = name, **k: Any) -> Any:
+                if _name in ("__setitem__", "__delitem__") and a:
+                    _refuse(self, f"[{a[0]!r}]")
+                _refuse(self, f".{_name}()")
+            method.__name__ = name
+            setattr(cls, name, method)
+        return cls
+    return deco
+
+
+@_refusing(
+    "__setitem__", "__delitem__", "__ior__", "clear", "pop", "popitem",
+    "setdefault", "update",
+)
+class _DictProxy(_SizedProxy, Mapping):
+    """Copies are real dicts whose values are still read-only views, so the
+    nested input stays protected; proxies are stripped on return."""
+
+    __slots__ = ()
+
+    def __getitem__(self, key: Any) -> Any:
+        return self._child(self._target[key], f"[{key!r}]")
+
+    def __iter__(self) -> Iterator[Any]:
+        return iter(self._target)
+
+    def get(self, key: Any, default: Any = None) -> Any:
+        if key in self._target:
+            return self[key]
+        return default
+
+    def copy(self) -> Dict[Any, Any]:
+        return {k: self[k] for k in self._target}
+
+    __copy__ = copy
+
+    def __or__(self, other: Any) -> Any:
+        if not isinstance(other, (dict, _DictProxy)):
+            return NotImplemented
+        return self.copy() | _unwrap(other)
+
+    def __ror__(self, other: Any) -> Any:
+        if not isinstance(other, dict):
+            return NotImplemented
+        return other | self.copy()
+
+
+@_refusing(
+    "__setitem__", "__delitem__", "__iadd__", "__imul__", "append", "clear",
+    "extend", "insert", "pop", "remove", "reverse", "sort",
+)
+class _SeqProxy(_SizedProxy, Sequence):
+    """Slices, copies, + and * give real lists/tuples of read-only items."""
+
+    __slots__ = ()
+
+    def __getitem__(self, index: Any) -> Any:
+        if isinstance(index, slice):
+            idx = range(*index.indices(len(self._target)))
+            return self._kind(self._child(self._target[i], f"[{i}]") for i in idx)
+        return self._child(self._target[index], f"[{index}]")
+
+    def __iter__(self) -> Iterator[Any]:
+        for i, v in enumerate(self._target):
+            yield self._child(v, f"[{i}]")
+
+    @property
+    def _kind(self) -> type:
+        return tuple if isinstance(self._target, tuple) else list
+
+    def copy(self) -> Any:
+        return self[:]
+
+    __copy__ = copy
+
+    def __add__(self, other: Any) -> Any:
+        other = _unwrap(other)
+        if not isinstance(other, self._kind):
+            return NotImplemented
+        return self[:] + other
+
+    def __radd__(self, other: Any) -> Any:
+        if not isinstance(other, self._kind):
+            return NotImplemented
+        return other + self[:]
+
+    def __mul__(self, n: Any) -> Any:
+        return self[:] * n
+
+    __rmul__ = __mul__
+
+    def __lt__(self, other: Any) -> bool:
+        return self._target < _unwrap(other)
+
+    def __le__(self, other: Any) -> bool:
+        return self._target <= _unwrap(other)
+
+    def __gt__(self, other: Any) -> bool:
+        return self._target > _unwrap(other)
+
+    def __ge__(self, other: Any) -> bool:
+        return self._target >= _unwrap(other)
+
+
+@_refusing(
+    "__ior__", "__iand__", "__isub__", "__ixor__", "add", "clear", "discard",
+    "pop", "remove", "update", "intersection_update", "difference_update",
+    "symmetric_difference_update",
+)
+class _SetProxy(_SizedProxy, AbstractSet):
+    """Set algebra (|, &, -, ^) and copy() give real sets/frozensets."""
+
+    __slots__ = ()
+
+    def __iter__(self) -> Iterator[Any]:
+        for v in self._target:
+            yield self._child(v, f"{{{v!r}}}")
+
+    def _from_iterable(self, it: Any) -> Any:
+        return (frozenset if isinstance(self._target, frozenset) else set)(it)
+
+    def copy(self) -> Any:
+        return self._from_iterable(self)
+
+    __copy__ = copy
+
+    def union(self, *others: Any) -> Any:
+        return self.copy().union(*map(_unwrap, others))
+
+    def intersection(self, *others: Any) -> Any:
+        return self.copy().intersection(*map(_unwrap, others))
+
+    def difference(self, *others: Any) -> Any:
+        return self.copy().difference(*map(_unwrap, others))
+
+    def symmetric_difference(self, other: Any) -> Any:
+        return self.copy().symmetric_difference(_unwrap(other))
+
+    def issubset(self, other: Any) -> bool:
+        return self._target.issubset(_unwrap(other))
+
+    def issuperset(self, other: Any) -> bool:
+        return self._target.issuperset(_unwrap(other))
+
+
+class _ObjectProxy(_Proxy):
+    """Attribute reads are wrapped; attribute writes and deletes are refused.
+
+    Mutation performed inside the object's own methods is not visible.
+    """
+
+    __slots__ = ()
+
+    def __getattr__(self, name: str) -> Any:
+        return self._child(getattr(self._target, name), f".{name}")
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        _refuse(self, f".{name}")
+
+    def __delattr__(self, name: str) -> None:
+        _refuse(self, f".{name}")
+
+    def __call__(self, *args: Any, **kwargs: Any) -> Any:
+        return self._target(*args, **kwargs)
+
+
+class _SizedObjectProxy(_SizedProxy, _ObjectProxy):
+    __slots__ = ()
+
+
+def _stripping(gen: Any) -> Any:
+    """Drive gen, forwarding send/throw/close, with proxies stripped from
+    what it yields. The return value is stripped by the caller."""
+    try:
+        value = next(gen)
+        while True:
+            try:
+                sent = yield _strip(value)
+            except GeneratorExit:
+                gen.close()
+                raise
+            except BaseException as e:
+                value = gen.throw(e)
+            else:
+                value = gen.send(sent)
+    except StopIteration as stop:
+        return stop.value
+
+
+# ---------------------------------------------------------------------------
+# Enforcement policies: decide which calls pay for a snapshot/diff.
+# ---------------------------------------------------------------------------
+
+@dataclass
+class Always:
+    """Check every call (default)."""
+
+    def should_check(self) -> bool:
+        return True
+
+    def record(self, cost: float) -> None:
+        pass
+
+
+@dataclass
+class EveryNth:
+    """Check calls 1, n+1, 2n+1, ..."""
+
+    n: int
+    _count: int = 0
+
+    def __post_init__(self) -> None:
+        if self.n < 1:
+            raise ValueError("n must be >= 1")
+
+    def should_check(self) -> bool:
+        hit = self._count % self.n == 0
+        self._count += 1
+        return hit
+
+    def record(self, cost: float) -> None:
+        pass
+
+
+@dataclass
+class RandomFraction:
+    """Check a random fraction of calls; the seed makes the choice replayable."""
+
+    fraction: float
+    seed: int = 0
+    _rng: random.Random = field(init=False, repr=False)
+
+    def __post_init__(self) -> None:
+        if not 0.0 <= self.fraction <= 1.0:
+            raise ValueError("fraction must be in [0, 1]")
+        self._rng = random.Random(self.seed)
+
+    def should_check(self) -> bool:
+        return self._rng.random() < self.fraction
+
+    def record(self, cost: float) -> None:
+        pass
+
+
+@dataclass
+class TimeBudget:
+    """Check calls until `seconds_per_second` of checking time is spent
+    in the current one-second window."""
+
+    seconds_per_second: float
+    clock: Callable[[], float] = time.perf_counter
+    _window: float = field(default=float("-inf"), repr=False)
+    _spent: float = 0.0
+
+    def __post_init__(self) -> None:
+        if self.seconds_per_second < 0:
+            raise ValueError("seconds_per_second must be >= 0")
+
+    def should_check(self) -> bool:
+        now = self.clock()
+        if now - self._window >= 1.0:
+            self._window = now
+            self._spent = 0.0
+        return self._spent < self.seconds_per_second
+
+    def record(self, cost: float) -> None:
+        self._spent += cost
+
+
+@dataclass
+class WrapperStats:
+    """Per-function counters exposed as `wrapped.stats`."""
+
+    calls: int = 0
+    checked: int = 0
+    mutations: int = 0
+
+
+def no_optimisation_wrapper(
+    fn: Optional[Callable[..., Any]] = None,
+    *,
+    mode: str = "deep",
+    algorithm: str = "sha256",
+    policy: Any = None,
+    offload_threshold: int = 1 << 20,
+) -> Callable[..., Any]:
+    """Wrap fn and refuse hidden state mutation of arguments.
+
+    mode="deep" keeps deep copies and also compares by equality after
+    the fingerprints. mode="fingerprint" makes no copies and relies on a
+    single streamed fingerprint pass before and after the call.
+    mode="proxy" passes read-only proxies for dicts, lists, tuples, sets
+    and attribute-bearing objects and raises at the first write, naming
+    its path; buffers and container subclasses are passed as is and
+    fingerprinted, and a changed one is reported after the call. Proxies are stripped from the return
+    value. Cost scales with the parts of the input actually touched.
+    algorithm selects the hash: "sha256", "blake2b", or the
+    non-cryptographic "crc32".
+
+    policy decides which calls are checked (Always, EveryNth,
+    RandomFraction, TimeBudget). Each wrapped function gets its own copy
+    of the policy; counters are available as `wrapped.stats`.
+
+    Coroutines, generators and async generators are checked when they
+    finish or are exhausted. For async callables whose arguments'
+    shallow size reaches offload_threshold bytes, snapshot and diff run
+    on a worker thread so the event loop is not blocked.
+    """
+    if mode not in MODES:
+        raise ValueError(f"mode must be one of {MODES}, got {mode!r}")
+    if algorithm not in HASHES:
+        raise ValueError(f"algorithm must be one of {tuple(HASHES)}, got {algorithm!r}")
+    if fn is None:
+        return lambda f: no_optimisation_wrapper(
+            f, mode=mode, algorithm=algorithm, policy=policy,
+            offload_threshold=offload_threshold,
+        )
+    deep = mode == "deep"
+    proxy = mode == "proxy"
+    pol = copy.deepcopy(policy) if policy is not None else Always()
+    stats = WrapperStats()
+    lock = threading.Lock()
+    name = getattr(fn, "__name__", "callable")
+
+    def admit() -> bool:
+        with lock:
+            stats.calls += 1
+            check = pol.should_check()
+            if check:
+                stats.checked += 1
+        return check
+
+    def proxied(
+        args: Tuple[Any, ...], kwargs: Dict[str, Any],
+    ) -> Tuple[_Call, float, Tuple[Any, ...], Dict[str, Any]]:
+        t0 = time.perf_counter()
+        call = _Call(algorithm)
+        pargs = tuple(_wrap(a, f"args[{i}]", call) for i, a in enumerate(args))
+        pkwargs = {k: _wrap(v, f"kwargs[{k!r}]", call) for k, v in kwargs.items()}
+        return call, time.perf_counter() - t0, pargs, pkwargs
+
+    def settle(call: _Call, cost: float, returned: bool, result: Any = None) -> Any:
+        """Count a refused write even if fn caught it; after a normal return,
+        also re-check the watched values fn read and strip result.
+
+        Wrapping, this check and the strip are recorded with the policy;
+        proxies wrapped while fn runs are not timed.
+        """
+        t0 = time.perf_counter()
+        changed = call.changed() if returned else None
+        if returned:
+            result = _strip(result)
+        cost += time.perf_counter() - t0
+        with lock:
+            pol.record(cost)
+            if call.refused or changed is not None:
+                stats.mutations += 1
         if changed is not None:
-            raise MutationDetected(
-                f"Input mutation detected in {changed} for {getattr(fn, '__name__', 'callable')}"
-            )
+            raise MutationDetected(f"Input mutation detected at {changed}", path=changed)
         return result
+
+    def begin(args: Tuple[Any, ...], kwargs: Dict[str, Any]) -> Tuple[Snapshot, float]:
+        t0 = time.perf_counter()
+        before = snapshot(args, kwargs, deep=deep, algorithm=algorithm)
+        return before, time.perf_counter() - t0
+
+    def finish(
+        before: Snapshot, cost: float, args: Tuple[Any, ...], kwargs: Dict[str, Any],
+    ) -> None:
+        t0 = time.perf_counter()
+        changed = _diff_snapshot(before, args, kwargs)
+        cost += time.perf_counter() - t0
+        with lock:
+            pol.record(cost)
+            if changed is not None:
+                stats.mutations += 1
+        if changed is not None:
+            raise MutationDetected(f"Input mutation detected in {changed} for {name}")
+
+    def offload(args: Tuple[Any, ...], kwargs: Dict[str, Any]) -> bool:
+        size = sum(map(sys.getsizeof, args)) + sum(map(sys.getsizeof, kwargs.values()))
+        return size >= offload_threshold
+
+    if inspect.isasyncgenfunction(fn):
+        async def wrapped(*args: Any, **kwargs: Any) -> Any:
+            check = admit()
+            call = None
+            call_args, call_kwargs = args, kwargs
+            if check and proxy:
+                call, cost, call_args, call_kwargs = proxied(args, kwargs)
+            before = None
+            if check and not proxy:
+                if offload(args, kwargs):
+                    before, cost = await asyncio.to_thread(begin, args, kwargs)
+                else:
+                    before, cost = begin(args, kwargs)
+            agen = fn(*call_args, **call_kwargs)
+            try:
+                value = await agen.__anext__()
+                while True:
+                    try:
+                        sent = yield value if call is None else _strip(value)
+                    except GeneratorExit:
+                        await agen.aclose()
+                        raise
+                    except BaseException as e:
+                        value = await agen.athrow(e)
+                    else:
+                        value = await agen.asend(sent)
+            except StopAsyncIteration:
+                pass
+            except BaseException:
+                if call is not None:
+                    settle(call, cost, False)
+                raise
+            if call is not None:
+                settle(call, cost, True)
+            if before is not None:
+                if offload(args, kwargs):
+                    await asyncio.to_thread(finish, before, cost, args, kwargs)
+                else:
+                    finish(before, cost, args, kwargs)
+    elif inspect.iscoroutinefunction(fn):
+        async def wrapped(*args: Any, **kwargs: Any) -> Any:  # type: ignore[misc]
+            if not admit():
+                return await fn(*args, **kwargs)
+            if proxy:
+                call, cost, pargs, pkwargs = proxied(args, kwargs)
+                try:
+                    result = await fn(*pargs, **pkwargs)
+                except BaseException:
+                    settle(call, cost, False)
+                    raise
+                return settle(call, cost, True, result)
+            off = offload(args, kwargs)
+            if off:
+                before, cost = await asyncio.to_thread(begin, args, kwargs)
+            else:
+                before, cost = begin(args, kwargs)
+            result = await fn(*args, **kwargs)
+            if off:
+                await asyncio.to_thread(finish, before, cost, args, kwargs)
+            else:
+                finish(before, cost, args, kwargs)
+            return result
+    elif inspect.isgeneratorfunction(fn):
+        def wrapped(*args: Any, **kwargs: Any) -> Any:  # type: ignore[misc]
+            if not admit():
+                return (yield from fn(*args, **kwargs))
+            if proxy:
+                call, cost, pargs, pkwargs = proxied(args, kwargs)
+                try:
+                    result = yield from _stripping(fn(*pargs, **pkwargs))
+                except BaseException:
+                    settle(call, cost, False)
+                    raise
+                return settle(call, cost, True, result)
+            before, cost = begin(args, kwargs)
+            result = yield from fn(*args, **kwargs)
+            finish(before, cost, args, kwargs)
+            return result
+    else:
+        def wrapped(*args: Any, **kwargs: Any) -> Any:  # type: ignore[misc]
+            if not admit():
+                return fn(*args, **kwargs)
+            if proxy:
+                call, cost, pargs, pkwargs = proxied(args, kwargs)
+                try:
+                    result = fn(*pargs, **pkwargs)
+                except BaseException:
+                    settle(call, cost, False)
+                    raise
+                return settle(call, cost, True, result)
+            before, cost = begin(args, kwargs)
+            result = fn(*args, **kwargs)
+            finish(before, cost, args, kwargs)
+            return result
     wrapped.__name__ = getattr(fn, "__name__", "wrapped")
     wrapped.__doc__ = getattr(fn, "__doc__", None)
+    wrapped.stats = stats  # type: ignore[attr-defined]
     return wrapped